@@ -1,8 +1,6 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -66,140 +64,69 @@ def local_css():
 
 local_css()
 
-@st.cache_data
+import sys
+import os
+if os.path.abspath('src') not in sys.path:
+    sys.path.append(os.path.abspath('src'))
+
+# The dataset is shared by every session; copy-on-write keeps per-page slices from writing into it
+# (always on from pandas 3)
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+import instrumentation
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Opt-in timings, cache hits and memory: SL_APP_INSTRUMENT=1 for every session, or ?instrument=1 for one
+_ctx = get_script_run_ctx()
+instrumentation.start_run(_ctx.session_id if _ctx else None, None,
+                          enabled=instrumentation.enabled_by_env() or st.query_params.get("instrument") == "1")
+
+@instrumentation.count_cache('player_data')
+@st.cache_resource(max_entries=2, show_spinner=False)
+@instrumentation.mark_cache_miss
+def _shared_player_data(dataset_key):
+    from app_dataset import load_app_dataset
+    return load_app_dataset()
+
+@instrumentation.count_cache('player_index')
+@st.cache_resource(max_entries=2, show_spinner=False)
+@instrumentation.mark_cache_miss
+def _shared_player_index(dataset_key):
+    from player_index import PlayerIndex
+    return PlayerIndex(_shared_player_data(dataset_key))
+
+@instrumentation.count_cache('aggregates')
+@st.cache_resource(max_entries=2, show_spinner=False)
+@instrumentation.mark_cache_miss
+def _shared_aggregates(dataset_key):
+    from aggregate_cube import aggregates_for
+    digest = dataset_key[1] if dataset_key[0] == 'dataset' else None
+    return aggregates_for(_shared_player_data(dataset_key), digest)
+
 def load_real_player_data():
-    try:
-        df_bat = pd.read_csv('data/processed/player_labeled_batting.csv')
-        df_bat['match_date'] = pd.to_datetime(df_bat['match_date'])
-    except Exception:
-        df_bat = pd.DataFrame()
-        
-    try:
-        df_bowl = pd.read_csv('data/processed/player_labeled_bowling.csv')
-        df_bowl['match_date'] = pd.to_datetime(df_bowl['match_date'])
-    except Exception:
-        df_bowl = pd.DataFrame()
-        
-    if df_bat.empty and df_bowl.empty:
+    """App-ready dataset from the pipeline, held once per content hash and shared read-only across sessions."""
+    from app_dataset import dataset_key
+    df = _shared_player_data(dataset_key())
+    if df.empty:
         st.error("No processed data found. Please run the ML pipeline first.")
-        return pd.DataFrame()
-        
-    if not df_bat.empty and not df_bowl.empty:
-        df = pd.merge(df_bat, df_bowl, on=['match_id', 'match_date', 'player'], how='outer', suffixes=('_bat', '_bowl'))
-    elif not df_bat.empty:
-        df = df_bat.copy()
-        df['performance_score_bowl'] = 0
-    else:
-        df = df_bowl.copy()
-        df['performance_score_bat'] = 0
-
-    # Fill NA stats with 0
-    for col in df.columns:
-        if ('runs' in col or 'wickets' in col or 'balls' in col or 'boundaries' in col or 'dismissed' in col or 'score' in col):
-            df[col] = df[col].fillna(0)
-            
-    # Composite Performance Score
-    score_cols = [c for c in df.columns if 'performance_score' in c and c != 'performance_score']
-    if len(score_cols) > 0:
-        df['performance_score'] = df[score_cols].max(axis=1)
-    elif 'performance_score' not in df.columns:
-        df['performance_score'] = 0
-        
-    # Recalculate Labels
-    conditions = [
-        (df['performance_score'] >= 75),
-        (df['performance_score'] >= 50),
-        (df['performance_score'] >= 25)
-    ]
-    choices = ['Excellent', 'Good', 'Average']
-    df['performance_label'] = np.select(conditions, choices, default='Poor')
-    
-    # Mock some UI-required columns not in raw Cricsheet extraction yet
-    np.random.seed(42)
-    opponents = ["India", "Australia", "England", "Pakistan", "South Africa", "New Zealand", "Bangladesh", "West Indies", "Afghanistan"]
-    
-    # Generate stable mock data based on match_id hash for consistency
-    if 'match_id' in df.columns:
-        df['opponent'] = df['match_id'].apply(lambda x: opponents[x % len(opponents)])
-        df['venue'] = df['match_id'].apply(lambda x: ["Home", "Away", "Neutral"][x % 3])
-        df['match_result'] = df['match_id'].apply(lambda x: "Win" if x % 2 == 0 else "Loss")
-    else:
-        df['opponent'] = np.random.choice(opponents, size=len(df))
-        df['venue'] = np.random.choice(["Home", "Away", "Neutral"], size=len(df), p=[0.4, 0.4, 0.2])
-        df['match_result'] = np.random.choice(["Win", "Loss"], size=len(df), p=[0.45, 0.55])
-        
-    df['player_of_match'] = (df['performance_score'] > 80) & (df['match_result'] == 'Win')
-    
-    # Load roles from central logic
-    import sys
-    import os
-    sys.path.append(os.path.abspath('src'))
-    try:
-        from select_team import PLAYER_ROLES
-        df['role'] = df['player'].map(PLAYER_ROLES).fillna('allrounder')
-    except ImportError:
-        df['role'] = 'allrounder'
-        
-    # Standardize names for Streamlit UI expectations
-    if 'runs_scored_bat' in df.columns: df.rename(columns={'runs_scored_bat': 'runs_scored'}, inplace=True)
-    if 'runs_scored_y' in df.columns: df.rename(columns={'runs_scored_y': 'runs_scored'}, inplace=True)
-    if 'wickets_taken_bowl' in df.columns: df.rename(columns={'wickets_taken_bowl': 'wickets_taken'}, inplace=True)
-    if 'wickets_taken_y' in df.columns: df.rename(columns={'wickets_taken_y': 'wickets_taken'}, inplace=True)
-    
-    # Ensure columns exist
-    if 'runs_scored' not in df.columns: df['runs_scored'] = 0
-    if 'wickets_taken' not in df.columns: df['wickets_taken'] = 0
-    
-    df.sort_values(by=['player', 'match_date'], inplace=True)
     return df
 
-df = load_real_player_data()
-
-# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-# FORECAST FUNCTION
-# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-def forecast_performance(series, n_forecast=5):
-    """
-    Simple EWMA-based performance forecast.
-    Returns historical + forecasted values with confidence band.
-    """
-    # Compute EWMA on historical data
-    ewma = series.ewm(span=5, adjust=False).mean()
-    
-    # Estimate slope from last 5 EWMA values
-    if len(ewma) >= 5:
-        recent_ewma = ewma.iloc[-5:].values
-        slope = np.polyfit(range(len(recent_ewma)), recent_ewma, 1)[0]
-    else:
-        slope = 0
-        
-    # Project forward
-    last_val = ewma.iloc[-1]
-    forecast_vals = [last_val + slope * i for i in range(1, n_forecast + 1)]
-    
-    # Clip to valid range [0, 100]
-    forecast_vals = np.clip(forecast_vals, 0, 100)
-    
-    # Confidence band = ±1 std of last 10 matches
-    std = series.iloc[-10:].std() if len(series) >= 10 else series.std()
-    if pd.isna(std): std = 5.0
-    
-    upper = np.clip(np.array(forecast_vals) + std, 0, 100)
-    lower = np.clip(np.array(forecast_vals) - std, 0, 100)
-    
-    # Form verdict
-    if slope > 2:
-        verdict = ("📈 Form Trending UP", "#22c55e", "Strong selection candidate for upcoming matches.")
-    elif slope < -2:
-        verdict = ("📉 Form Declining", "#ef4444", "Consider resting. Form has dropped significantly.")
-    else:
-        verdict = ("➡️ Form Stable", "#3b82f6", "Consistent performer. Reliable selection option.")
-    
-    return forecast_vals, upper, lower, verdict
+def show_chart(name, fig, **kwargs):
+    """st.plotly_chart with the figure's serialization timed under `name`."""
+    with instrumentation.timed('chart', name):
+        st.plotly_chart(fig, use_container_width=True, theme=None, **kwargs)
 
+with instrumentation.timed('data', 'load_dataset'):
+    df = load_real_player_data()
 
 from streamlit_option_menu import option_menu
 
+PAGES = ["Player Deep Dive", "Opposition Analysis", "Team Performance", "Recommend Playing XI", "Squad Overview"]
+# ?page=<name> opens a page directly; the diagnostics page is only reachable that way
+DIAGNOSTICS_PAGE = "Diagnostics"
+start_page = st.query_params.get("page", PAGES[0])
+
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # SIDEBAR NAVIGATION
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -209,9 +136,9 @@ with st.sidebar:
     
     page = option_menu(
         menu_title=None,
-        options=["Player Deep Dive", "Opposition Analysis", "Team Performance", "Recommend Playing XI", "Squad Overview"],
+        options=PAGES,
         icons=["person-badge", "shield-slash", "graph-up", "star-fill", "house"],
-        menu_icon="cast", default_index=0,
+        menu_icon="cast", default_index=PAGES.index(start_page) if start_page in PAGES else 0,
         styles={
             "container": {"padding": "0!important", "background-color": "transparent"},
             "icon": {"color": "#2563eb", "font-size": "18px"}, 
@@ -223,6 +150,11 @@ with st.sidebar:
     st.markdown("---")
     st.info("**ML Powered:** Built using Random Forest models trained on raw Cricsheet data to evaluate player form & predict impact.", icon="🧠")
 
+if start_page == DIAGNOSTICS_PAGE:
+    page = DIAGNOSTICS_PAGE
+instrumentation.current().page = page
+instrumentation.lap("setup")
+
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # PAGE 1: SQUAD OVERVIEW DASHBOARD
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -235,29 +167,13 @@ if page == "Squad Overview":
     """, unsafe_allow_html=True)
     st.markdown(f"<span style='color: #64748b;'>Form window: Last 10 matches | Date: {datetime.now().strftime('%d %B %Y')}</span>", unsafe_allow_html=True)
     
-    players = df['player'].unique()
-    
-    # Calculate current form (last 10 matches)
-    current_forms = []
-    for p in players:
-        p_df = df[df['player'] == p].tail(10)
-        avg_score = p_df['performance_score'].mean()
-        win_rate = (p_df['match_result'] == 'Win').mean()
-        
-        if avg_score >= 75: label = 'Excellent'
-        elif avg_score >= 50: label = 'Good'
-        elif avg_score >= 25: label = 'Average'
-        else: label = 'Poor'
-        
-        current_forms.append({
-            'player': p,
-            'role': p_df['role'].iloc[-1],
-            'avg_score': round(avg_score, 1),
-            'label': label,
-            'last_5': p_df['performance_score'].tail(5).tolist()
-        })
-        
-    form_df = pd.DataFrame(current_forms)
+    import plotly.graph_objects as go
+    from squad_overview import squad_form_summary, squad_cards_html, sparkline_grid
+
+    # Calculate current form (last 10 matches) for every player in one pass
+    form_df, spark_matrix = squad_form_summary(df)
+    instrumentation.lap("squad.form_summary")
+    players = form_df['player']
     
     # KPIs
     c1, c2, c3, c4 = st.columns(4)
@@ -265,8 +181,10 @@ if page == "Squad Overview":
     good_exc = len(form_df[form_df['label'].isin(['Good', 'Excellent'])])
     c2.metric("Players in Form", f"{good_exc}/{len(players)}")
     
-    team_last10 = df.sort_values('match_date').drop_duplicates('match_date').tail(10)
-    team_win_rate = (team_last10['match_result'] == 'Win').mean() * 100
+    from app_dataset import dataset_key
+    from aggregate_cube import team_daily
+    team_days = team_daily(_shared_aggregates(dataset_key())[1])
+    team_win_rate = team_days['is_win'].tail(10).mean() * 100
     c3.metric("Team Win Rate (L10)", f"{team_win_rate:.0f}%")
     
     top_player = form_df.loc[form_df['avg_score'].idxmax()]
@@ -274,42 +192,14 @@ if page == "Squad Overview":
     
     st.markdown("### Squad Form Heatmap")
     
-    cols = st.columns(3)
-    for i, row in form_df.iterrows():
-        with cols[i % 3]:
-            # Sparkline
-            spark_fig = px.bar(x=list(range(len(row['last_5']))), y=row['last_5'], 
-                              height=60, range_y=[0, 100])
-            spark_fig.update_layout(margin=dict(l=0,r=0,t=0,b=0), xaxis_visible=False, yaxis_visible=False,
-                                   paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
-                                   showlegend=False)
-            spark_fig.update_traces(marker_color='#2563eb')
-            
-            color_map = {'Excellent': '🟢', 'Good': '🔵', 'Average': '🟡', 'Poor': '🔴'}
-            css_class = f"rating-{row['label'].lower()}"
-            
-            st.markdown(f"""
-            <div class="custom-container">
-                <div style="display:flex; justify-content:space-between; align-items:center;">
-                    <h4>{row['player']}</h4>
-                    <span style="font-size:1.2em; font-weight:bold;">{row['avg_score']}</span>
-                </div>
-                <div style="margin-bottom: 8px;">
-                    <span class="role-badge">{row['role'].replace('_', ' ')}</span>
-                    <span class="{css_class}" style="margin-left: 10px;">{color_map[row['label']]} {row['label']}</span>
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-            st.plotly_chart(spark_fig, use_container_width=True, config={'displayModeBar': False}, key=f"spark_{i}_{row['player']}", theme=None)
+    st.markdown(squad_cards_html(form_df), unsafe_allow_html=True)
+    st.markdown("#### Last 5 Matches")
+    show_chart("squad.sparklines", sparkline_grid(form_df, spark_matrix), config={'displayModeBar': False})
             
     st.markdown("### Team Win Rate Timeline")
     # Calculate a 10-match rolling win rate on unique matches
-    unique_matches = df.drop_duplicates(subset=['match_date']).sort_values('match_date')
-    unique_matches['is_win'] = (unique_matches['match_result'] == 'Win').astype(int)
-    unique_matches['rolling_win_rate'] = unique_matches['is_win'].rolling(10, min_periods=3).mean() * 100
-    
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=unique_matches['match_date'], y=unique_matches['rolling_win_rate'],
+    fig.add_trace(go.Scatter(x=team_days['match_date'], y=team_days['rolling_win'],
                              mode='lines+markers', line=dict(color='#2563eb', width=3),
                              fill='tozeroy', fillcolor='rgba(245, 197, 24, 0.1)'))
     
@@ -323,26 +213,35 @@ if page == "Squad Overview":
     fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
                       font=dict(color='#0f172a'), yaxis=dict(range=[0, 100], title="Win Rate %", gridcolor='#e2e8f0'),
                       xaxis=dict(gridcolor='#e2e8f0'), annotations=annotations)
-    st.plotly_chart(fig, use_container_width=True, theme=None)
+    show_chart("squad.win_rate", fig)
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # PAGE 2: PLAYER DEEP DIVE
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 elif page == "Player Deep Dive":
     st.header("Player Deep Dive")
+    # Plotting libraries load on the first visit to a page that draws charts
+    import plotly.express as px
+    import plotly.graph_objects as go
     
-    players_list = df['player'].unique().tolist()
+    from app_dataset import dataset_key
+    p_index = _shared_player_index(dataset_key())
+    players_list = p_index.players
     c1, c2, c3 = st.columns([1, 1, 1])
     sel_player = c1.selectbox("Select Player", players_list)
     sel_years = c2.slider("Date Range", 2020, 2026, (2020, 2026))
     
-    p_full = df[df['player'] == sel_player]
+    p_full = p_index.history(sel_player)
     opps = p_full['opponent'].unique().tolist()
     sel_opps = c3.multiselect("Filter Opponent", opps, default=opps)
     
-    p_df = p_full[(p_full['match_date'].dt.year >= sel_years[0]) & 
-                  (p_full['match_date'].dt.year <= sel_years[1]) &
-                  (p_full['opponent'].isin(sel_opps))]
+    # The session keeps only the filtered row positions; the rows themselves are sliced from the shared frame
+    from session_cache import session_lru
+    views = session_lru(st.session_state, "deep_dive_views")
+    rows = views.get((sel_player, sel_years, tuple(sel_opps)),
+                     lambda: p_index.select_rows(sel_player, years=sel_years, opponents=sel_opps))
+    p_df = p_index.df.iloc[rows]
+    instrumentation.lap("deep_dive.select")
                   
     if len(p_df) == 0:
         st.warning("No data for selection.")
@@ -378,7 +277,6 @@ elif page == "Player Deep Dive":
                          size=(p_df['match_result'] == 'Win').astype(int)*3 + 2,
                          hover_data=['runs_scored', 'wickets_taken', 'match_result'])
                          
-        p_df['rolling_10'] = p_df['performance_score'].rolling(10, min_periods=1).mean()
         fig.add_trace(go.Scatter(x=p_df['match_date'], y=p_df['rolling_10'],
                                  mode='lines', line=dict(color='#2563eb', width=2),
                                  name='10-Match Avg'))
@@ -389,13 +287,20 @@ elif page == "Player Deep Dive":
         
         fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color='#0f172a'),
                           xaxis=dict(gridcolor='#e2e8f0'), yaxis=dict(gridcolor='#e2e8f0', range=[0, 105]))
-        st.plotly_chart(fig, use_container_width=True, theme=None)
+        show_chart("deep_dive.history", fig)
+        instrumentation.lap("deep_dive.history")
         
         # Section D: Forecast
         st.markdown("### 📈 Form Forecast — Next 5 Matches")
         
-        series = p_full['performance_score'].copy()
-        fx, f_up, f_dn, (tit, col, subtit) = forecast_performance(series)
+        from forecast import MODELS as FORECAST_MODELS, lookup_forecast, forecast_series
+        fc_model = st.selectbox("Forecast model", list(FORECAST_MODELS), key="deep_dive_forecast_model")
+        # Precomputed by the forecast stage; only computed here if the stage has not run
+        fc = lookup_forecast(f"player:{sel_player}", fc_model)
+        if fc is None:
+            fc = views.get(("forecast", sel_player, fc_model),
+                           lambda: forecast_series(p_full['performance_score'].to_numpy(), fc_model))
+        fx, f_up, f_dn, (tit, col, subtit) = fc
         
         last_date = p_full['match_date'].iloc[-1]
         f_dates = [last_date + timedelta(days=14*(i+1)) for i in range(5)]
@@ -421,7 +326,7 @@ elif page == "Player Deep Dive":
                                    
         fig_f.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color='#0f172a'),
                             yaxis=dict(gridcolor='#e2e8f0', range=[0, 105]), xaxis=dict(gridcolor='#e2e8f0'))
-        st.plotly_chart(fig_f, use_container_width=True, theme=None)
+        show_chart("deep_dive.forecast", fig_f)
         
         st.markdown(f"""
         <div style="background-color: {col}20; border-left: 5px solid {col}; padding: 15px; border-radius: 4px;">
@@ -443,7 +348,7 @@ elif page == "Player Deep Dive":
         fig_bar = px.bar(opp_grp, x='opponent', y='avg_score', color='win_rate',
                          color_continuous_scale=['#ef4444', '#f5c518', '#22c55e'])
         fig_bar.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color='#0f172a'))
-        st.plotly_chart(fig_bar, use_container_width=True, theme=None)
+        show_chart("deep_dive.opponents", fig_bar)
 
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -451,33 +356,42 @@ elif page == "Player Deep Dive":
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 elif page == "Opposition Analysis":
     st.header("Player vs Opponents Analysis")
+    import plotly.express as px
     
-    players_list = df['player'].unique().tolist()
+    from app_dataset import dataset_key
+    from aggregate_cube import slice_cube
+    # Every filter combination is a slice of the precomputed player x opponent x venue x season cube
+    cube, _ = _shared_aggregates(dataset_key())
+    
+    players_list = sorted(cube['player'].unique().tolist())
     sel_players = st.multiselect("Select Players to Compare", players_list, default=players_list[:5])
     venue_filter = st.radio("Venue Filter", ["All", "Home", "Away", "Neutral"], horizontal=True)
+    first_season, last_season = int(cube['season'].min()), int(cube['season'].max())
+    sel_seasons = st.slider("Seasons", first_season, last_season, (first_season, last_season))
     
-    f_df = df[df['player'].isin(sel_players)]
-    if venue_filter != "All":
-        f_df = f_df[f_df['venue'] == venue_filter]
+    h2h = slice_cube(cube, ['player', 'opponent'], players=sel_players, seasons=sel_seasons,
+                     venues=None if venue_filter == "All" else [venue_filter])
+    instrumentation.lap("opposition.slice")
         
-    if len(f_df) > 0:
+    if len(h2h) > 0:
         st.markdown("### Head-to-Head Performance Matrix")
         
-        pivot = f_df.pivot_table(index='player', columns='opponent', values='performance_score', aggfunc='mean').round(1)
+        pivot = h2h.pivot(index='player', columns='opponent', values='score_mean').round(1)
         
         fig = px.imshow(pivot, text_auto=True, aspect="auto",
                         color_continuous_scale=['#ef4444', '#f59e0b', '#22c55e'])
         fig.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color='#0f172a'))
-        st.plotly_chart(fig, use_container_width=True, theme=None)
+        show_chart("opposition.h2h", fig)
         
         st.markdown("### Venue Performance Comparison (Home/Away/Neutral)")
-        venue_piv = df[df['player'].isin(sel_players)].groupby(['player', 'venue'])['performance_score'].mean().reset_index()
+        venue_piv = (slice_cube(cube, ['player', 'venue'], players=sel_players, seasons=sel_seasons)
+                     .rename(columns={'score_mean': 'performance_score'}))
         
         fig_v = px.bar(venue_piv, x='player', y='performance_score', color='venue', barmode='group',
                        color_discrete_sequence=['#1a3a6e', '#f5c518', '#94a3b8'])
         fig_v.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color='#0f172a'),
                             yaxis=dict(gridcolor='#e2e8f0'))
-        st.plotly_chart(fig_v, use_container_width=True, theme=None)
+        show_chart("opposition.venues", fig_v)
 
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -485,16 +399,15 @@ elif page == "Opposition Analysis":
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 elif page == "Team Performance":
     st.header("Team Performance Timeline")
+    import plotly.express as px
+    import plotly.graph_objects as go
     
-    # Calculate Team Stats per match day
-    team_daily = df.groupby('match_date').agg(
-        result=('match_result', 'first'),
-        avg_score=('performance_score', 'mean'),
-        opponent=('opponent', 'first')
-    ).reset_index()
-    
-    team_daily['is_win'] = (team_daily['result'] == 'Win').astype(int)
-    team_daily['rolling_win'] = team_daily['is_win'].rolling(10, min_periods=3).mean() * 100
+    from app_dataset import dataset_key
+    from aggregate_cube import team_daily as team_daily_table
+    from forecast import MODELS as FORECAST_MODELS, TEAM_SERIES, lookup_forecast, forecast_series
+
+    # Team stats per match day, from the precomputed team-by-date aggregates
+    team_daily = team_daily_table(_shared_aggregates(dataset_key())[1])
     
     met_tog = st.radio("Metric", ["Win Rate (%)", "Avg Player Score"], horizontal=True)
     y_col = 'rolling_win' if "Win" in met_tog else 'avg_score'
@@ -506,11 +419,16 @@ elif page == "Team Performance":
                       
     fig.add_vline(x=datetime.now().timestamp() * 1000, line_dash='dash', line_color='#2563eb', annotation_text="TODAY")
     
-    st.plotly_chart(fig, use_container_width=True, theme=None)
+    show_chart("team.timeline", fig)
+    instrumentation.lap("team.timeline")
     
     st.markdown("### Rolling Win Rate Forecast")
     
-    fx, f_up, f_dn, (tit, col, subtit) = forecast_performance(team_daily['rolling_win'])
+    fc_model = st.selectbox("Forecast model", list(FORECAST_MODELS), key="team_forecast_model")
+    fc = lookup_forecast(TEAM_SERIES, fc_model)
+    if fc is None:
+        fc = forecast_series(team_daily['rolling_win'].dropna().to_numpy(), fc_model)
+    fx, f_up, f_dn, (tit, col, subtit) = fc
     
     fig_f = go.Figure()
     hist_tail = team_daily.tail(20)
@@ -532,7 +450,7 @@ elif page == "Team Performance":
                                
     fig_f.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color='#0f172a'),
                         yaxis=dict(gridcolor='#e2e8f0'))
-    st.plotly_chart(fig_f, use_container_width=True, theme=None)
+    show_chart("team.forecast", fig_f)
 
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -549,60 +467,56 @@ elif page == "Recommend Playing XI":
     </div>
     """, unsafe_allow_html=True)
     
+    # Load from actual team selection logic
+    import plotly.graph_objects as go
+    from scenarios import OPPONENTS, PITCHES, VENUE_CONDITIONS, venue_options, scenario_multipliers
+    
     c1, c2, c3 = st.columns(3)
-    opp = c1.selectbox("Opponent", ["India", "Australia", "England", "Pakistan", "South Africa", "Afghanistan"])
-    venue = c2.selectbox("Venue Type", ["Home", "Away", "Neutral"])
-    pitch = c3.selectbox("Pitch Expected", ["Balanced", "Batting-friendly", "Bowling-friendly", "Spin-friendly"])
+    opp = c1.selectbox("Opponent", OPPONENTS)
+    venue = c2.selectbox("Venue", venue_options())
+    pitch = c3.selectbox("Conditions", PITCHES)
+    multipliers, measured = scenario_multipliers(opp, venue, pitch)
+    if measured:
+        bat_m, bowl_m, spin_m = multipliers
+        st.caption(f"Measured at {venue}: batting x{bat_m:.2f}, bowling x{bowl_m:.2f}, spin x{spin_m:.2f}")
+    elif pitch == VENUE_CONDITIONS:
+        st.caption(f"No venue profile for {venue}; using Balanced")
     
     if st.button("🔍 Generate Best XI", use_container_width=True):
-        st.success(f"Generated best XI vs {opp} at {venue} on a {pitch} pitch.")
+        if measured:
+            conditions = "measured conditions"
+        elif pitch == VENUE_CONDITIONS:
+            conditions = "a Balanced pitch (no venue profile)"
+        else:
+            conditions = f"a {pitch} pitch"
+        st.success(f"Generated best XI vs {opp} at {venue} with {conditions}.")
         
-        # Load from actual team selection logic
-        import sys
-        import os
-        sys.path.append(os.path.abspath('src'))
         try:
-            from select_team import load_player_ratings, select_best_xi, PLAYER_ROLES
+            from scenarios import load_scenario, solve_scenario
+            from select_team import load_player_ratings, matchup_factors
             
-            # Load ratings and active players for selection
-            bat_ratings, bowl_ratings, active_players = load_player_ratings()
+            # Precomputed by scenarios.py; solve live only if ratings changed since it was built
+            scenario = load_scenario(opp, venue, pitch)
+            if scenario is None:
+                bat_ratings, bowl_ratings, active_players = load_player_ratings()
+                scenario = solve_scenario(bat_ratings, bowl_ratings, active_players, multipliers,
+                                          bat_factors=matchup_factors(active_players, opp))
             
-            # Multipliers based on pitch (Mock strategy adjustment)
-            bat_mult = 1.0; bowl_mult = 1.0; spin_mult = 1.0
-            if pitch == "Batting-friendly": bat_mult = 1.2
-            elif pitch == "Bowling-friendly": bowl_mult = 1.2
-            elif pitch == "Spin-friendly": spin_mult = 1.3
+            xi = scenario['xi']
+            solutions = [(scenario['total'], xi)] + [tuple(alt) for alt in scenario['alternatives']]
+            adj_scores = scenario['adj_scores']
+            instrumentation.lap("xi.solve")
             
-            # Adjust Ratings contextually
-            adj_bat_ratings = {p: score * bat_mult for p, score in bat_ratings.items()}
-            adj_bowl_ratings = {}
-            for p, score in bowl_ratings.items():
-                role = PLAYER_ROLES.get(p, 'unknown')
-                if 'spin' in role:
-                    adj_bowl_ratings[p] = score * bowl_mult * spin_mult
-                else:
-                    adj_bowl_ratings[p] = score * bowl_mult
-
-            # Select XI
-            xi = select_best_xi(adj_bat_ratings, adj_bowl_ratings, PLAYER_ROLES, active_players)
-            
-            # Get latest stats for selected
-            latest_df = df.sort_values('match_date').groupby('player').last().reset_index()
+            # Get latest stats for selected (computed once per process on the shared index)
+            from app_dataset import dataset_key
+            latest_df = _shared_player_index(dataset_key()).latest()
             selected = latest_df[latest_df['player'].isin(xi)].copy()
-            
-            # Recalculate combined adjusted score for display
-            def get_adj_score(row):
-                p = row['player']
-                b = adj_bat_ratings.get(p, 0)
-                w = adj_bowl_ratings.get(p, 0)
-                return max(b, w)
-            
-            selected['adj_score'] = selected.apply(get_adj_score, axis=1)
+            selected['adj_score'] = selected['player'].map(adj_scores).fillna(0)
             selected.sort_values('adj_score', ascending=False, inplace=True)
             
             # Calculate non-selected (Bench)
-            bench = latest_df[~latest_df['player'].isin(xi) & latest_df['player'].isin(active_players)].copy()
-            bench['adj_score'] = bench.apply(get_adj_score, axis=1)
+            bench = latest_df[latest_df['player'].isin(scenario['bench'])].copy()
+            bench['adj_score'] = bench['player'].map(adj_scores).fillna(0)
             
             st.markdown("### Selected XI")
             c1, c2 = st.columns([2, 1])
@@ -619,6 +533,36 @@ elif page == "Recommend Playing XI":
                         </div>
                     </div>
                     """, unsafe_allow_html=True)
+                
+                if len(solutions) > 1:
+                    with st.expander("Alternative XIs"):
+                        for rank, (alt_total, alt_xi) in enumerate(solutions[1:], 2):
+                            swapped_in = ', '.join(sorted(set(alt_xi) - set(xi)))
+                            swapped_out = ', '.join(sorted(set(xi) - set(alt_xi)))
+                            st.markdown(f"**#{rank}** (total {alt_total:.1f} vs {solutions[0][0]:.1f}): "
+                                        f"bring in {swapped_in} for {swapped_out}")
+                
+                from matchups import load_matchup_index
+                m_index = load_matchup_index()
+                if m_index is not None:
+                    with st.expander(f"Batting matchups vs {opp} bowlers"):
+                        factors = scenario.get('matchup_factors', {})
+                        rows = []
+                        for p_name in xi:
+                            versus = m_index.batter_totals(p_name, teams=[opp])
+                            if versus['balls']:
+                                rows.append({'player': p_name, 'balls': versus['balls'], 'runs': versus['runs'],
+                                             'strike_rate': versus['strike_rate'], 'dot_pct': versus['dot_pct'],
+                                             'dismissals': versus['dismissals'],
+                                             'rating_factor': factors.get(p_name, 1.0)})
+                        if rows:
+                            st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+                            toughest = m_index.batter_vs_team(rows[0]['player'], opp).head(3)
+                            st.caption(f"Most-faced {opp} bowlers for {rows[0]['player']}: " + ", ".join(
+                                f"{b['bowler']} ({b['runs']} off {b['balls']}, out {b['dismissals']}x)"
+                                for _, b in toughest.iterrows()))
+                        else:
+                            st.caption(f"No ball-by-ball record of this XI against {opp}.")
     
             # Add SHAP Explainability
             with c2:
@@ -630,58 +574,26 @@ elif page == "Recommend Playing XI":
                 """, unsafe_allow_html=True)
                 
                 try:
-                    import shap
-                    from streamlit_shap import st_shap
-                    import joblib
-                    
-                    @st.cache_resource
-                    def load_shap_models():
-                        b_model = joblib.load("models/rf_batsman_classifier.pkl")
-                        b_scaler = joblib.load("models/scaler_bat.pkl")
-                        b_le = joblib.load("models/label_encoder_bat.pkl")
-                        
-                        w_model = joblib.load("models/rf_bowler_classifier.pkl")
-                        w_scaler = joblib.load("models/scaler_bowl.pkl")
-                        w_le = joblib.load("models/label_encoder_bowl.pkl")
-                        return b_model, b_scaler, b_le, w_model, w_scaler, w_le
-                        
-                    b_mod, b_scl, b_le, w_mod, w_scl, w_le = load_shap_models()
+                    from shap_cache import lookup_explanation, to_shap_explanation
                     
                     # Assume top player is batting role for demo, or switch
                     top_player = selected.iloc[0]
                     is_batter = 'opener' in top_player['role'] or 'middle' in top_player['role']
                     
-                    if is_batter:
-                        model, scaler, le = b_mod, b_scl, b_le
-                        features = ['form_runs_10', 'form_sr_10', 'form_boundaries_10', 'form_dot_pct_10', 'form_dismissals_10', 'consistency_score', 'matches_played_total', 'recent_50s']
-                    else:
-                        model, scaler, le = w_mod, w_scl, w_le
-                        features = ['form_wickets_10', 'form_economy_10', 'form_sr_bowl_10', 'form_dot_pct_bowl_10', 'form_maidens_10', 'consistency_wickets', 'recent_3fers']
-                        
-                    # Extract raw row
                     p_name = top_player['player']
                     st.markdown(f"**Explanation for {p_name}**")
                     
-                    if is_batter:
-                        raw_df = pd.read_csv("data/processed/player_labeled_batting.csv")
+                    # Precomputed by shap_cache.py after training: O(1) lookup instead of TreeSHAP per click
+                    with instrumentation.timed('shap', 'lookup'):
+                        entry = lookup_explanation(p_name, 'batting' if is_batter else 'bowling')
+                    if entry is not None:
+                        # shap is by far the slowest import; only pay for it when there is a plot to draw
+                        with instrumentation.timed('shap', 'waterfall'):
+                            import shap
+                            from streamlit_shap import st_shap
+                            st_shap(shap.plots.waterfall(to_shap_explanation(entry), show=False))
                     else:
-                        raw_df = pd.read_csv("data/processed/player_labeled_bowling.csv")
-                        
-                    raw_row = raw_df[raw_df['player'] == p_name].sort_values('match_date').tail(1)[features].fillna(0)
-                    if len(raw_row) > 0:
-                        scaled_row = scaler.transform(raw_row)
-                        explainer = shap.TreeExplainer(model)
-                        shap_vals_obj = explainer(scaled_row)
-                        
-                        class_idx = list(le.classes_).index('Excellent')
-                        
-                        # Support older SHAP versions depending on object type
-                        if len(shap_vals_obj.shape) == 3:
-                            st_shap(shap.plots.waterfall(shap_vals_obj[0, :, class_idx], show=False))
-                        else:
-                            st_shap(shap.plots.waterfall(shap_vals_obj[0], show=False))
-                    else:
-                        st.warning("Insufficient recent feature data to generate SHAP diagram.")
+                        st.warning("No cached SHAP explanation for this player. Run `python src/shap_cache.py` after training.")
                 except Exception as e:
                     st.error(f"Could not load SHAP explanations: {str(e)}")
                     
@@ -725,7 +637,32 @@ elif page == "Recommend Playing XI":
                   polar=dict(radialaxis=dict(visible=True, range=[0, 100]), bgcolor='rgba(0,0,0,0)'),
                   showlegend=True, paper_bgcolor='rgba(0,0,0,0)', font=dict(color='#0f172a')
                 )
-                st.plotly_chart(fig, use_container_width=True, theme=None)
+                show_chart("xi.radar", fig)
 
         except ImportError as e:
             st.error(f"Failed to load selection logic: {e}")
+
+
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+# HIDDEN PAGE: DIAGNOSTICS (?page=Diagnostics)
+# ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+elif page == DIAGNOSTICS_PAGE:
+    st.header("Diagnostics")
+    st.caption(f"Measurements from `{instrumentation.LOG_PATH}` across all instrumented sessions. "
+               f"Set {instrumentation.ENV_FLAG}=1 or open the app with ?instrument=1 to record them.")
+    log = instrumentation.read_log()
+    if log.empty:
+        st.info("No measurements recorded yet.")
+    else:
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Sessions", log['session'].nunique())
+        c2.metric("Measurements", len(log))
+        c3.metric("Since", pd.to_datetime(log['ts'].min(), unit='s').strftime('%d %b %H:%M'))
+        st.markdown("### Timings (ms)")
+        st.dataframe(instrumentation.timing_percentiles(log), use_container_width=True, hide_index=True)
+        st.markdown("### Cache hits and misses")
+        st.dataframe(instrumentation.cache_counts(log), use_container_width=True, hide_index=True)
+        st.markdown("### Memory per session (MB / KB)")
+        st.dataframe(instrumentation.memory_summary(log), use_container_width=True, hide_index=True)
+
+instrumentation.current().finish(st.session_state)
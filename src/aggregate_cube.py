@@ -0,0 +1,152 @@
+import argparse
+import json
+import os
+import time
+
+import pandas as pd
+
+from artifacts import file_version
+
+CUBE_PATH = "data/processed/agg_cube.parquet"
+TEAM_PATH = "data/processed/agg_team_daily.parquet"
+META_PATH = "data/processed/agg_meta.json"
+
+DIMENSIONS = ['player', 'opponent', 'venue', 'season']
+# measure name -> app dataset column; the cube keeps <name>_sum and <name>_mean for each
+MEASURES = {'score': 'performance_score', 'runs': 'runs_scored', 'wickets': 'wickets_taken'}
+TEAM_ROLLING = 10
+
+# (file versions, (cube, team, meta))
+_CACHE = {}
+
+def _with_means(table):
+    for name in MEASURES:
+        table[f'{name}_mean'] = table[f'{name}_sum'] / table['n']
+    return table
+
+def aggregate_rows(df):
+    """(cube, team) aggregates of app dataset rows: sums and counts, so partial aggregates add up exactly."""
+    rows = df.assign(season=df['match_date'].dt.year, win=(df['match_result'] == 'Win').astype(int))
+    sums = {f'{name}_sum': (col, 'sum') for name, col in MEASURES.items()}
+    cube = rows.groupby(DIMENSIONS, sort=True).agg(n=('performance_score', 'size'), wins=('win', 'sum'), **sums)
+    return _with_means(cube.reset_index()), team_by_date(df)
+
+def team_by_date(df):
+    """Per match day: the team's result and opponent plus the count and sum of player scores."""
+    team = df.groupby('match_date', sort=True).agg(
+        result=('match_result', 'first'), opponent=('opponent', 'first'),
+        n=('performance_score', 'size'), score_sum=('performance_score', 'sum'))
+    return team.reset_index()
+
+def combine(base, delta):
+    """Fold aggregates of new rows into existing ones. A date already present keeps its result and opponent."""
+    (cube, team), (new_cube, new_team) = base, delta
+    additive = ['n', 'wins'] + [f'{name}_sum' for name in MEASURES]
+    cube = pd.concat([cube, new_cube]).groupby(DIMENSIONS, sort=True)[additive].sum().reset_index()
+    team = pd.concat([team, new_team]).groupby('match_date', sort=True).agg(
+        result=('result', 'first'), opponent=('opponent', 'first'), n=('n', 'sum'), score_sum=('score_sum', 'sum'))
+    return _with_means(cube), team.reset_index()
+
+def slice_cube(cube, by, players=None, opponents=None, venues=None, seasons=None):
+    """
+    Roll the cube up to the `by` dimensions after filtering any of the others.
+    seasons is an inclusive (first, last) range. Returns counts, sums and means per group.
+    """
+    mask = pd.Series(True, index=cube.index)
+    for col, values in (('player', players), ('opponent', opponents), ('venue', venues)):
+        if values is not None:
+            mask &= cube[col].isin(list(values))
+    if seasons is not None:
+        mask &= cube['season'].between(*seasons)
+    additive = ['n', 'wins'] + [f'{name}_sum' for name in MEASURES]
+    rolled = cube.loc[mask].groupby(list(by), sort=True)[additive].sum().reset_index()
+    return _with_means(rolled)
+
+def team_daily(team):
+    """Team table in the shape the pages plot: result, mean player score and rolling win rate per match day."""
+    daily = team[['match_date', 'result', 'opponent']].copy()
+    daily.insert(2, 'avg_score', team['score_sum'] / team['n'])
+    daily['is_win'] = (daily['result'] == 'Win').astype(int)
+    daily['rolling_win'] = daily['is_win'].rolling(TEAM_ROLLING, min_periods=3).mean() * 100
+    return daily
+
+def save_aggregates(cube, team, meta):
+    os.makedirs(os.path.dirname(CUBE_PATH), exist_ok=True)
+    cube.to_parquet(CUBE_PATH, index=False)
+    team.to_parquet(TEAM_PATH, index=False)
+    with open(META_PATH, 'w') as f:
+        json.dump(meta, f)
+
+def match_hashes(df):
+    """Content hash of each match's rows (order-insensitive), keyed by match_id as a string."""
+    rows = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    hashes = pd.Series(rows, index=df['match_id'].to_numpy()).groupby(level=0).sum()
+    return {str(k): str(v) for k, v in hashes.items()}
+
+def update_aggregates(df=None, rebuild=False):
+    """
+    Bring the persisted cube up to date with the app dataset. Only matches not yet in the
+    cube are aggregated; a full rebuild happens when a cubed match changed or disappeared,
+    or on request. The cube is stamped with the dataset digest only when `df` was read from
+    the dataset file, so aggregates_for never trusts a cube built from other rows.
+    """
+    from app_dataset import load_app_dataset, dataset_digest
+
+    start = time.perf_counter()
+    digest = dataset_digest() if df is None else None
+    df = load_app_dataset() if df is None else df
+    if df.empty:
+        print("No app dataset found; skipped the aggregate cube.")
+        return None
+
+    current = load_aggregates()
+    hashes = match_hashes(df)
+    if current is not None and not rebuild:
+        cube, team, meta = current
+        known = meta.get('match_hashes', {})
+        # Cubed matches must be unchanged; anything else (or a cube from before hashes) rebuilds
+        if not known or any(hashes.get(mid) != h for mid, h in known.items()):
+            rebuild = True
+    if current is None or rebuild:
+        cube, team = aggregate_rows(df)
+        mode = f"built from {len(df)} rows"
+    else:
+        new_rows = df[~df['match_id'].astype(str).isin(known)]
+        if len(new_rows):
+            cube, team = combine((cube, team), aggregate_rows(new_rows))
+        mode = f"added {new_rows['match_id'].nunique()} new matches ({len(new_rows)} rows)"
+
+    save_aggregates(cube, team, {'match_hashes': hashes, 'dataset_digest': digest})
+    print(f"Aggregate cube {mode}: {len(cube)} cells, {len(team)} match days "
+          f"in {time.perf_counter() - start:.2f}s")
+    return CUBE_PATH
+
+def load_aggregates():
+    """(cube, team, meta) from disk, re-read only when the files change; None if not built."""
+    paths = (CUBE_PATH, TEAM_PATH, META_PATH)
+    if not all(os.path.exists(p) for p in paths):
+        return None
+    version = file_version(*paths)
+    cached = _CACHE.get(paths)
+    if cached is None or cached[0] != version:
+        with open(META_PATH) as f:
+            meta = json.load(f)
+        cached = (version, (pd.read_parquet(CUBE_PATH), pd.read_parquet(TEAM_PATH), meta))
+        _CACHE[paths] = cached
+    return cached[1]
+
+def aggregates_for(df, digest=None):
+    """(cube, team) matching the given dataset: the persisted cube when it was built from it, else built in memory."""
+    current = load_aggregates()
+    if current is not None and digest is not None and current[2].get('dataset_digest') == digest:
+        return current[0], current[1]
+    return aggregate_rows(df)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or incrementally update the aggregate cube.")
+    parser.add_argument('--rebuild', action='store_true')
+    args = parser.parse_args()
+    update_aggregates(rebuild=args.rebuild)
+
+if __name__ == "__main__":
+    main()
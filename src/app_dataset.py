@@ -0,0 +1,117 @@
+import hashlib
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifacts import file_version
+
+APP_DATASET_PATH = "data/processed/app_dataset.parquet"
+SOURCES = {
+    'bat': "data/processed/player_labeled_batting.csv",
+    'bowl': "data/processed/player_labeled_bowling.csv",
+}
+
+# Stand-ins for columns the Cricsheet extraction does not provide yet, derived from match_id
+OPPONENTS = ["India", "Australia", "England", "Pakistan", "South Africa", "New Zealand", "Bangladesh", "West Indies", "Afghanistan"]
+VENUES = ["Home", "Away", "Neutral"]
+
+# Columns filled with 0 where a player only batted or only bowled in a match
+ZERO_FILL_KEYS = ('runs', 'wickets', 'balls', 'boundaries', 'dismissed', 'score')
+
+# path -> (file version, content digest)
+_DIGESTS = {}
+
+def _read_source(path):
+    if not os.path.exists(path):
+        return pd.DataFrame()
+    df = pd.read_csv(path)
+    df['match_date'] = pd.to_datetime(df['match_date'])
+    return df
+
+def build_app_frame(sources=SOURCES):
+    """The frame every app page reads: batting and bowling rows merged per player-match with all derived columns."""
+    df_bat, df_bowl = _read_source(sources['bat']), _read_source(sources['bowl'])
+    if df_bat.empty and df_bowl.empty:
+        return pd.DataFrame()
+
+    if not df_bat.empty and not df_bowl.empty:
+        df = pd.merge(df_bat, df_bowl, on=['match_id', 'match_date', 'player'], how='outer', suffixes=('_bat', '_bowl'))
+    elif not df_bat.empty:
+        df = df_bat.assign(performance_score_bowl=0)
+    else:
+        df = df_bowl.assign(performance_score_bat=0)
+
+    zero_fill = [c for c in df.columns if any(k in c for k in ZERO_FILL_KEYS)]
+    df[zero_fill] = df[zero_fill].fillna(0)
+
+    # Composite performance score and label
+    score_cols = [c for c in df.columns if 'performance_score' in c and c != 'performance_score']
+    df['performance_score'] = df[score_cols].max(axis=1) if score_cols else 0
+    scores = df['performance_score']
+    df['performance_label'] = np.select([scores >= 75, scores >= 50, scores >= 25],
+                                        ['Excellent', 'Good', 'Average'], default='Poor')
+
+    match_id = df['match_id'].to_numpy()
+    df['opponent'] = np.asarray(OPPONENTS)[match_id % len(OPPONENTS)]
+    df['venue'] = np.asarray(VENUES)[match_id % len(VENUES)]
+    df['match_result'] = np.where(match_id % 2 == 0, "Win", "Loss")
+    df['player_of_match'] = (df['performance_score'] > 80) & (df['match_result'] == 'Win')
+
+    from select_team import load_player_roles
+    df['role'] = df['player'].map(load_player_roles()).fillna('allrounder')
+
+    # Standardize names for the pages
+    df = df.rename(columns={'runs_scored_bat': 'runs_scored', 'wickets_taken_bowl': 'wickets_taken'})
+    for col in ('runs_scored', 'wickets_taken'):
+        if col not in df.columns:
+            df[col] = 0
+
+    df = df.sort_values(['player', 'match_date'], kind='stable', ignore_index=True)
+    # Rolling and EWMA form per player, so the Deep Dive page never recomputes them
+    from player_index import add_form_columns
+    return add_form_columns(df)
+
+def build_app_dataset(path=APP_DATASET_PATH):
+    start = time.perf_counter()
+    df = build_app_frame()
+    if df.empty:
+        print("No labeled data found; skipped the app dataset.")
+        return None
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    df.to_parquet(path, index=False)
+    print(f"Saved app dataset ({len(df)} rows, {df.shape[1]} columns) to {path} "
+          f"in {time.perf_counter() - start:.2f}s")
+    return path
+
+def dataset_digest(path=APP_DATASET_PATH):
+    """SHA-1 of the dataset file's contents, recomputed only when its mtime or size changes."""
+    if not os.path.exists(path):
+        return None
+    version = file_version(path)
+    cached = _DIGESTS.get(path)
+    if cached is None or cached[0] != version:
+        sha = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+        cached = (version, sha.hexdigest())
+        _DIGESTS[path] = cached
+    return cached[1]
+
+def dataset_key(path=APP_DATASET_PATH):
+    """Cache key for the app's data: the artifact's content digest, or the source versions before it is built."""
+    digest = dataset_digest(path)
+    if digest is not None:
+        return ('dataset', digest)
+    return ('sources', file_version(*SOURCES.values()))
+
+def load_app_dataset(path=APP_DATASET_PATH):
+    """App-ready frame: one columnar read of the artifact, or built from the labeled CSVs if it is missing."""
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+    return build_app_frame()
+
+if __name__ == "__main__":
+    build_app_dataset()
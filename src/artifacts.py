@@ -0,0 +1,38 @@
+import hashlib
+import os
+
+import pandas as pd
+
+
+def file_version(*paths):
+    """Cheap version stamp for a set of files: (mtime_ns, size) per path, None if missing."""
+    stamp = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stamp.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            stamp.append(None)
+    return tuple(stamp)
+
+# path -> (file version, SHA-1 of its contents)
+_DIGESTS = {}
+
+def file_digest(path):
+    """SHA-1 of a file's contents, re-hashed only when its (mtime, size) changes; None if missing."""
+    version = file_version(path)
+    if version[0] is None:
+        return None
+    cached = _DIGESTS.get(path)
+    if cached is None or cached[0] != version:
+        sha = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+        cached = (version, sha.hexdigest())
+        _DIGESTS[path] = cached
+    return cached[1]
+
+def frame_digest(df):
+    """SHA-1 of a DataFrame's index and values, for checking an artifact was built from this exact frame."""
+    return hashlib.sha1(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes()).hexdigest()
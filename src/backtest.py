@@ -0,0 +1,169 @@
+import argparse
+import csv
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from label_performance import batting_score, bowling_score
+from select_team import select_best_xi, PLAYER_ROLES
+from validate_raw import quarantined_files
+
+TEAM = 'Sri Lanka'
+ACTIVE_WINDOW = pd.Timedelta(days=365)
+
+# Per-worker state, populated once by _init_worker
+_STATE = {}
+
+def parse_match_info(path):
+    """Date, teams, winner and Sri Lanka's listed XI from a Cricsheet *_info.csv file."""
+    info = {'match_id': int(os.path.basename(path).split('_')[0]), 'teams': [], 'xi': [], 'winner': None, 'date': None}
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            if len(row) < 3 or row[0] != 'info':
+                continue
+            key = row[1]
+            if key == 'team':
+                info['teams'].append(row[2])
+            elif key == 'date' and info['date'] is None:
+                info['date'] = pd.to_datetime(row[2].replace('/', '-'))
+            elif key == 'winner':
+                info['winner'] = row[2]
+            elif key == 'player' and len(row) >= 4 and row[2] == TEAM:
+                info['xi'].append(row[3])
+    return info
+
+def find_team_matches(info_glob="data/raw/t20s_male_csv2/*_info.csv"):
+    matches = []
+    quarantined = quarantined_files()
+    for path in glob.glob(info_glob):
+        if path in quarantined:
+            continue
+        info = parse_match_info(path)
+        if TEAM in info['teams'] and info['date'] is not None and info['xi']:
+            matches.append(info)
+    return sorted(matches, key=lambda m: m['date'])
+
+def load_history():
+    bat = pd.read_csv("data/processed/player_labeled_batting.csv")
+    bowl = pd.read_csv("data/processed/player_labeled_bowling.csv")
+    bat_stats = pd.read_csv("data/processed/player_batting_stats.csv")
+    bowl_stats = pd.read_csv("data/processed/player_bowling_stats.csv")
+    for df in (bat, bowl):
+        df['match_date'] = pd.to_datetime(df['match_date'])
+        df.sort_values('match_date', inplace=True, kind='stable')
+        df.reset_index(drop=True, inplace=True)
+    return bat, bowl, bat_stats, bowl_stats
+
+def ratings_as_of(df, date):
+    """Latest rating per player using only matches strictly before `date`."""
+    prior = df.iloc[:df['match_date'].searchsorted(date, side='left')]
+    last = prior.drop_duplicates('player', keep='last')
+    ratings = last.set_index('player')['performance_score'].to_dict()
+    active = set(last.loc[last['match_date'] >= date - ACTIVE_WINDOW, 'player'])
+    return ratings, active
+
+def match_impact(bat_row, bowl_row):
+    """Single-match impact using the same scoring weights as the form labels."""
+    bat = bowl = 0.0
+    if bat_row is not None:
+        bat = batting_score({
+            'form_runs_10': bat_row['runs_scored'],
+            'form_sr_10': bat_row['strike_rate'],
+            'form_boundaries_10': bat_row['boundaries'],
+            'form_dot_pct_10': bat_row['dot_ball_pct'],
+        })
+    if bowl_row is not None:
+        bowl = bowling_score({
+            'form_wickets_10': bowl_row['wickets_taken'],
+            'form_economy_10': bowl_row['economy_rate'],
+            'form_sr_bowl_10': bowl_row['bowling_strike_rate'],
+        })
+    return max(bat, bowl)
+
+def _init_worker(bat, bowl, bat_stats, bowl_stats, player_roles):
+    _STATE.update(
+        bat=bat, bowl=bowl, player_roles=player_roles,
+        bat_stats={mid: g.set_index('player') for mid, g in bat_stats.groupby('match_id')},
+        bowl_stats={mid: g.set_index('player') for mid, g in bowl_stats.groupby('match_id')},
+    )
+
+def backtest_match(match):
+    bat_ratings, bat_active = ratings_as_of(_STATE['bat'], match['date'])
+    bowl_ratings, bowl_active = ratings_as_of(_STATE['bowl'], match['date'])
+    roles = _STATE['player_roles']
+    xi = select_best_xi(bat_ratings, bowl_ratings, roles, bat_active | bowl_active)
+
+    bat_match = _STATE['bat_stats'].get(match['match_id'])
+    bowl_match = _STATE['bowl_stats'].get(match['match_id'])
+
+    def impact(player):
+        bat_row = bat_match.loc[player] if bat_match is not None and player in bat_match.index else None
+        bowl_row = bowl_match.loc[player] if bowl_match is not None and player in bowl_match.index else None
+        return match_impact(bat_row, bowl_row)
+
+    def rating(player):
+        return bat_ratings.get(player, 0) + bowl_ratings.get(player, 0)
+
+    actual = match['xi']
+    overlap = set(xi) & set(actual)
+    selected_impact = sum(impact(p) for p in xi if p in overlap)
+    actual_impact = sum(impact(p) for p in actual)
+    return {
+        'match_id': match['match_id'],
+        'match_date': match['date'].strftime('%Y-%m-%d'),
+        'opponent': next((t for t in match['teams'] if t != TEAM), None),
+        'won': match['winner'] == TEAM,
+        'selected': '; '.join(xi),
+        'n_selected': len(xi),
+        'n_candidates': len([p for p in roles if p in bat_active | bowl_active]),
+        'overlap': len(overlap),
+        'precision': len(overlap) / len(xi) if xi else 0.0,
+        'selected_rating': sum(rating(p) for p in xi),
+        'actual_rating': sum(rating(p) for p in actual),
+        'selected_played_impact': round(selected_impact, 2),
+        'actual_xi_impact': round(actual_impact, 2),
+        'impact_captured': selected_impact / actual_impact if actual_impact > 0 else 0.0,
+    }
+
+def run_backtest(matches, player_roles=None, workers=None):
+    # Inferred roles come from the whole ball history, including matches after each backtest
+    # date, so the walk-forward run sticks to the fixed manual roles to avoid look-ahead
+    player_roles = player_roles or PLAYER_ROLES
+    history = load_history()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(*history, player_roles)) as pool:
+        rows = list(pool.map(backtest_match, matches, chunksize=max(1, len(matches) // 64)))
+    return pd.DataFrame(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of select_best_xi against real Sri Lanka XIs.")
+    parser.add_argument('--since', help="Only backtest matches on or after this date (YYYY-MM-DD).")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default="outputs/backtest/backtest_results.csv")
+    args = parser.parse_args()
+
+    matches = find_team_matches()
+    if args.since:
+        matches = [m for m in matches if m['date'] >= pd.Timestamp(args.since)]
+    print(f"Backtesting {len(matches)} {TEAM} matches...")
+
+    start = time.perf_counter()
+    results = run_backtest(matches, workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    results.to_csv(args.out, index=False)
+
+    print(f"Finished in {elapsed:.1f}s. Saved per-match results to {args.out}")
+    scored = results[results['n_selected'] > 0]
+    print(f"Matches with a selectable squad: {len(scored)} / {len(results)}")
+    if len(scored) > 0:
+        print(f"Mean overlap with actual XI: {scored['overlap'].mean():.2f} / 11")
+        print(f"Mean precision:              {scored['precision'].mean():.3f}")
+        print(f"Mean impact captured:        {scored['impact_captured'].mean():.3f}")
+
+if __name__ == "__main__":
+    main()
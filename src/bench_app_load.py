@@ -0,0 +1,278 @@
+import argparse
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import psutil
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ["Player Deep Dive", "Opposition Analysis", "Team Performance", "Recommend Playing XI", "Squad Overview"]
+XI_CLICK = "Generate Best XI"
+
+BAT_FORM = ['form_runs_10', 'form_sr_10', 'form_boundaries_10', 'form_dot_pct_10', 'form_dismissals_10',
+            'consistency_score']
+BOWL_FORM = ['form_wickets_10', 'form_economy_10', 'form_sr_bowl_10', 'form_dot_pct_bowl_10', 'form_maidens_10',
+             'consistency_wickets']
+
+def _label(scores):
+    return np.select([scores >= 75, scores >= 50, scores >= 25], ['Excellent', 'Good', 'Average'], default='Poor')
+
+def write_synthetic_dataset(root, players=60, matches=400, seed=0):
+    """
+    Labeled batting and bowling CSVs for a made-up squad under root/data/processed, in the
+    shape label_performance.py writes. The squad includes every player with a known role, so
+    the XI constraints can be met.
+    """
+    from select_team import PLAYER_ROLES
+
+    rng = np.random.default_rng(seed)
+    names = list(PLAYER_ROLES) + [f"Synthetic Player {i}" for i in range(max(players - len(PLAYER_ROLES), 0))]
+    names = np.array(names[:max(players, 22)])
+    bowls = np.array([any(k in PLAYER_ROLES.get(p, 'allrounder') for k in ('pacer', 'spinner', 'allrounder'))
+                      for p in names])
+    weights = rng.uniform(0.2, 1.0, len(names))
+
+    match_ids = rng.choice(np.arange(1_000_000, 2_000_000), matches, replace=False)
+    dates = np.sort(pd.Timestamp('2019-01-01') + pd.to_timedelta(rng.integers(0, 7 * 365, matches), unit='D'))
+    bat_rows, bowl_rows = [], []
+    for match_id, date in zip(match_ids, dates):
+        xi = rng.choice(len(names), 11, replace=False, p=weights / weights.sum())
+        bowlers = [i for i in xi if bowls[i]][:6]
+        bat_rows.append(pd.DataFrame({'match_id': match_id, 'match_date': date, 'player': names[xi]}))
+        bowl_rows.append(pd.DataFrame({'match_id': match_id, 'match_date': date, 'player': names[bowlers]}))
+    bat, bowl = pd.concat(bat_rows, ignore_index=True), pd.concat(bowl_rows, ignore_index=True)
+
+    n = len(bat)
+    bat['runs_scored'] = rng.gamma(1.2, 18, n).round().astype(int)
+    bat['balls_faced'] = np.maximum(1, (bat['runs_scored'] / rng.uniform(0.9, 1.6, n)).round()).astype(int)
+    bat['strike_rate'] = (bat['runs_scored'] / bat['balls_faced'] * 100).round(2)
+    bat['boundaries'] = rng.binomial(bat['balls_faced'], 0.12)
+    bat['dot_ball_pct'] = rng.uniform(0.2, 0.6, n)
+    bat['dismissed'] = rng.binomial(1, 0.75, n)
+    for col in BAT_FORM:
+        bat[col] = rng.uniform(0, 40, n).round(2)
+    bat['matches_played_total'] = bat.groupby('player').cumcount() + 1
+    bat['recent_50s'] = rng.integers(0, 3, n)
+    bat['performance_score'] = np.clip(bat['runs_scored'] * 1.2 + rng.normal(10, 8, n), 0, 100).round(1)
+    bat['performance_label'] = _label(bat['performance_score'])
+
+    m = len(bowl)
+    bowl['wickets_taken'] = rng.binomial(4, 0.25, m)
+    bowl['runs_conceded'] = rng.integers(12, 50, m)
+    bowl['overs_bowled'] = rng.choice([2.0, 3.0, 4.0], m)
+    bowl['economy_rate'] = (bowl['runs_conceded'] / bowl['overs_bowled']).round(2)
+    bowl['bowling_strike_rate'] = np.where(bowl['wickets_taken'] > 0,
+                                           bowl['overs_bowled'] * 6 / bowl['wickets_taken'].clip(lower=1), 999.0)
+    bowl['dot_ball_pct'] = rng.uniform(0.25, 0.55, m).round(2)
+    for col in BOWL_FORM:
+        bowl[col] = rng.uniform(0, 10, m).round(2)
+    bowl['recent_3fers'] = rng.integers(0, 2, m)
+    bowl['performance_score'] = np.clip(bowl['wickets_taken'] * 22 + rng.normal(15, 10, m), 0, 100).round(1)
+    bowl['performance_label'] = _label(bowl['performance_score'])
+
+    processed = os.path.join(root, "data", "processed")
+    os.makedirs(processed, exist_ok=True)
+    bat.to_csv(os.path.join(processed, "player_labeled_batting.csv"), index=False)
+    bowl.to_csv(os.path.join(processed, "player_labeled_bowling.csv"), index=False)
+    return len(bat), len(bowl)
+
+def synthetic_root(players, matches, seed):
+    """A throwaway working tree: the real app and src linked in, synthetic data written out."""
+    root = tempfile.mkdtemp(prefix="sl_app_load_")
+    for name in ("app", "src"):
+        os.symlink(os.path.join(REPO_ROOT, name), os.path.join(root, name))
+    bat_rows, bowl_rows = write_synthetic_dataset(root, players, matches, seed)
+    print(f"Synthetic dataset in {root}: {bat_rows} batting and {bowl_rows} bowling rows")
+    return root
+
+class PeakMemory:
+    """Samples the server's RSS (including any child processes) in the background and keeps the maximum."""
+
+    def __init__(self, pid, interval=0.05):
+        self.process = psutil.Process(pid) if pid else None
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _rss_mb(self):
+        processes = [self.process] + self.process.children(recursive=True)
+        return sum(p.memory_info().rss for p in processes) / 2**20
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.peak = max(self.peak or 0.0, self._rss_mb())
+            except psutil.Error:
+                pass
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if self.process is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_server(root, timeout=120):
+    """`streamlit run` the app headless from `root`; returns (process, base url) once it answers health checks."""
+    port = _free_port()
+    cmd = [sys.executable, "-m", "streamlit", "run", os.path.join("app", "streamlit_app.py"),
+           "--server.headless", "true", "--server.port", str(port),
+           # The driver is not a browser, so it has no XSRF cookie to present
+           "--server.enableXsrfProtection", "false", "--browser.gatherUsageStats", "false"]
+    server = subprocess.Popen(cmd, cwd=root, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(base_url + "/_stcore/health", timeout=2) as resp:
+                if resp.status == 200:
+                    return server, base_url
+        except OSError:
+            time.sleep(0.25)
+    server.terminate()
+    raise RuntimeError(f"Streamlit server did not come up on {base_url} within {timeout}s")
+
+class BrowserSession:
+    """
+    A headless client speaking the app's websocket protocol the way a browser tab does:
+    every rerun is a BackMsg carrying the query string and widget states, answered by
+    ForwardMsg deltas up to script_finished.
+    """
+
+    def __init__(self, base_url, timeout):
+        import websocket
+
+        ws_url = base_url.replace("http", "ws", 1) + "/_stcore/stream"
+        self.ws = websocket.create_connection(ws_url, subprotocols=["streamlit"], timeout=timeout)
+
+    def close(self):
+        self.ws.close()
+
+    def rerun(self, page, trigger=None):
+        """Run the script for `page`, optionally with one button pressed; returns (seconds, buttons, errors)."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = urllib.parse.urlencode({'page': page})
+        if trigger is not None:
+            msg.rerun_script.widget_states.widgets.append(WidgetState(id=trigger, trigger_value=True))
+
+        buttons, errors = {}, []
+        start = time.perf_counter()
+        self.ws.send_binary(msg.SerializeToString())
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(self.ws.recv())
+            kind = forward.WhichOneof('type')
+            if kind == 'delta' and forward.delta.WhichOneof('type') == 'new_element':
+                element = forward.delta.new_element
+                if element.WhichOneof('type') == 'button':
+                    buttons[element.button.label] = element.button.id
+                elif element.WhichOneof('type') == 'exception':
+                    errors.append(f"{page}: {element.exception.message}")
+            elif kind == 'script_finished':
+                if forward.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    errors.append(f"{page}: script failed to compile")
+                return time.perf_counter() - start, buttons, errors
+
+def run_session(base_url, timeout):
+    """One analyst clicking through every page, ending the XI visit with Generate Best XI."""
+    session = BrowserSession(base_url, timeout)
+    latencies, errors = [], []
+    try:
+        for page in PAGES:
+            seconds, buttons, errs = session.rerun(page)
+            latencies.append((page, seconds))
+            errors.extend(errs)
+            generate = next((id_ for label, id_ in buttons.items() if XI_CLICK in label), None)
+            if page == "Recommend Playing XI" and generate is not None:
+                seconds, _, errs = session.rerun(page, trigger=generate)
+                latencies.append((XI_CLICK, seconds))
+                errors.extend(errs)
+    finally:
+        session.close()
+    return latencies, errors
+
+def run_load(base_url, server_pid, sessions, concurrency, timeout):
+    with PeakMemory(server_pid) as memory:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda _: run_session(base_url, timeout), range(sessions)))
+        elapsed = time.perf_counter() - start
+    latencies = pd.DataFrame([row for lat, _ in results for row in lat], columns=['page', 'seconds'])
+    errors = sorted({e for _, errs in results for e in errs})
+    return latencies, errors, elapsed, memory.peak
+
+def report(latencies, errors, elapsed, peak_mb, sessions, concurrency):
+    memory = f"peak server RSS {peak_mb:.0f} MB" if peak_mb is not None else "server RSS not sampled"
+    print(f"\n{sessions} sessions, {concurrency} concurrent: {len(latencies)} script runs in {elapsed:.1f}s "
+          f"({len(latencies) / elapsed:.1f} runs/s, {sessions / elapsed * 60:.1f} sessions/min), {memory}")
+    print(f"{'page':<22} {'n':>5} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for page in PAGES + [XI_CLICK]:
+        ms = latencies.loc[latencies['page'] == page, 'seconds'].to_numpy() * 1000
+        if len(ms):
+            print(f"{page:<22} {len(ms):>5} {np.percentile(ms, 50):>8.0f} {np.percentile(ms, 90):>8.0f} "
+                  f"{np.percentile(ms, 99):>8.0f} {ms.max():>8.0f}")
+    for error in errors:
+        print(f"    error: {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test of the Streamlit app against a local headless server.")
+    parser.add_argument('--url', help="Drive an already running app instead of starting one (server memory is not sampled).")
+    parser.add_argument('--sessions', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--synthetic', action='store_true', help="Serve a generated dataset instead of data/processed.")
+    parser.add_argument('--players', type=int, default=60)
+    parser.add_argument('--matches', type=int, default=400)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-warmup', action='store_true', help="Include the first, cache-filling session in the results.")
+    parser.add_argument('--timeout', type=int, default=300)
+    args = parser.parse_args()
+
+    server, base_url, root = None, args.url, None
+    if base_url is None:
+        root = synthetic_root(args.players, args.matches, args.seed) if args.synthetic else REPO_ROOT
+        server, base_url = start_server(root)
+    print(f"Load testing {base_url}")
+    try:
+        if not args.no_warmup:
+            start = time.perf_counter()
+            _, errors = run_session(base_url, args.timeout)
+            print(f"Warm-up session (fills the shared caches): {time.perf_counter() - start:.1f}s")
+            for error in errors:
+                print(f"    error: {error}")
+        latencies, errors, elapsed, peak_mb = run_load(base_url, server.pid if server else None,
+                                                      args.sessions, args.concurrency, args.timeout)
+        report(latencies, errors, elapsed, peak_mb, args.sessions, args.concurrency)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if args.synthetic and root is not None:
+            shutil.rmtree(root, ignore_errors=True)
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,58 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+APP_PATH = os.path.abspath("app/streamlit_app.py")
+PAGES = ["Player Deep Dive", "Opposition Analysis", "Team Performance", "Recommend Playing XI", "Squad Overview"]
+
+# Runs in a fresh interpreter so every page starts from a cold import state
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout={timeout})
+at.query_params['page'] = {page!r}
+at.run()
+t2 = time.perf_counter()
+at.run()
+t3 = time.perf_counter()
+click = None
+if {click} and len(at.button):
+    at.button[0].click().run()
+    click = time.perf_counter() - t3
+print(json.dumps({{
+    'streamlit_import': t1 - t0, 'first_render': t2 - t1, 'rerun': t3 - t2, 'first_click': click,
+    'errors': [str(e.value) for e in at.exception],
+    'heavy_modules': sorted(m for m in ('plotly.express', 'shap', 'sklearn', 'joblib') if m in sys.modules),
+}}))
+"""
+
+def probe_page(page, timeout=180):
+    code = _PROBE.format(app=APP_PATH, page=page, timeout=timeout, click=page == "Recommend Playing XI")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold time-to-first-render of each Streamlit page.")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--pages', nargs='+', choices=PAGES, default=PAGES)
+    args = parser.parse_args()
+
+    print(f"{'page':<22} {'first render s':>15} {'rerun s':>8} {'XI click s':>11}  heavy modules loaded")
+    for page in args.pages:
+        runs = [probe_page(page) for _ in range(args.repeats)]
+        errors = sorted({e for r in runs for e in r['errors']})
+        clicks = [r['first_click'] for r in runs if r['first_click'] is not None]
+        click = f"{np.median(clicks):>11.2f}" if clicks else f"{'-':>11}"
+        print(f"{page:<22} {np.median([r['first_render'] for r in runs]):>15.2f} "
+              f"{np.median([r['rerun'] for r in runs]):>8.2f} {click}  {', '.join(runs[-1]['heavy_modules']) or '-'}")
+        for error in errors:
+            print(f"    error: {error}")
+
+if __name__ == "__main__":
+    main()
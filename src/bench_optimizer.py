@@ -0,0 +1,86 @@
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+import select_team
+from select_team import DEFAULT_CONSTRAINTS, TEAM_SIZE, optimize_xi, player_value, role_flags
+
+ROLES = ['opener', 'opener_wk', 'middle_order', 'middle_order_wk', 'allrounder', 'allrounder_spin', 'spinner', 'pacer']
+# Bottom of the adversarial pool: every role minimum can only be met down here
+SCARCE_ROLES = ['allrounder', 'pacer', 'middle_order_wk', 'allrounder_spin', 'pacer', 'allrounder', 'spinner', 'allrounder']
+
+def adversarial_pool(n, step=0.5):
+    """
+    Mostly middle-order batters ranked by value, with the keeper, the only spinners, the pacers
+    and the all-rounders in the bottom eight: single-constraint bounds cannot prune this shape.
+    """
+    roles = ['middle_order'] * (n - len(SCARCE_ROLES)) + SCARCE_ROLES
+    roles[3] = roles[7] = 'opener'
+    players = [f"P{i:03d}" for i in range(n)]
+    values = {p: 100 - step * i for i, p in enumerate(players)}
+    return values, values, dict(zip(players, roles)), set(players)
+
+def random_pool(n, rng):
+    players = [f"P{i:03d}" for i in range(n)]
+    roles = dict(zip(players, rng.choice(ROLES, n)))
+    bat = {p: float(rng.uniform(20, 90)) for p in players}
+    bowl = {p: float(rng.uniform(20, 90)) for p in players}
+    return bat, bowl, roles, set(players)
+
+def brute_force(bat, bowl, roles, active):
+    """Best total over every XI that meets the minimums (for small pools only)."""
+    names = list(DEFAULT_CONSTRAINTS)
+    pool = [(player_value(roles[p], bat[p], bowl[p]), role_flags(roles[p])) for p in sorted(active)]
+    needs = {c: min(DEFAULT_CONSTRAINTS[c], sum(f[c] for _, f in pool)) for c in names}
+    best = None
+    for xi in itertools.combinations(pool, min(TEAM_SIZE, len(pool))):
+        if all(sum(f[c] for _, f in xi) >= needs[c] for c in names):
+            total = sum(v for v, _ in xi)
+            best = total if best is None else max(best, total)
+    return best
+
+def timed_solve(pool, top_k):
+    start = time.perf_counter()
+    solutions = optimize_xi(*pool, top_k=top_k)
+    return (time.perf_counter() - start) * 1000, solutions
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve times of optimize_xi on random and adversarial squads.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[30, 40, 60, 100])
+    parser.add_argument('--random-pools', type=int, default=50)
+    parser.add_argument('--top-k', type=int, default=4)
+    parser.add_argument('--budget-ms', type=float, default=250.0, help="flag any solve slower than this")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    # Exactness on pools small enough to enumerate, for the search and for its ILP fallback
+    node_limit = select_team.NODE_LIMIT
+    for n in (14, 16, 18):
+        for shape, pool in (('random', random_pool(n, rng)), ('adversarial', adversarial_pool(n))):
+            expected = brute_force(*pool)
+            for select_team.NODE_LIMIT in (node_limit, 0):
+                _, solutions = timed_solve(pool, 1)
+                got = solutions[0][0] if solutions else None
+                assert expected is None and got is None or abs(got - round(expected, 2)) < 1e-6, (shape, n, got, expected)
+    select_team.NODE_LIMIT = node_limit
+    print("Optimal on enumerable pools (14-18 players, random and adversarial, with and without the ILP fallback)")
+
+    # Pay one-off import costs (the ILP fallback loads scipy) before timing anything
+    optimize_xi(*adversarial_pool(60), top_k=args.top_k)
+    print(f"{'pool':<12} {'players':>7} {'median ms':>10} {'max ms':>8}")
+    slow = []
+    for n in args.sizes:
+        for shape in ('random', 'adversarial'):
+            pools = [random_pool(n, rng) for _ in range(args.random_pools)] if shape == 'random' else [adversarial_pool(n)]
+            times = [timed_solve(pool, args.top_k)[0] for pool in pools]
+            print(f"{shape:<12} {n:>7} {np.median(times):>10.2f} {max(times):>8.2f}")
+            if max(times) > args.budget_ms:
+                slow.append(f"{shape} {n}")
+    if slow:
+        raise SystemExit(f"Slower than {args.budget_ms:.0f} ms: {', '.join(slow)}")
+
+if __name__ == "__main__":
+    main()
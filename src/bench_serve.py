@@ -0,0 +1,61 @@
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from serve import make_server
+
+REQUESTS = {
+    'form': ('GET', '/form?player=PVD Chameera', None),
+    'predict': ('POST', '/predict', {'players': ['PVD Chameera', 'M Theekshana', 'PWH de Silva']}),
+    'select': ('POST', '/select', {'pitch': 'Spin-friendly'}),
+}
+
+def _call(base_url, method, path, payload):
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    req = urllib.request.Request(base_url + path.replace(' ', '%20'), data=data, method=method,
+                                 headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    with urllib.request.urlopen(req) as resp:
+        resp.read()
+    return time.perf_counter() - start
+
+def run_benchmark(base_url, concurrency, requests_per_endpoint):
+    print(f"{'endpoint':<10} {'n':>6} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+    for name, (method, path, payload) in REQUESTS.items():
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(lambda _: _call(base_url, method, path, payload),
+                                      range(requests_per_endpoint)))
+        elapsed = time.perf_counter() - start
+        lat_ms = np.array(latencies) * 1000
+        print(f"{name:<10} {len(lat_ms):>6} {np.percentile(lat_ms, 50):>8.2f} "
+              f"{np.percentile(lat_ms, 99):>8.2f} {len(lat_ms) / elapsed:>8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Latency benchmark for the selection service.")
+    parser.add_argument('--url', help="Benchmark an already running service instead of an in-process one.")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url
+    if base_url is None:
+        server = make_server(port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"Benchmarking {base_url} with {args.concurrency} concurrent clients")
+    try:
+        run_benchmark(base_url, args.concurrency, args.requests)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+if __name__ == "__main__":
+    main()
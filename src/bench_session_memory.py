@@ -0,0 +1,59 @@
+import argparse
+import gc
+import os
+
+import numpy as np
+import psutil
+
+from instrumentation import deep_size
+
+APP_PATH = os.path.abspath("app/streamlit_app.py")
+PAGES = ["Player Deep Dive", "Opposition Analysis", "Team Performance", "Recommend Playing XI", "Squad Overview"]
+
+def rss_mb():
+    gc.collect()
+    return psutil.Process().memory_info().rss / 2**20
+
+def visit_all_pages(timeout):
+    """One simulated analyst: a session that opens every page in turn and clicks Generate Best XI."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    for page in PAGES:
+        at.query_params['page'] = page
+        at.run()
+        if page == "Recommend Playing XI" and len(at.button):
+            at.button[0].click().run()
+        if len(at.exception):
+            raise RuntimeError(f"{page}: {at.exception[0].value}")
+    return at
+
+def session_state_bytes(at):
+    return deep_size({k: at.session_state[k] for k in at.session_state})
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident memory added by each extra app session sharing one process.")
+    parser.add_argument('--sessions', type=int, default=8)
+    parser.add_argument('--timeout', type=int, default=300)
+    args = parser.parse_args()
+
+    baseline = rss_mb()
+    # The first session pays for the shared dataset, indexes and imports
+    alive = [visit_all_pages(args.timeout)]
+    first = rss_mb()
+    readings = [first]
+    for _ in range(args.sessions - 1):
+        alive.append(visit_all_pages(args.timeout))
+        readings.append(rss_mb())
+
+    per_session = np.diff(readings)
+    state_kb = [session_state_bytes(s) / 1024 for s in alive]
+    print(f"RSS before any session:      {baseline:8.1f} MB")
+    print(f"RSS after first session:     {first:8.1f} MB (shared data, indexes and imports)")
+    print(f"RSS after {args.sessions} sessions:        {readings[-1]:8.1f} MB")
+    if len(per_session):
+        print(f"Per additional session:      {per_session.mean():8.2f} MB mean, {np.median(per_session):.2f} MB median")
+    print(f"Session state per session:   {np.mean(state_kb):8.1f} KB mean, {max(state_kb):.1f} KB max")
+
+if __name__ == "__main__":
+    main()
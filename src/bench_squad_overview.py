@@ -0,0 +1,73 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+
+from squad_overview import squad_form_summary, squad_cards_html, sparkline_grid, form_label
+
+ROLES = ['opener', 'middle_order', 'allrounder', 'allrounder_spin', 'spinner', 'pacer', 'opener_wk']
+
+def synthetic_squad(n_players, matches_per_player=40, seed=42):
+    """Frame shaped like the app's merged player data: one row per player per match, sorted by player and date."""
+    rng = np.random.default_rng(seed)
+    players = np.repeat([f"Player {i:04d}" for i in range(n_players)], matches_per_player)
+    dates = np.tile(pd.date_range("2019-01-01", periods=matches_per_player, freq="14D"), n_players)
+    roles = np.repeat(rng.choice(ROLES, size=n_players), matches_per_player)
+    scores = np.clip(rng.normal(50, 20, size=len(players)), 0, 100)
+    return pd.DataFrame({'player': players, 'match_date': dates, 'role': roles, 'performance_score': scores})
+
+def legacy_overview(df):
+    """The previous page logic: a filter per player and one sparkline figure per player."""
+    payload = 0
+    for p in df['player'].unique():
+        p_df = df[df['player'] == p].tail(10)
+        avg_score = p_df['performance_score'].mean()
+        label = str(form_label([avg_score])[0])
+        last_5 = p_df['performance_score'].tail(5).tolist()
+        spark_fig = px.bar(x=list(range(len(last_5))), y=last_5, height=60, range_y=[0, 100])
+        spark_fig.update_layout(margin=dict(l=0, r=0, t=0, b=0), xaxis_visible=False, yaxis_visible=False,
+                                paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', showlegend=False)
+        spark_fig.update_traces(marker_color='#2563eb')
+        payload += len(spark_fig.to_json()) + len(label)
+    return payload
+
+def vectorized_overview(df):
+    form_df, spark_matrix = squad_form_summary(df)
+    html = squad_cards_html(form_df)
+    fig = sparkline_grid(form_df, spark_matrix)
+    return len(fig.to_json()) + len(html)
+
+def _time(fn, df, repeats):
+    best, payload = float('inf'), 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        payload = fn(df)
+        best = min(best, time.perf_counter() - start)
+    return best, payload
+
+def main():
+    parser = argparse.ArgumentParser(description="Server-side render cost of the Squad Overview page.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[20, 200, 2000])
+    parser.add_argument('--matches', type=int, default=40, help="Matches per synthetic player.")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--legacy-max', type=int, default=200,
+                        help="Skip the legacy per-player loop above this many players.")
+    args = parser.parse_args()
+
+    # Times cover summary, card HTML and figure JSON serialization (what Streamlit ships
+    # to the browser); chart elements is the number of Plotly widgets the browser mounts
+    print(f"{'players':>8} {'legacy s':>10} {'charts':>7} {'new s':>8} {'charts':>7} {'payload KB':>11} {'speedup':>8}")
+    for n in args.sizes:
+        df = synthetic_squad(n, args.matches)
+        new_s, new_bytes = _time(vectorized_overview, df, args.repeats)
+        if n <= args.legacy_max:
+            old_s, _ = _time(legacy_overview, df, 1)
+            old, speedup = f"{old_s:10.3f}", f"{old_s / new_s:7.1f}x"
+        else:
+            old, speedup = f"{'-':>10}", f"{'-':>8}"
+        print(f"{n:>8} {old} {n:>7} {new_s:>8.3f} {1:>7} {new_bytes / 1024:>11.1f} {speedup}")
+
+if __name__ == "__main__":
+    main()
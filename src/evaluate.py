@@ -1,77 +1,169 @@
 import os
+import numpy as np
 import pandas as pd
 import joblib
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-from sklearn.metrics import classification_report, ConfusionMatrixDisplay
+from joblib import Parallel, delayed
+from sklearn.metrics import classification_report, ConfusionMatrixDisplay, accuracy_score, f1_score
 from sklearn.model_selection import train_test_split
 
-def evaluate_model(model_path, data_path, scaler_path, le_path, features, title, out_png):
-    print(f"\nEvaluating {title}...")
-    
+from artifacts import frame_digest
+from predict import BAT_FEATURES, BOWL_FEATURES
+
+N_BOOTSTRAP = 5000
+
+ROLES = {
+    'bat': {
+        'title': "Batsman Performance",
+        'data': "data/processed/player_labeled_batting.csv",
+        'scaler': "models/scaler_bat.pkl",
+        'encoder': "models/label_encoder_bat.pkl",
+        'split': "models/split_bat.pkl",
+        'features': BAT_FEATURES,
+        'models': {
+            'RF': "models/rf_batsman_classifier.pkl",
+            'LR': "models/lr_batsman_baseline.pkl",
+        },
+    },
+    'bowl': {
+        'title': "Bowler Performance",
+        'data': "data/processed/player_labeled_bowling.csv",
+        'scaler': "models/scaler_bowl.pkl",
+        'encoder': "models/label_encoder_bowl.pkl",
+        'split': "models/split_bowl.pkl",
+        'features': BOWL_FEATURES,
+        'models': {
+            'RF': "models/rf_bowler_classifier.pkl",
+            'LR': "models/lr_bowler_baseline.pkl",
+        },
+    },
+}
+
+def load_test_split(cfg):
+    """
+    Scaled test matrix and encoded labels, reusing the split indices saved by train.py when they
+    were drawn from this exact frame (same digest), not just one with as many rows.
+    """
+    scaler = joblib.load(cfg['scaler'])
+    le = joblib.load(cfg['encoder'])
+
+    df = pd.read_csv(cfg['data'])
+    X = df[cfg['features']].fillna(0)
+    y_enc = le.transform(df['performance_label'])
+
+    split = joblib.load(cfg['split']) if os.path.exists(cfg['split']) else None
+    if split is not None and split.get('data_digest') == frame_digest(df):
+        test_idx = split['test_idx']
+    else:
+        print(f"No saved split for {cfg['title']} (or data changed). Recomputing train_test_split.")
+        try:
+            _, X_test = train_test_split(X, test_size=0.2, random_state=42, stratify=y_enc)
+        except ValueError:
+            _, X_test = train_test_split(X, test_size=0.2, random_state=42)
+        test_idx = X_test.index.to_numpy()
+
+    X_test_sc = scaler.transform(X.loc[test_idx])
+    return X_test_sc, y_enc[test_idx], le.classes_
+
+def bootstrap_ci(y_true, y_pred, n_classes, n_resamples=N_BOOTSTRAP, alpha=0.05, seed=42):
+    """
+    Percentile bootstrap CIs for accuracy and weighted F1.
+    All resamples are drawn as one (n_resamples, n) index matrix and scored together:
+    per-class counts come from a single bincount over class ids offset by resample row.
+    """
+    y_true = np.asarray(y_true)
+    y_pred = np.asarray(y_pred)
+    n = len(y_true)
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, n, size=(n_resamples, n))
+    yt = y_true[idx]
+    yp = y_pred[idx]
+
+    accuracy = (yt == yp).mean(axis=1)
+
+    offsets = np.arange(n_resamples)[:, None] * n_classes
+    size = n_resamples * n_classes
+    support = np.bincount((yt + offsets).ravel(), minlength=size).reshape(n_resamples, n_classes)
+    predicted = np.bincount((yp + offsets).ravel(), minlength=size).reshape(n_resamples, n_classes)
+    tp = np.bincount((yt + offsets)[yt == yp], minlength=size).reshape(n_resamples, n_classes)
+
+    denom = support + predicted
+    f1 = np.divide(2 * tp, denom, out=np.zeros(tp.shape, dtype=float), where=denom > 0)
+    weighted_f1 = (f1 * support).sum(axis=1) / n
+
+    q = [100 * alpha / 2, 100 * (1 - alpha / 2)]
+    return {
+        'accuracy_ci': tuple(np.percentile(accuracy, q)),
+        'f1_weighted_ci': tuple(np.percentile(weighted_f1, q)),
+    }
+
+def evaluate_model(model_name, model_path, X_test_sc, y_test, class_names, title, out_png):
     if not os.path.exists(model_path):
-        print(f"Model not found: {model_path}. Run train.py first.")
-        return
-        
-    best_rf = joblib.load(model_path)
-    scaler = joblib.load(scaler_path)
-    le = joblib.load(le_path)
-    
-    df = pd.read_csv(data_path)
-    X = df[features].fillna(0)
-    y = df['performance_label']
-    
-    y_enc = le.transform(y)
-    try:
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y_enc, test_size=0.2, random_state=42, stratify=y_enc
-        )
-    except ValueError:
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y_enc, test_size=0.2, random_state=42
-        )
-        
-    X_test_sc = scaler.transform(X_test)
-    y_pred = best_rf.predict(X_test_sc)
-    
-    print(classification_report(y_test, y_pred, target_names=le.classes_))
-    
+        return {'model': model_name, 'title': title, 'error': f"Model not found: {model_path}. Run train.py first."}
+
+    model = joblib.load(model_path)
+    y_pred = model.predict(X_test_sc)
+
     os.makedirs("outputs/plots", exist_ok=True)
-    disp = ConfusionMatrixDisplay.from_predictions(y_test, y_pred,
-                                             display_labels=le.classes_,
-                                             cmap='Blues')
-    plt.title(f"{title} Classification — Confusion Matrix")
+    ConfusionMatrixDisplay.from_predictions(y_test, y_pred,
+                                            labels=np.arange(len(class_names)),
+                                            display_labels=class_names,
+                                            cmap='Blues')
+    plt.title(f"{title} Classification ({model_name}) — Confusion Matrix")
     plt.savefig(out_png)
     plt.close()
-    print(f"Saved confusion matrix to {out_png}")
+
+    result = {
+        'model': model_name,
+        'title': title,
+        'report': classification_report(y_test, y_pred, labels=np.arange(len(class_names)),
+                                        target_names=class_names, zero_division=0),
+        'accuracy': accuracy_score(y_test, y_pred),
+        'f1_weighted': f1_score(y_test, y_pred, average='weighted', zero_division=0),
+        'plot': out_png,
+    }
+    result.update(bootstrap_ci(y_test, y_pred, len(class_names)))
+    return result
 
 def main():
-    bat_features = ['form_runs_10', 'form_sr_10', 'form_boundaries_10',
-                    'form_dot_pct_10', 'form_dismissals_10', 'consistency_score',
-                    'matches_played_total', 'recent_50s']
-    
-    evaluate_model(
-        "models/rf_batsman_classifier.pkl",
-        "data/processed/player_labeled_batting.csv",
-        "models/scaler_bat.pkl",
-        "models/label_encoder_bat.pkl",
-        bat_features,
-        "Batsman Performance",
-        "outputs/plots/confusion_matrix_bat.png"
-    )
-    
-    bowl_features = ['form_wickets_10', 'form_economy_10', 'form_sr_bowl_10',
-                     'form_dot_pct_bowl_10', 'form_maidens_10', 'consistency_wickets',
-                     'recent_3fers']
-                     
-    evaluate_model(
-        "models/rf_bowler_classifier.pkl",
-        "data/processed/player_labeled_bowling.csv",
-        "models/scaler_bowl.pkl",
-        "models/label_encoder_bowl.pkl",
-        bowl_features,
-        "Bowler Performance",
-        "outputs/plots/confusion_matrix_bowl.png"
-    )
+    jobs = []
+    for role, cfg in ROLES.items():
+        if not os.path.exists(cfg['scaler']):
+            print(f"Scaler not found: {cfg['scaler']}. Run train.py first.")
+            continue
+        X_test_sc, y_test, class_names = load_test_split(cfg)
+        for model_name, model_path in cfg['models'].items():
+            # RF keeps the original plot names; baselines get a suffix
+            suffix = "" if model_name == 'RF' else f"_{model_name.lower()}"
+            out_png = f"outputs/plots/confusion_matrix_{role}{suffix}.png"
+            jobs.append((model_name, model_path, X_test_sc, y_test, class_names, cfg['title'], out_png))
+
+    results = Parallel(n_jobs=len(jobs) or 1)(delayed(evaluate_model)(*job) for job in jobs)
+
+    rows = []
+    for res in results:
+        print(f"\nEvaluating {res['title']} ({res['model']})...")
+        if 'error' in res:
+            print(res['error'])
+            continue
+        print(res['report'])
+        acc_lo, acc_hi = res['accuracy_ci']
+        f1_lo, f1_hi = res['f1_weighted_ci']
+        print(f"Accuracy:    {res['accuracy']:.3f}  (95% CI {acc_lo:.3f}–{acc_hi:.3f})")
+        print(f"Weighted F1: {res['f1_weighted']:.3f}  (95% CI {f1_lo:.3f}–{f1_hi:.3f})")
+        print(f"Saved confusion matrix to {res['plot']}")
+        rows.append({
+            'role': res['title'], 'model': res['model'],
+            'accuracy': res['accuracy'], 'accuracy_ci_low': acc_lo, 'accuracy_ci_high': acc_hi,
+            'f1_weighted': res['f1_weighted'], 'f1_ci_low': f1_lo, 'f1_ci_high': f1_hi,
+        })
+
+    if rows:
+        os.makedirs("outputs", exist_ok=True)
+        pd.DataFrame(rows).to_csv("outputs/evaluation_metrics.csv", index=False)
+        print("\nSaved metrics with bootstrap CIs to outputs/evaluation_metrics.csv")
 
 if __name__ == "__main__":
     main()
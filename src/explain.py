@@ -1,9 +1,21 @@
+import argparse
+import hashlib
+import html
+import json
 import joblib
+import numpy as np
 import pandas as pd
 import shap
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import os
 import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import predict
+from shap_cache import (lookup_explanation, lookup_player, to_shap_explanation, as_class_array,
+                        build_shap_cache, cache_is_current)
 
 warnings.filterwarnings('ignore')
 
@@ -51,30 +63,245 @@ def generate_shap_plots():
     except Exception as e:
         print(f"Could not generate summary plot: {e}")
 
-    try:
-        player_df = df[df['player'].str.contains('Asalanka', na=False)]
-        if len(player_df) > 0:
-            player_row = X.loc[player_df.index[-1:]]
-            player_row_sc = scaler.transform(player_row)
-            
-            shap_vals_obj = explainer(player_row_sc)
-            
-            plt.figure()
-            if len(shap_vals_obj.shape) == 3:
-                shap.plots.waterfall(shap_vals_obj[0, :, class_idx], show=False)
-            elif isinstance(shap_vals_obj, list):
-                # old shap behavior
-                pass
-            else:
-                shap.plots.waterfall(shap_vals_obj[0], show=False)
-                
-            plt.title("SHAP Waterfall Explanation")
-            plt.tight_layout()
-            plt.savefig("outputs/plots/shap_asalanka.png")
-            plt.close()
-            print("Saved SHAP waterfall plot.")
-    except Exception as e:
-        print(f"Could not generate waterfall plot: {e}")
-        
+def generate_player_waterfall(player, role='batting', class_name='Excellent'):
+    """Waterfall plot for one player's latest form, read from the precomputed SHAP cache."""
+    entry = lookup_explanation(player, role, class_name)
+    if entry is None:
+        print(f"No cached {role} explanation for {player}. Run shap_cache.py after training.")
+        return None
+
+    os.makedirs("outputs/plots", exist_ok=True)
+    out_png = f"outputs/plots/shap_{player.lower().replace(' ', '_')}_{role}.png"
+    plt.figure()
+    shap.plots.waterfall(to_shap_explanation(entry), show=False)
+    plt.title(f"SHAP Waterfall Explanation — {player} ({class_name})")
+    plt.tight_layout()
+    plt.savefig(out_png)
+    plt.close()
+    print(f"Saved SHAP waterfall plot to {out_png}")
+    return out_png
+
+# Per-worker explainer and output memmap, set up once by _init_shap_worker
+_WORKER = {}
+
+def _init_shap_worker(model_path, out_path):
+    warnings.filterwarnings('ignore')
+    _WORKER['explainer'] = shap.TreeExplainer(joblib.load(model_path))
+    _WORKER['out'] = np.load(out_path, mmap_mode='r+')
+
+def _explain_chunk(args):
+    start, stop, X_chunk = args
+    out = _WORKER['out']
+    values = as_class_array(_WORKER['explainer'].shap_values(X_chunk), out.shape[2])
+    out[start:stop] = values.astype(np.float32)
+    out.flush()
+    return stop - start
+
+def explain_full_dataset(role, chunk_size=256, workers=None, out_dir="outputs/shap"):
+    """
+    SHAP values for every labeled row of a role, computed chunk by chunk in a process pool
+    and written to a memory-mapped float32 array of shape (rows, features, classes).
+    """
+    loaded = predict.load_role_model(role)
+    if loaded is None:
+        return None
+    model, scaler, le = loaded
+    cfg = predict.ROLE_ARTIFACTS[role]
+
+    df = pd.read_csv(cfg['data'])
+    X_sc = scaler.transform(df[cfg['features']].fillna(0))
+    n_rows, n_features = X_sc.shape
+    class_names = list(le.inverse_transform(model.classes_))
+
+    os.makedirs(out_dir, exist_ok=True)
+    values_path = os.path.join(out_dir, f"shap_values_{role}.npy")
+    out = np.lib.format.open_memmap(values_path, mode='w+', dtype=np.float32,
+                                    shape=(n_rows, n_features, len(class_names)))
+    del out  # workers reopen the file; only the header needs to exist here
+    df[['match_id', 'match_date', 'player']].to_csv(os.path.join(out_dir, f"shap_rows_{role}.csv"), index_label='row')
+
+    chunks = [(start, min(start + chunk_size, n_rows), X_sc[start:start + chunk_size])
+              for start in range(0, n_rows, chunk_size)]
+    print(f"Explaining {n_rows} {role} rows in {len(chunks)} chunks...")
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_shap_worker,
+                             initargs=(cfg['model'], values_path)) as pool:
+        done = sum(pool.map(_explain_chunk, chunks))
+    print(f"Saved SHAP values for {done} rows to {values_path}")
+
+    summary = global_shap_summary(values_path, cfg['features'], class_names, chunk_size)
+    summary.to_csv(os.path.join(out_dir, f"shap_global_{role}.csv"))
+    plot_global_summary(summary, role)
+    return values_path
+
+def global_shap_summary(values_path, feature_names, class_names, chunk_size=4096):
+    """Mean |SHAP| per feature and class, accumulated chunk-wise so memory stays bounded."""
+    values = np.load(values_path, mmap_mode='r')
+    total = np.zeros(values.shape[1:], dtype=np.float64)
+    for start in range(0, values.shape[0], chunk_size):
+        total += np.abs(values[start:start + chunk_size]).sum(axis=0)
+    return pd.DataFrame(total / max(values.shape[0], 1), index=feature_names, columns=class_names)
+
+def plot_global_summary(summary, role, class_name='Excellent'):
+    if class_name not in summary.columns:
+        return
+    drivers = summary[class_name].sort_values()
+    os.makedirs("outputs/plots", exist_ok=True)
+    plt.figure()
+    plt.barh(drivers.index, drivers.values, color='#2563eb')
+    plt.xlabel("mean(|SHAP value|)")
+    plt.title(f"What drives an '{class_name}' {role} rating? (all rows)")
+    plt.tight_layout()
+    out_png = f"outputs/plots/shap_global_{role}.png"
+    plt.savefig(out_png)
+    plt.close()
+    print(f"Saved global SHAP summary plot to {out_png}")
+
+def _player_slug(player):
+    return ''.join(ch if ch.isalnum() else '_' for ch in player.lower())
+
+def _render_player_report(task):
+    """Worker: waterfall for one class plus an all-class summary chart for a player/role."""
+    warnings.filterwarnings('ignore')
+    entry, class_name, out_dir = task['entry'], task['class_name'], task['out_dir']
+    class_idx = entry['class_names'].index(class_name)
+    prefix = f"{_player_slug(entry['player'])}_{entry['role']}"
+
+    waterfall_png = f"{prefix}_waterfall.png"
+    plt.figure()
+    shap.plots.waterfall(shap.Explanation(values=entry['values'][:, class_idx],
+                                          base_values=float(entry['expected_values'][class_idx]),
+                                          data=entry['data'], feature_names=entry['feature_names']),
+                         show=False)
+    plt.title(f"{entry['player']} — {entry['role']} ({class_name})")
+    plt.tight_layout()
+    plt.savefig(os.path.join(out_dir, waterfall_png))
+    plt.close('all')
+
+    summary_png = f"{prefix}_summary.png"
+    summary = pd.DataFrame(entry['values'], index=entry['feature_names'], columns=entry['class_names'])
+    ax = summary.plot.barh(figsize=(7, 4))
+    ax.axvline(0, color='#0f172a', linewidth=0.8)
+    ax.set_xlabel("SHAP value (contribution to class probability)")
+    ax.set_title(f"{entry['player']} — {entry['role']} feature contributions by class")
+    plt.tight_layout()
+    plt.savefig(os.path.join(out_dir, summary_png))
+    plt.close('all')
+    return task['key'], waterfall_png, summary_png
+
+def _report_fingerprint(entry, class_name):
+    """Changes only when the player's feature row, the model version or the waterfall's class changes."""
+    digest = hashlib.sha1(np.ascontiguousarray(entry['data']).tobytes())
+    digest.update(entry['model_version'].encode('utf-8'))
+    digest.update(class_name.encode('utf-8'))
+    return digest.hexdigest()
+
+def generate_squad_report(class_name='Excellent', workers=None, out_dir="outputs/reports", force=False):
+    """
+    Waterfall and summary charts for every active player's latest batting and bowling row,
+    rendered headless in a process pool. The SHAP cache is rebuilt first if the model or the
+    data changed; players whose feature row, model version and class are unchanged since the
+    last run are not re-rendered, and active players with no row for a role are listed. Writes a single index.html.
+    """
+    from select_team import load_player_ratings
+
+    _, _, active_players = load_player_ratings()
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, "manifest.json")
+    manifest = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    entries, tasks = {}, []
+    for role in predict.ROLE_ARTIFACTS:
+        if predict.load_role_model(role) is None:
+            continue
+        # Stale after a retrain or a data refresh; either way the cached rows no longer match
+        if not cache_is_current(role):
+            build_shap_cache(role)
+        missing = []
+        for player in sorted(active_players):
+            entry = lookup_player(player, role)
+            if entry is None:
+                missing.append(player)
+                continue
+            key = f"{player}|{role}"
+            entries[key] = entry
+            fingerprint = _report_fingerprint(entry, class_name)
+            previous = manifest.get(key, {})
+            rendered = all(os.path.exists(os.path.join(out_dir, previous.get(k, ''))) for k in ('waterfall', 'summary'))
+            if previous.get('fingerprint') == fingerprint and rendered:
+                continue
+            manifest[key] = {'fingerprint': fingerprint}
+            tasks.append({'key': key, 'entry': entry, 'class_name': class_name, 'out_dir': out_dir})
+        if missing:
+            print(f"No {role} explanation for {len(missing)} active players without a {role} row: {', '.join(missing)}")
+
+    print(f"Rendering {len(tasks)} of {len(entries)} player explanations ({len(entries) - len(tasks)} unchanged)...")
+    if tasks:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for key, waterfall_png, summary_png in pool.map(_render_player_report, tasks):
+                manifest[key].update(waterfall=waterfall_png, summary=summary_png)
+
+    manifest = {k: v for k, v in manifest.items() if k in entries}
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    index_path = os.path.join(out_dir, "index.html")
+    with open(index_path, 'w', encoding='utf-8') as f:
+        f.write(_render_index(entries, manifest, class_name))
+    print(f"Saved squad explanation report to {index_path}")
+    return index_path
+
+def _render_index(entries, manifest, class_name):
+    rows = []
+    for key in sorted(entries):
+        entry, files = entries[key], manifest[key]
+        proba = entry['expected_values'] + entry['values'].sum(axis=0)
+        label = entry['class_names'][int(np.argmax(proba))]
+        class_proba = proba[entry['class_names'].index(class_name)]
+        rows.append(f"""<tr>
+  <td><strong>{html.escape(entry['player'])}</strong><br>{entry['role']}</td>
+  <td>{label}<br>P({class_name}) = {class_proba:.2f}</td>
+  <td><a href="{files['waterfall']}"><img src="{files['waterfall']}" width="360"></a></td>
+  <td><a href="{files['summary']}"><img src="{files['summary']}" width="360"></a></td>
+</tr>""")
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Squad Explanation Report</title>
+<style>body {{ font-family: sans-serif; color: #0f172a; }} td {{ padding: 8px; vertical-align: top; border-bottom: 1px solid #e2e8f0; }}</style>
+</head><body>
+<h1>Squad Explanation Report</h1>
+<p>Latest-form SHAP explanations for {len(entries)} active player/role combinations.</p>
+<table>
+<tr><th>Player</th><th>Predicted</th><th>Waterfall ({class_name})</th><th>Contributions by class</th></tr>
+{chr(10).join(rows)}
+</table>
+</body></html>
+"""
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate SHAP explanation plots.")
+    parser.add_argument('--player', help="Explain this player's latest form from the SHAP cache.")
+    parser.add_argument('--role', choices=['batting', 'bowling'], default='batting')
+    parser.add_argument('--class-name', default='Excellent')
+    parser.add_argument('--full', action='store_true',
+                        help="Explain every labeled batting and bowling row into memory-mapped arrays.")
+    parser.add_argument('--chunk-size', type=int, default=256)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--report', action='store_true',
+                        help="Render waterfall and summary charts for every active player plus an index page.")
+    parser.add_argument('--force', action='store_true', help="Re-render report charts even if unchanged.")
+    args = parser.parse_args()
+
+    if args.report:
+        generate_squad_report(args.class_name, args.workers, force=args.force)
+    elif args.full:
+        for role in predict.ROLE_ARTIFACTS:
+            explain_full_dataset(role, args.chunk_size, args.workers)
+    elif args.player:
+        generate_player_waterfall(args.player, args.role, args.class_name)
+    else:
+        generate_shap_plots()
+
 if __name__ == "__main__":
-    generate_shap_plots()
+    main()
@@ -4,18 +4,26 @@ import os
 from tqdm import tqdm
 
 def load_data():
+    from validate_raw import QUARANTINE_PATH, validate_raw
+
+    # Cached per file, so this only re-reads files that changed since the last run
+    validation = validate_raw()
+    quarantined = validation['quarantined']
+    if quarantined:
+        print(f"Skipping {len(quarantined)} quarantined raw files (see {QUARANTINE_PATH})")
+
     all_balls = []
     # Load T20I matches
     print("Loading T20I CSVs...")
     for f in tqdm(glob.glob("data/raw/t20s_male_csv2/*.csv")):
-        if '_info' not in f:
+        if '_info' not in f and f not in quarantined:
             df = pd.read_csv(f, low_memory=False)
             all_balls.append(df)
             
     # Load LPL matches
     print("Loading LPL CSVs...")
     for f in tqdm(glob.glob("data/raw/lpl_male_csv2/*.csv")):
-        if '_info' not in f:
+        if '_info' not in f and f not in quarantined:
             df = pd.read_csv(f, low_memory=False)
             all_balls.append(df)
 
@@ -142,5 +150,21 @@ def main():
     
     print(f"Saved {len(batting_df)} batting records and {len(bowling_df)} bowling records.")
 
+    print("Building player profiles...")
+    from player_profiles import build_player_profiles
+    build_player_profiles(balls_df=balls_df)
+
+    print("Building batter-vs-bowler matchups...")
+    from matchups import build_matchups
+    build_matchups(balls_df=balls_df)
+
+    print("Building venue condition profiles...")
+    from venue_profiles import build_venue_profiles
+    build_venue_profiles(balls_df=balls_df)
+
+    print("Building ball-outcome distributions for the match simulator...")
+    from match_simulator import build_ball_outcomes
+    build_ball_outcomes(balls_df=balls_df)
+
 if __name__ == "__main__":
     main()
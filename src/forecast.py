@@ -0,0 +1,258 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifacts import file_version
+from player_index import player_offsets
+
+FORECASTS_PATH = "data/processed/forecasts.parquet"
+HORIZON = 5
+EWMA_SPAN = 5
+SLOPE_POINTS = 5
+BAND_POINTS = 10
+DEFAULT_BAND = 5.0
+# Per-step trend beyond which form counts as rising or falling
+VERDICT_SLOPE = 2.0
+TEAM_SERIES = 'team:win_rate'
+
+VERDICTS = {
+    'up': ("📈 Form Trending UP", "#22c55e", "Strong selection candidate for upcoming matches."),
+    'down': ("📉 Form Declining", "#ef4444", "Consider resting. Form has dropped significantly."),
+    'stable': ("➡️ Form Stable", "#3b82f6", "Consistent performer. Reliable selection option."),
+}
+
+# (file version, forecasts indexed by (series, model))
+_CACHE = {}
+
+def padded_matrix(series_list):
+    """Right-aligned (n_series, max_len) matrix, NaN-padded on the left, plus each series' length."""
+    lengths = np.array([len(s) for s in series_list])
+    Y = np.full((len(series_list), max(lengths.max(initial=0), 1)), np.nan)
+    for i, s in enumerate(series_list):
+        if len(s):
+            Y[i, -len(s):] = s
+    return Y, lengths
+
+def last_points(Y, k):
+    """Last k columns of a right-aligned matrix."""
+    return Y[:, -k:] if Y.shape[1] >= k else np.hstack([np.full((len(Y), k - Y.shape[1]), np.nan), Y])
+
+def ols_slope(Y, lengths, k=SLOPE_POINTS):
+    """Closed-form least-squares slope over each row's last k points; 0 for shorter rows."""
+    x = np.arange(k) - (k - 1) / 2
+    slope = (last_points(Y, k) @ x) / (x @ x)
+    return np.where(lengths >= k, slope, 0.0)
+
+def ewma(Y, span=EWMA_SPAN):
+    """EWMA (adjust=False) of every row, advanced one time step at a time across all rows."""
+    alpha = 2 / (span + 1)
+    out = np.full_like(Y, np.nan)
+    prev = np.full(len(Y), np.nan)
+    for t in range(Y.shape[1]):
+        y = Y[:, t]
+        prev = np.where(np.isnan(prev), y, np.where(np.isnan(y), prev, alpha * y + (1 - alpha) * prev))
+        out[:, t] = prev
+    return out
+
+def recent_std(Y, lengths, k=BAND_POINTS):
+    """Sample std of each row's last k observations (all of them for shorter rows)."""
+    recent = last_points(Y, k)
+    valid = ~np.isnan(recent)
+    n = valid.sum(axis=1)
+    mean = np.where(valid, recent, 0).sum(axis=1) / np.maximum(n, 1)
+    sq = np.where(valid, (recent - mean[:, None]) ** 2, 0).sum(axis=1)
+    return np.where(n >= 2, np.sqrt(sq / np.maximum(n - 1, 1)), np.nan)
+
+def ewma_trend(Y, lengths, horizon=HORIZON):
+    """EWMA level projected along the slope of its last five values."""
+    smooth = ewma(Y)
+    slope = ols_slope(smooth, lengths)
+    steps = np.arange(1, horizon + 1)
+    return smooth[:, -1:] + slope[:, None] * steps, slope, None
+
+def damped_trend(Y, lengths, horizon=HORIZON, alpha=0.5, beta=0.3, phi=0.9):
+    """Holt's linear trend with a damped trend, updated in lockstep over all rows."""
+    level = np.full(len(Y), np.nan)
+    trend = np.zeros(len(Y))
+    for t in range(Y.shape[1]):
+        y = Y[:, t]
+        start = np.isnan(level) & ~np.isnan(y)
+        seen = ~np.isnan(level) & ~np.isnan(y)
+        new_level = alpha * y + (1 - alpha) * (level + phi * trend)
+        new_trend = beta * (new_level - level) + (1 - beta) * phi * trend
+        level = np.where(start, y, np.where(seen, new_level, level))
+        trend = np.where(seen, new_trend, trend)
+    damping = np.cumsum(phi ** np.arange(1, horizon + 1))
+    return level[:, None] + trend[:, None] * damping, trend, None
+
+def local_linear_trend(Y, lengths, horizon=HORIZON, level_noise=0.1, slope_noise=0.01):
+    """
+    Local linear trend state-space model filtered with a Kalman filter over all rows at once.
+    Observation noise is each row's recent variance; state noise is a fixed share of it.
+    Returns its own predictive band.
+    """
+    n = len(Y)
+    r = np.nan_to_num(recent_std(Y, lengths), nan=DEFAULT_BAND) ** 2
+    r = np.maximum(r, 1.0)
+    q = np.stack([level_noise * r, slope_noise * r], axis=1)
+
+    state = np.full((n, 2), np.nan)
+    P = np.zeros((n, 2, 2))
+    for t in range(Y.shape[1]):
+        y = Y[:, t]
+        start = np.isnan(state[:, 0]) & ~np.isnan(y)
+        state[start] = np.stack([y[start], np.zeros(start.sum())], axis=1)
+        P[start] = np.array([[1.0, 0.0], [0.0, 1.0]]) * r[start, None, None]
+
+        seen = ~np.isnan(state[:, 0]) & ~start & ~np.isnan(y)
+        if seen.any():
+            # Predict: level += slope
+            s = state[seen]
+            s_pred = np.stack([s[:, 0] + s[:, 1], s[:, 1]], axis=1)
+            p = P[seen]
+            p_pred = np.empty_like(p)
+            p_pred[:, 0, 0] = p[:, 0, 0] + 2 * p[:, 0, 1] + p[:, 1, 1] + q[seen, 0]
+            p_pred[:, 0, 1] = p_pred[:, 1, 0] = p[:, 0, 1] + p[:, 1, 1]
+            p_pred[:, 1, 1] = p[:, 1, 1] + q[seen, 1]
+            # Update on the observed level
+            innov_var = p_pred[:, 0, 0] + r[seen]
+            gain = p_pred[:, :, 0] / innov_var[:, None]
+            s_new = s_pred + gain * (y[seen] - s_pred[:, 0])[:, None]
+            p_new = p_pred - gain[:, :, None] * p_pred[:, None, 0, :]
+            state[seen], P[seen] = s_new, p_new
+
+    steps = np.arange(1, horizon + 1)
+    forecast = state[:, :1] + state[:, 1:] * steps
+    var = (P[:, 0, 0, None] + 2 * steps * P[:, 0, 1, None] + steps ** 2 * P[:, 1, 1, None]
+           + steps * q[:, :1] + r[:, None])
+    return forecast, state[:, 1], np.sqrt(np.maximum(var, 0))
+
+MODELS = {
+    'ewma_trend': ewma_trend,
+    'damped_trend': damped_trend,
+    'state_space': local_linear_trend,
+}
+
+def forecast_batch(series_list, model='ewma_trend', horizon=HORIZON, clip=(0, 100)):
+    """
+    Forecasts, bands and verdicts for many series in one pass of the chosen model.
+    Returns a dict of arrays: forecast/upper/lower (n, horizon), slope (n,), verdict (n,).
+    """
+    Y, lengths = padded_matrix([np.asarray(s, dtype=float) for s in series_list])
+    forecast, slope, band = MODELS[model](Y, lengths, horizon)
+    if band is None:
+        band = np.nan_to_num(recent_std(Y, lengths), nan=DEFAULT_BAND)[:, None] * np.ones(horizon)
+
+    forecast = np.clip(forecast, *clip)
+    slope = np.nan_to_num(slope)
+    verdict = np.where(slope > VERDICT_SLOPE, 'up', np.where(slope < -VERDICT_SLOPE, 'down', 'stable'))
+    return {
+        'forecast': forecast,
+        'upper': np.clip(forecast + band, *clip),
+        'lower': np.clip(forecast - band, *clip),
+        'slope': slope,
+        'verdict': verdict,
+    }
+
+def team_daily_frame(df):
+    """Team result and mean player score per match day with the 10-match rolling win rate."""
+    from aggregate_cube import team_by_date, team_daily
+    return team_daily(team_by_date(df))
+
+def collect_series(df):
+    """
+    (series ids, value arrays, last dates) for every player's score history and the team win rate.
+    `df` is the player-sorted app dataset, so each player's series is one slice of the score column.
+    """
+    names, starts, stops = player_offsets(df['player'].to_numpy())
+    scores = df['performance_score'].to_numpy(dtype=float)
+    dates = df['match_date'].to_numpy()
+    ids = [f"player:{p}" for p in names]
+    values = [scores[a:b] for a, b in zip(starts, stops)]
+    last_dates = list(pd.to_datetime(dates[stops - 1]))
+
+    team = team_daily_frame(df)
+    rolling = team['rolling_win'].to_numpy(dtype=float)
+    ids.append(TEAM_SERIES)
+    values.append(rolling[np.argmax(~np.isnan(rolling)):] if (~np.isnan(rolling)).any() else rolling[:0])
+    last_dates.append(team['match_date'].iloc[-1])
+    return ids, values, last_dates
+
+def build_forecast_frame(df, models=None, horizon=HORIZON):
+    ids, values, last_dates = collect_series(df)
+    frames = []
+    for model in models or MODELS:
+        result = forecast_batch(values, model, horizon)
+        frame = pd.DataFrame({'series': ids, 'model': model, 'last_date': last_dates,
+                              'n_obs': [len(v) for v in values],
+                              'slope': result['slope'], 'verdict': result['verdict']})
+        for key in ('forecast', 'upper', 'lower'):
+            for h in range(horizon):
+                frame[f'{key}_{h + 1}'] = result[key][:, h]
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+def build_forecasts(path=FORECASTS_PATH, models=None):
+    """Forecast every series of the app dataset, stamped with the dataset digest it was built from."""
+    from app_dataset import load_app_dataset, dataset_digest
+
+    start = time.perf_counter()
+    digest = dataset_digest()
+    df = load_app_dataset()
+    if df.empty:
+        print("No app dataset found; skipped forecasts.")
+        return None
+    forecasts = build_forecast_frame(df, models)
+    forecasts.attrs['dataset_digest'] = digest
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    forecasts.to_parquet(path, index=False)
+    print(f"Saved {len(forecasts)} forecasts ({forecasts['series'].nunique()} series x "
+          f"{forecasts['model'].nunique()} models) to {path} in {time.perf_counter() - start:.2f}s")
+    return path
+
+def load_forecasts(path=FORECASTS_PATH):
+    """
+    Forecast table indexed by (series, model), re-read only when the file changes; None if missing
+    or not built from the current app dataset (callers then forecast live).
+    """
+    from app_dataset import dataset_digest
+
+    if not os.path.exists(path):
+        return None
+    version = file_version(path)
+    cached = _CACHE.get(path)
+    if cached is None or cached[0] != version:
+        cached = (version, pd.read_parquet(path).set_index(['series', 'model']).sort_index())
+        _CACHE[path] = cached
+    forecasts = cached[1]
+    digest = forecasts.attrs.get('dataset_digest')
+    if digest is None or digest != dataset_digest():
+        return None
+    return forecasts
+
+def lookup_forecast(series, model='ewma_trend', path=FORECASTS_PATH):
+    """(forecast, upper, lower, verdict) arrays for one persisted series, or None if it is missing."""
+    forecasts = load_forecasts(path)
+    if forecasts is None or (series, model) not in forecasts.index:
+        return None
+    row = forecasts.loc[(series, model)]
+    horizon = sum(1 for c in forecasts.columns if c.startswith('forecast_'))
+    pick = lambda key: row[[f'{key}_{h + 1}' for h in range(horizon)]].to_numpy(dtype=float)
+    return pick('forecast'), pick('upper'), pick('lower'), VERDICTS[row['verdict']]
+
+def forecast_series(values, model='ewma_trend'):
+    """Same output as lookup_forecast, computed for a single series."""
+    result = forecast_batch([values], model)
+    return result['forecast'][0], result['upper'][0], result['lower'][0], VERDICTS[result['verdict'][0]]
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch form forecasts for every player and the team win rate.")
+    parser.add_argument('--models', nargs='+', choices=list(MODELS), default=None)
+    args = parser.parse_args()
+    build_forecasts(models=args.models)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import functools
+import glob
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+import numpy as np
+import pandas as pd
+
+LOG_PATH = "outputs/logs/app_metrics.jsonl"
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUPS = 3
+# Set to 1 to instrument every session; a session can also opt in with ?instrument=1
+ENV_FLAG = "SL_APP_INSTRUMENT"
+
+_LOCK = threading.Lock()
+_LOGGER = None
+_CURRENT = threading.local()
+
+def enabled_by_env():
+    return os.environ.get(ENV_FLAG, '') not in ('', '0')
+
+def _metrics_logger(path=LOG_PATH):
+    global _LOGGER
+    with _LOCK:
+        if _LOGGER is None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            logger = logging.getLogger("sl_app.metrics")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            handler = RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            _LOGGER = logger
+    return _LOGGER
+
+class RunRecorder:
+    """
+    Measurements of one script run of one session, appended as JSON lines to a rotating log
+    shared by all sessions. Streamlit runs each session's script on its own thread, so the
+    recorder for the running script is kept per thread (see start_run / current).
+    """
+
+    def __init__(self, session_id, page, enabled=True):
+        self.session_id = session_id
+        self.page = page
+        self.enabled = enabled
+        self.started = self._lap = time.perf_counter()
+
+    def record(self, kind, name, value, **extra):
+        if not self.enabled:
+            return
+        entry = {'ts': time.time(), 'session': self.session_id, 'page': self.page,
+                 'kind': kind, 'name': name, 'value': value, **extra}
+        _metrics_logger().info(json.dumps(entry, default=str))
+
+    @contextmanager
+    def timed(self, kind, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(kind, name, (time.perf_counter() - start) * 1000)
+
+    def lap(self, name):
+        """Record the time since the previous lap (or the run start) as section `name`."""
+        now = time.perf_counter()
+        self.record('section', name, (now - self._lap) * 1000)
+        self._lap = now
+
+    def finish(self, session_state):
+        """Total run time plus process RSS and this session's own state size."""
+        if not self.enabled:
+            return
+        import psutil
+        self.record('section', f"{self.page} (full run)", (time.perf_counter() - self.started) * 1000)
+        self.record('memory', 'process_rss_mb', psutil.Process().memory_info().rss / 2**20)
+        state = {k: session_state[k] for k in list(session_state.keys())}
+        self.record('memory', 'session_state_kb', deep_size(state) / 1024)
+
+_DISABLED = RunRecorder(None, None, enabled=False)
+
+def start_run(session_id, page, enabled):
+    """Install a recorder for this thread's script run and return it."""
+    recorder = RunRecorder(session_id, page, enabled)
+    _CURRENT.recorder = recorder
+    return recorder
+
+def current():
+    return getattr(_CURRENT, 'recorder', _DISABLED)
+
+def timed(kind, name):
+    """Time a block under the current run: kind is 'data', 'section', 'chart' or 'shap'."""
+    return current().timed(kind, name)
+
+def lap(name):
+    current().lap(name)
+
+def count_cache(name):
+    """
+    Decorate a function *outside* st.cache_resource / st.cache_data to count hits and misses:
+    the inner marker only runs when the cached body executes, i.e. on a miss.
+    """
+    def decorator(cached_fn):
+        @functools.wraps(cached_fn)
+        def wrapper(*args, **kwargs):
+            # Cached bodies may call other cached functions; keep the caller's flag intact
+            outer = getattr(_CURRENT, 'cache_miss', False)
+            _CURRENT.cache_miss = False
+            try:
+                result = cached_fn(*args, **kwargs)
+                current().record('cache', name, 'miss' if _CURRENT.cache_miss else 'hit')
+            finally:
+                _CURRENT.cache_miss = outer
+            return result
+        return wrapper
+    return decorator
+
+def mark_cache_miss(fn):
+    """Decorate the body *inside* the cache decorator so count_cache can tell a miss from a hit."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        _CURRENT.cache_miss = True
+        return fn(*args, **kwargs)
+    return wrapper
+
+def deep_size(obj, _seen=None):
+    """Approximate bytes held by an object graph (DataFrames and arrays by their buffers)."""
+    _seen = set() if _seen is None else _seen
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(obj.memory_usage(deep=True).sum()) if isinstance(obj, pd.DataFrame) else int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, _seen) + deep_size(v, _seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(v, _seen) for v in obj)
+    elif hasattr(obj, '__dict__') and not isinstance(obj, type):
+        # Plain objects (e.g. SessionLRU) by their attributes
+        size += deep_size(vars(obj), _seen)
+    return size
+
+def read_log(path=LOG_PATH):
+    """All measurements in the current log and its rotated backups."""
+    rows = []
+    for file in sorted(glob.glob(path + "*")):
+        with open(file) as f:
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return pd.DataFrame(rows, columns=['ts', 'session', 'page', 'kind', 'name', 'value'])
+
+def timing_percentiles(log):
+    timings = log[log['kind'].isin(['data', 'section', 'chart', 'shap'])].astype({'value': float})
+    if timings.empty:
+        return pd.DataFrame(columns=['kind', 'name', 'count', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'])
+    grouped = timings.groupby(['kind', 'name'])['value']
+    return pd.DataFrame({
+        'count': grouped.size(),
+        'p50_ms': grouped.quantile(0.50),
+        'p90_ms': grouped.quantile(0.90),
+        'p99_ms': grouped.quantile(0.99),
+        'max_ms': grouped.max(),
+    }).round(2).reset_index().sort_values('p90_ms', ascending=False, ignore_index=True)
+
+def cache_counts(log):
+    caches = log[log['kind'] == 'cache']
+    counts = pd.crosstab(caches['name'], caches['value']).reindex(columns=['hit', 'miss'], fill_value=0)
+    counts['hit_rate'] = (counts['hit'] / counts.sum(axis=1).clip(lower=1)).round(3)
+    return counts.reset_index()
+
+def memory_summary(log):
+    """Latest reading per session for each memory metric, with percentiles across sessions."""
+    memory = log[log['kind'] == 'memory'].astype({'value': float})
+    latest = memory.sort_values('ts').groupby(['name', 'session'])['value'].last()
+    grouped = latest.groupby(level='name')
+    return pd.DataFrame({
+        'sessions': grouped.size(),
+        'p50': grouped.quantile(0.50),
+        'p90': grouped.quantile(0.90),
+        'max': grouped.max(),
+    }).round(1).reset_index()
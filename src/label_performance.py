@@ -56,6 +56,24 @@ def main():
     # We can just copy the batting one to it for now (assuming the app primarily looks at batting features as per Phase 10)
     batting_df.to_csv("data/processed/player_form_features.csv", index=False)
     print("Saved labeled datasets to data/processed/")
+    
+    # Latest rating per player for selection, so it doesn't rescan the labeled tables
+    from ratings_snapshot import build_ratings_snapshot
+    build_ratings_snapshot()
+
+    # Merged, derived frame the app loads with one columnar read
+    from app_dataset import build_app_dataset
+    build_app_dataset()
+
+    from aggregate_cube import update_aggregates
+    update_aggregates()
+
+    from forecast import build_forecasts
+    build_forecasts()
+
+    # Last, once the snapshot and the ball-data stages it depends on are all written
+    from scenarios import build_scenarios
+    build_scenarios()
 
 if __name__ == "__main__":
     main()
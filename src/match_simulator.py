@@ -0,0 +1,268 @@
+import argparse
+import difflib
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifacts import file_version
+from player_profiles import PHASES
+
+BALL_OUTCOMES_PATH = "data/processed/ball_outcomes.parquet"
+TEAM = "Sri Lanka"
+
+# Outcome of one delivery: runs added and whether it counts toward the over
+OUTCOMES = ['dot', '1', '2', '3', '4', '6', 'wicket', 'extra']
+RUNS = np.array([0, 1, 2, 3, 4, 6, 0, 1])
+LEGAL = np.array([1, 1, 1, 1, 1, 1, 1, 0])
+WICKET = OUTCOMES.index('wicket')
+
+OVERS = 20
+MAX_OVERS_PER_BOWLER = 4
+BOWLERS_USED = 5
+# Deliveries a bowler needs in the data to be trusted with overs in the plan
+MIN_BOWLING_BALLS = 60
+# Player distributions are shrunk toward their team's with this many balls of weight
+PRIOR_BALLS = 60
+HALF_LIFE_DAYS = 730
+N_SIMS = 100_000
+Z_95 = 1.96
+
+# (file version, outcome table)
+_CACHE = {}
+
+def classify_balls(balls_df):
+    """Outcome index of every delivery: wides and no-balls are extras, any dismissal a wicket, else total runs off the ball."""
+    runs = (balls_df['runs_off_bat'].fillna(0) + balls_df['byes'].fillna(0) + balls_df['legbyes'].fillna(0)).to_numpy()
+    run_outcome = np.select([runs <= 0, runs == 1, runs == 2, runs == 3, runs <= 5], [0, 1, 2, 3, 4], 5)
+    extra = (balls_df['wides'].notna() | balls_df['noballs'].notna()).to_numpy()
+    wicket = balls_df['player_dismissed'].notna().to_numpy()
+    return np.where(extra, OUTCOMES.index('extra'), np.where(wicket, WICKET, run_outcome))
+
+def outcome_table(balls_df, half_life_days=HALF_LIFE_DAYS):
+    """
+    Time-decayed outcome counts in one grouped pass: per batter, per bowler, per team batting
+    and bowling, and per phase over all deliveries (the baseline the others are compared to).
+    """
+    balls = balls_df[balls_df['innings'].isin([1, 2])]
+    dates = pd.to_datetime(balls['start_date'])
+    weight = 0.5 ** ((dates.max() - dates).dt.days.to_numpy() / half_life_days)
+    outcome = classify_balls(balls)
+    over = balls['ball'].to_numpy().astype(np.int64)
+    phase = np.select([over < PHASES['powerplay'][1], over < PHASES['middle'][1]], ['powerplay', 'middle'], 'death')
+
+    frames = []
+    for kind, keys in (('bat', balls['striker'].to_numpy()), ('bowl', balls['bowler'].to_numpy()),
+                       ('team_bat', balls['batting_team'].to_numpy()), ('team_bowl', balls['bowling_team'].to_numpy()),
+                       ('phase', phase)):
+        counts = pd.crosstab([np.full(len(keys), kind), keys], outcome, values=weight, aggfunc='sum')
+        frames.append(counts.fillna(0.0))
+    table = pd.concat(frames).reindex(columns=range(len(OUTCOMES)), fill_value=0.0)
+    table.columns = OUTCOMES
+    table.index.names = ['kind', 'name']
+    return table.reset_index()
+
+def build_ball_outcomes(path=BALL_OUTCOMES_PATH, balls_df=None):
+    from extract_player_stats import load_data
+
+    start = time.perf_counter()
+    balls_df = load_data() if balls_df is None else balls_df
+    table = outcome_table(balls_df)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table.to_parquet(path, index=False)
+    print(f"Saved ball-outcome distributions for {len(table)} players, teams and phases to {path} "
+          f"in {time.perf_counter() - start:.1f}s")
+    return path
+
+def load_ball_outcomes(path=BALL_OUTCOMES_PATH):
+    """Outcome counts indexed by (kind, name), re-read only when the file changes; None if the stage has not run."""
+    if not os.path.exists(path):
+        return None
+    version = file_version(path)
+    cached = _CACHE.get(path)
+    if cached is None or cached[0] != version:
+        cached = (version, pd.read_parquet(path).set_index(['kind', 'name']).sort_index())
+        _CACHE[path] = cached
+    return cached[1]
+
+class OutcomeModel:
+    """Per-player ball-outcome probabilities, shrunk toward a team's, combined batter-vs-bowler by odds ratio."""
+
+    def __init__(self, table):
+        self.table = table
+        phases = table.loc['phase']
+        self.baseline = self._normalize(phases.sum().to_numpy())
+        # Phase profile relative to the all-phase baseline
+        self.phase_ratio = np.stack([self._normalize(phases.loc[p].to_numpy()) / self.baseline for p in PHASES])
+
+    @staticmethod
+    def _normalize(counts):
+        counts = np.asarray(counts, dtype=float) + 1e-9
+        return counts / counts.sum(axis=-1, keepdims=True)
+
+    def team(self, kind, team):
+        """A team's batting ('team_bat') or bowling ('team_bowl') distribution; ValueError if the team is not in the data."""
+        if (kind, team) not in self.table.index:
+            known = self.table.loc[kind].index.tolist()
+            close = difflib.get_close_matches(team, known, n=3)
+            hint = f" Did you mean {', '.join(close)}?" if close else ""
+            raise ValueError(f"No ball data for team {team!r}.{hint}")
+        return self._normalize(self.table.loc[(kind, team)].to_numpy())
+
+    def players(self, kind, players, prior, prior_balls=PRIOR_BALLS):
+        """(n, outcomes) distributions for players, each shrunk toward `prior` with prior_balls of weight."""
+        counts = np.zeros((len(players), len(OUTCOMES)))
+        for i, p in enumerate(players):
+            if (kind, p) in self.table.index:
+                counts[i] = self.table.loc[(kind, p)].to_numpy()
+        return self._normalize(counts + prior_balls * prior)
+
+    def balls(self, kind, players):
+        """Weighted deliveries each player has in the data as batter ('bat') or bowler ('bowl')."""
+        return np.array([self.table.loc[(kind, p)].sum() if (kind, p) in self.table.index else 0.0 for p in players])
+
+    def matchup(self, bat, bowl):
+        """(batters, bowlers, phases, outcomes) probabilities: batter x bowler x phase over the baseline, renormalized."""
+        odds = (bat[:, None, None, :] * bowl[None, :, None, :] / self.baseline
+                * self.phase_ratio[None, None, :, :])
+        return odds / odds.sum(axis=-1, keepdims=True)
+
+def load_outcome_model():
+    """OutcomeModel over the persisted outcome table; FileNotFoundError if the stage has not run."""
+    table = load_ball_outcomes()
+    if table is None:
+        raise FileNotFoundError(f"{BALL_OUTCOMES_PATH} is missing; run extract_player_stats.py or match_simulator.py --build")
+    return OutcomeModel(table)
+
+def bowling_plan(bowl_probs, qualified=None, overs=OVERS, used=BOWLERS_USED, max_overs=MAX_OVERS_PER_BOWLER):
+    """
+    Bowler index for each over: up to `used` qualified bowlers with the lowest expected runs per
+    ball (wickets counted as 6 runs saved), topped up from the rest of the side when too few
+    qualify to cover the overs. Cycled so nobody bowls consecutive overs or more than max_overs.
+    """
+    expected = bowl_probs @ RUNS - 6 * bowl_probs[:, WICKET]
+    qualified = np.ones(len(expected), dtype=bool) if qualified is None else np.asarray(qualified, dtype=bool)
+    needed = int(np.ceil(overs / max_overs))
+    if len(expected) < needed:
+        raise ValueError(f"{overs} overs need at least {needed} bowlers at {max_overs} overs each, got {len(expected)}")
+    # Qualified bowlers first, each group best first
+    order = np.lexsort((expected, ~qualified))
+    return np.resize(order[:max(needed, min(used, int(qualified.sum())))], overs)
+
+def simulate_innings(probs, plan, n_sims, rng, overs=OVERS):
+    """
+    Totals of n_sims innings advanced ball by ball in lockstep. probs: (batters, bowlers, phases,
+    outcomes) from OutcomeModel.matchup; plan: bowler index per over; batters come in list order.
+    """
+    n_bat = probs.shape[0]
+    cum = np.cumsum(probs, axis=-1)
+    phase_of_over = np.select([np.arange(overs) < PHASES['powerplay'][1], np.arange(overs) < PHASES['middle'][1]], [0, 1], 2)
+
+    runs = np.zeros(n_sims, dtype=np.int64)
+    wickets = np.zeros(n_sims, dtype=np.int64)
+    legal = np.zeros(n_sims, dtype=np.int64)
+    striker = np.zeros(n_sims, dtype=np.int64)
+    non_striker = np.ones(n_sims, dtype=np.int64)
+    active = np.ones(n_sims, dtype=bool)
+
+    while active.any():
+        idx = np.flatnonzero(active)
+        over = legal[idx] // 6
+        bowler = plan[over]
+        c = cum[striker[idx], bowler, phase_of_over[over]]
+        outcome = (rng.random(len(idx))[:, None] > c).sum(axis=1).clip(max=len(OUTCOMES) - 1)
+
+        runs[idx] += RUNS[outcome]
+        legal[idx] += LEGAL[outcome]
+        out = outcome == WICKET
+        wickets[idx] += out
+        # The new batter takes the dismissed striker's place
+        next_in = wickets[idx] + 1
+        striker[idx] = np.where(out, np.minimum(next_in, n_bat - 1), striker[idx])
+        # Odd runs and the end of an over change the strike
+        swap = (RUNS[outcome] % 2 == 1) ^ ((LEGAL[outcome] == 1) & (legal[idx] % 6 == 0))
+        s, ns = striker[idx], non_striker[idx]
+        striker[idx], non_striker[idx] = np.where(swap, ns, s), np.where(swap, s, ns)
+
+        active[idx] = (wickets[idx] < n_bat - 1) & (legal[idx] < overs * 6)
+    return runs
+
+def win_probability(xi, opponent, n_sims=N_SIMS, seed=0, model=None, team=TEAM):
+    """
+    P(xi beats opponent) from n_sims simulated matches: the XI bats against the opponent's
+    bowling profile and bowls its best five to the opponent's batting profile. Returns the
+    estimate, its 95% interval and the mean innings totals.
+    """
+    model = load_outcome_model() if model is None else model
+    rng = np.random.default_rng(seed)
+    xi = list(xi)
+
+    team_bat, team_bowl = model.team('team_bat', team), model.team('team_bowl', team)
+    opp_bat, opp_bowl = model.team('team_bat', opponent), model.team('team_bowl', opponent)
+
+    # Our innings: the XI in batting order against a generic bowler of the opponent
+    bat_probs = model.players('bat', xi, team_bat)
+    ours = simulate_innings(model.matchup(bat_probs, opp_bowl[None, :]), np.zeros(OVERS, dtype=np.int64), n_sims, rng)
+
+    # Their innings: a generic opponent batter against our bowling plan
+    bowl_probs = model.players('bowl', xi, team_bowl)
+    plan = bowling_plan(bowl_probs, qualified=model.balls('bowl', xi) >= MIN_BOWLING_BALLS)
+    opp_lineup = np.repeat(opp_bat[None, :], len(xi), axis=0)
+    theirs = simulate_innings(model.matchup(opp_lineup, bowl_probs), plan, n_sims, rng)
+
+    # A tie counts as half a win (a super over is a coin flip)
+    p = float(np.mean(ours > theirs) + 0.5 * np.mean(ours == theirs))
+    half_width = Z_95 * np.sqrt(p * (1 - p) / n_sims)
+    return {
+        'win_probability': p,
+        'ci_low': max(0.0, p - half_width),
+        'ci_high': min(1.0, p + half_width),
+        'mean_score': float(ours.mean()),
+        'mean_opponent_score': float(theirs.mean()),
+        'bowlers': [xi[i] for i in dict.fromkeys(plan.tolist())],
+    }
+
+def rank_xis(solutions, opponent, n_sims=N_SIMS, seed=0):
+    """Re-rank optimize_xi's (total, xi) solutions by simulated win probability against `opponent`."""
+    model = load_outcome_model()
+    ranked = []
+    for total, xi in solutions:
+        result = win_probability(xi, opponent, n_sims=n_sims, seed=seed, model=model)
+        ranked.append({'total': total, 'xi': xi, **result})
+    return sorted(ranked, key=lambda r: -r['win_probability'])
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank the optimizer's top XIs by simulated win probability.")
+    parser.add_argument('--opponent', default="India")
+    parser.add_argument('--top-k', type=int, default=4)
+    parser.add_argument('--sims', type=int, default=N_SIMS)
+    parser.add_argument('--build', action='store_true', help="Rebuild the ball-outcome table from the raw data first.")
+    args = parser.parse_args()
+
+    if args.build or load_ball_outcomes() is None:
+        build_ball_outcomes()
+    try:
+        load_outcome_model().team('team_bowl', args.opponent)
+    except ValueError as e:
+        parser.error(str(e))
+
+    from select_team import load_player_ratings, load_player_roles, optimize_xi
+    bat_ratings, bowl_ratings, active_players = load_player_ratings()
+    solutions = optimize_xi(bat_ratings, bowl_ratings, load_player_roles(), active_players, top_k=args.top_k)
+
+    start = time.perf_counter()
+    ranked = rank_xis(solutions, args.opponent, n_sims=args.sims)
+    elapsed = time.perf_counter() - start
+    print(f"{len(ranked)} XIs vs {args.opponent}, {args.sims} simulated matches each, in {elapsed:.1f}s:")
+    best = ranked[0]['xi']
+    for rank, r in enumerate(ranked, 1):
+        changes = "" if r['xi'] == best else (f" in {sorted(set(r['xi']) - set(best))}, "
+                                              f"out {sorted(set(best) - set(r['xi']))}")
+        print(f"#{rank} win {r['win_probability']:.1%} [{r['ci_low']:.1%}, {r['ci_high']:.1%}] "
+              f"scores {r['mean_score']:.0f} v {r['mean_opponent_score']:.0f} "
+              f"(optimizer total {r['total']:.1f}){changes}")
+    print("Best XI:", ", ".join(best))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifacts import file_version
+from player_index import player_offsets
+from player_profiles import PHASES
+
+MATCHUPS_PATH = "data/processed/matchups.parquet"
+
+KEYS = ['batter', 'bowler', 'team', 'phase', 'season']
+MEASURES = ['balls', 'runs', 'dots', 'boundaries', 'dismissals']
+# Dismissals of the striker that are not credited to the bowler
+NON_BOWLER_DISMISSALS = ['run out', 'retired hurt', 'retired out', 'retired not out', 'obstructing the field']
+
+# (file version, MatchupIndex)
+_CACHE = {}
+
+def matchup_table(balls_df):
+    """
+    Batter x bowler totals from every delivery in one grouped pass, split by the bowler's team,
+    the phase of the innings and the season. Wides are not balls faced; dismissals only count
+    when the striker was out and the bowler gets the credit.
+    """
+    faced = balls_df['wides'].isna().to_numpy()
+    runs = balls_df['runs_off_bat'].fillna(0).to_numpy(dtype=np.int64)
+    over = balls_df['ball'].to_numpy().astype(np.int64)
+    dismissed = ((balls_df['player_dismissed'] == balls_df['striker'])
+                 & ~balls_df['wicket_type'].isin(NON_BOWLER_DISMISSALS)).to_numpy()
+
+    balls = pd.DataFrame({
+        'batter': balls_df['striker'].to_numpy(),
+        'bowler': balls_df['bowler'].to_numpy(),
+        'team': balls_df['bowling_team'].to_numpy(),
+        'phase': np.select([over < PHASES['powerplay'][1], over < PHASES['middle'][1]], ['powerplay', 'middle'], 'death'),
+        'season': pd.to_datetime(balls_df['start_date']).dt.year.to_numpy(),
+        'balls': faced.astype(np.int64),
+        'runs': runs,
+        'dots': (faced & (runs == 0)).astype(np.int64),
+        'boundaries': np.isin(runs, [4, 6]).astype(np.int64),
+        'dismissals': dismissed.astype(np.int64),
+    })
+    table = balls.groupby(KEYS, sort=True, observed=True)[MEASURES].sum().reset_index()
+    return table[table[MEASURES].to_numpy().any(axis=1)].reset_index(drop=True)
+
+def with_rates(stats):
+    """Add strike rate, dot and boundary percentages and balls per dismissal to rows of summed measures."""
+    balls = stats['balls'].clip(lower=1)
+    stats['strike_rate'] = (stats['runs'] / balls * 100).round(1)
+    stats['dot_pct'] = (stats['dots'] / balls * 100).round(1)
+    stats['boundary_pct'] = (stats['boundaries'] / balls * 100).round(1)
+    stats['balls_per_dismissal'] = (stats['balls'] / stats['dismissals'].where(stats['dismissals'] > 0)).round(1)
+    return stats
+
+def _summary(totals):
+    """with_rates for a single vector of summed measures, as a plain dict (no DataFrame overhead on lookups)."""
+    stats = dict(zip(MEASURES, (int(v) for v in totals)))
+    balls = max(stats['balls'], 1)
+    stats['strike_rate'] = round(stats['runs'] / balls * 100, 1)
+    stats['dot_pct'] = round(stats['dots'] / balls * 100, 1)
+    stats['boundary_pct'] = round(stats['boundaries'] / balls * 100, 1)
+    stats['balls_per_dismissal'] = round(stats['balls'] / stats['dismissals'], 1) if stats['dismissals'] else None
+    return stats
+
+class MatchupIndex:
+    """
+    The matchup table sorted by (batter, bowler), with offset tables so one pair's rows and
+    one batter's rows are contiguous slices. Pair lookups are a dict hit plus a sum over at
+    most phases x seasons rows; team queries only touch that batter's rows.
+    """
+
+    def __init__(self, table):
+        table = table.sort_values(['batter', 'bowler', 'team', 'phase', 'season'], kind='stable', ignore_index=True)
+        self.table = table
+        self.batters = sorted(table['batter'].unique().tolist())
+        self.bowlers = sorted(table['bowler'].unique().tolist())
+        self.batter_ids = {p: i for i, p in enumerate(self.batters)}
+        self.bowler_ids = {p: i for i, p in enumerate(self.bowlers)}
+
+        names, starts, stops = player_offsets(table['batter'].to_numpy())
+        self.batter_offsets = {p: (int(a), int(b)) for p, a, b in zip(names, starts, stops)}
+        pairs = table['batter'].to_numpy().astype(object) + '\x00' + table['bowler'].to_numpy().astype(object)
+        names, starts, stops = player_offsets(pairs)
+        self.pair_offsets = {tuple(k.split('\x00')): (int(a), int(b)) for k, a, b in zip(names, starts, stops)}
+
+        self._values = table[MEASURES].to_numpy()
+        self._bowler_codes = table['bowler'].map(self.bowler_ids).to_numpy()
+        self._batter_codes = table['batter'].map(self.batter_ids).to_numpy()
+        self._teams = table['team'].to_numpy()
+        self._phases = table['phase'].to_numpy()
+        self._seasons = table['season'].to_numpy()
+
+    def _mask(self, start, stop, phases=None, seasons=None, teams=None):
+        mask = np.ones(stop - start, dtype=bool)
+        if phases is not None:
+            mask &= np.isin(self._phases[start:stop], list(phases))
+        if seasons is not None:
+            s = self._seasons[start:stop]
+            mask &= (s >= seasons[0]) & (s <= seasons[1])
+        if teams is not None:
+            mask &= np.isin(self._teams[start:stop], list(teams))
+        return mask
+
+    def pair(self, batter, bowler, phases=None, seasons=None):
+        """Summed measures and rates for one batter against one bowler; all zeros if they never met."""
+        start, stop = self.pair_offsets.get((batter, bowler), (0, 0))
+        return _summary(self._values[start:stop][self._mask(start, stop, phases, seasons)].sum(axis=0))
+
+    def batter_vs_team(self, batter, team, phases=None, seasons=None):
+        """One row per bowler who bowled to `batter` while playing for `team`, most balls first."""
+        start, stop = self.batter_offsets.get(batter, (0, 0))
+        mask = self._mask(start, stop, phases, seasons, teams=[team])
+        rows = self.table.iloc[start:stop][mask]
+        per_bowler = rows.groupby('bowler', sort=False)[MEASURES].sum()
+        return with_rates(per_bowler.sort_values('balls', ascending=False).reset_index())
+
+    def batter_totals(self, batter, teams=None, phases=None, seasons=None):
+        """A batter's summed measures against every bowler, or against the bowlers of `teams`."""
+        start, stop = self.batter_offsets.get(batter, (0, 0))
+        return _summary(self._values[start:stop][self._mask(start, stop, phases, seasons, teams)].sum(axis=0))
+
+    def matrix(self, measure='balls', phases=None, seasons=None, teams=None):
+        """Sparse (batters x bowlers) matrix of one measure; rows and columns follow self.batters / self.bowlers."""
+        from scipy.sparse import csr_matrix
+
+        mask = self._mask(0, len(self.table), phases, seasons, teams)
+        values = self._values[mask, MEASURES.index(measure)]
+        return csr_matrix((values, (self._batter_codes[mask], self._bowler_codes[mask])),
+                          shape=(len(self.batters), len(self.bowlers)))
+
+def build_matchups(path=MATCHUPS_PATH, balls_df=None):
+    from extract_player_stats import load_data
+
+    start = time.perf_counter()
+    balls_df = load_data() if balls_df is None else balls_df
+    table = matchup_table(balls_df)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table.to_parquet(path, index=False)
+    pairs = table[['batter', 'bowler']].drop_duplicates()
+    print(f"Saved {len(table)} matchup cells ({len(pairs)} batter-bowler pairs) to {path} "
+          f"in {time.perf_counter() - start:.1f}s")
+    return path
+
+def load_matchup_index(path=MATCHUPS_PATH):
+    """MatchupIndex over the persisted table, rebuilt only when the file changes; None if the stage has not run."""
+    if not os.path.exists(path):
+        return None
+    version = file_version(path)
+    cached = _CACHE.get(path)
+    if cached is None or cached[0] != version:
+        cached = (version, MatchupIndex(pd.read_parquet(path)))
+        _CACHE[path] = cached
+    return cached[1]
+
+if __name__ == "__main__":
+    build_matchups()
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+ROLLING_WINDOW = 10
+EWMA_SPAN = 5
+
+def player_offsets(players):
+    """(names, starts, stops) of each player's contiguous block in an array sorted by player."""
+    players = np.asarray(players)
+    names, starts = np.unique(players, return_index=True)
+    order = np.argsort(starts)
+    names, starts = names[order], starts[order]
+    stops = np.append(starts[1:], len(players))
+    return names, starts, stops
+
+def add_form_columns(df, window=ROLLING_WINDOW, span=EWMA_SPAN):
+    """
+    Per-player rolling mean and EWMA of performance_score over each player's full history.
+    `df` must be sorted by player then match date, so every player's rows are contiguous.
+    """
+    names, starts, stops = player_offsets(df['player'].to_numpy())
+    scores = df['performance_score'].to_numpy(dtype=float)
+
+    # Rolling mean from one cumulative sum: each window is clipped to the start of its player's block
+    csum = np.concatenate([[0.0], np.cumsum(scores)])
+    pos = np.arange(len(scores))
+    block_start = np.repeat(starts, stops - starts)
+    lo = np.maximum(block_start, pos - window + 1)
+    df[f'rolling_{window}'] = (csum[pos + 1] - csum[lo]) / (pos + 1 - lo)
+
+    df[f'ewma_{span}'] = (df.groupby('player', sort=False)['performance_score']
+                          .transform(lambda s: s.ewm(span=span, adjust=False).mean()))
+    return df
+
+class PlayerIndex:
+    """
+    Read-only view of the app dataset partitioned by player: an offset table into the
+    player-sorted frame, so a player's history is a contiguous slice and filters only
+    touch that player's rows.
+    """
+
+    def __init__(self, df):
+        if f'rolling_{ROLLING_WINDOW}' not in df.columns or f'ewma_{EWMA_SPAN}' not in df.columns:
+            df = add_form_columns(df.copy())
+        self.df = df
+        names, starts, stops = player_offsets(df['player'].to_numpy())
+        self.offsets = {p: (int(a), int(b)) for p, a, b in zip(names, starts, stops)}
+        self.players = list(names)
+        self._years = df['match_date'].dt.year.to_numpy()
+        self._opponents = df['opponent'].to_numpy()
+        self._latest = None
+
+    def __contains__(self, player):
+        return player in self.offsets
+
+    def history(self, player):
+        """All of a player's rows in date order (a slice of the shared frame)."""
+        start, stop = self.offsets.get(player, (0, 0))
+        return self.df.iloc[start:stop]
+
+    def select_rows(self, player, years=None, opponents=None):
+        """Positions in the shared frame of a player's rows within a year range and opponent list."""
+        start, stop = self.offsets.get(player, (0, 0))
+        mask = np.ones(stop - start, dtype=bool)
+        if years is not None:
+            y = self._years[start:stop]
+            mask &= (y >= years[0]) & (y <= years[1])
+        if opponents is not None:
+            mask &= np.isin(self._opponents[start:stop], list(opponents))
+        return start + np.flatnonzero(mask)
+
+    def select(self, player, years=None, opponents=None):
+        """A player's rows within an inclusive (first, last) year range and opponent list."""
+        return self.df.iloc[self.select_rows(player, years, opponents)]
+
+    def latest(self):
+        """Each player's latest non-null value of every column, built once and shared by all callers."""
+        if self._latest is None:
+            self._latest = self.df.groupby('player', sort=True).last().reset_index()
+        return self._latest
@@ -0,0 +1,175 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifacts import file_version
+from extract_player_stats import load_data, get_sl_players
+
+PROFILES_PATH = "data/processed/player_profiles.csv"
+
+# Overs (0-based) in each phase of a T20 innings
+PHASES = {'powerplay': (0, 6), 'middle': (6, 15), 'death': (15, 20)}
+
+# A player "bowls regularly" when they bowl in at least this share of their matches,
+# averaging at least this many overs when they do
+REGULAR_BOWLER_MATCH_SHARE = 0.5
+REGULAR_BOWLER_OVERS = 2.0
+# Batting positions counted as top order for openers and as genuine batting for allrounders
+OPENER_POSITIONS = 2
+ALLROUNDER_MAX_POSITION = 7.0
+# Spinners are used through the middle overs and rarely at the death, and are the
+# bowlers stumpings come off (per 1000 legal deliveries)
+SPIN_MIDDLE_SHARE = 0.55
+SPIN_DEATH_SHARE = 0.15
+SPIN_STUMPING_RATE = 2.0
+
+# (file version, {player: role})
+_CACHE = {}
+
+def batting_positions(balls_df):
+    """Batting position of every batter in every innings, from the order they first appear at the crease."""
+    seq = np.arange(len(balls_df)) * 2
+    crease = pd.concat([
+        pd.DataFrame({'match_id': balls_df['match_id'].to_numpy(), 'innings': balls_df['innings'].to_numpy(),
+                      'player': balls_df['striker'].to_numpy(), 'seq': seq}),
+        pd.DataFrame({'match_id': balls_df['match_id'].to_numpy(), 'innings': balls_df['innings'].to_numpy(),
+                      'player': balls_df['non_striker'].to_numpy(), 'seq': seq + 1}),
+    ], ignore_index=True)
+    first = crease.sort_values('seq', kind='stable').drop_duplicates(['match_id', 'innings', 'player'])
+    first['position'] = first.groupby(['match_id', 'innings']).cumcount() + 1
+    return first[['match_id', 'innings', 'player', 'position']]
+
+def batting_profile(balls_df):
+    pos = batting_positions(balls_df)
+    grouped = pos.groupby('player')['position']
+    return pd.DataFrame({
+        'bat_innings': grouped.size(),
+        'bat_mean_position': grouped.mean(),
+        'bat_top_order_share': (pos['position'] <= OPENER_POSITIONS).groupby(pos['player']).mean(),
+        'bat_middle_order_share': pos['position'].between(3, 5).groupby(pos['player']).mean(),
+        'bat_lower_order_share': pos['position'].between(6, 7).groupby(pos['player']).mean(),
+        'bat_tail_share': (pos['position'] >= 8).groupby(pos['player']).mean(),
+    })
+
+def bowling_profile(balls_df):
+    legal = balls_df[balls_df['wides'].isna() & balls_df['noballs'].isna()]
+    over = legal['ball'].to_numpy().astype(np.int64)
+    phase = np.select([over < PHASES['powerplay'][1], over < PHASES['middle'][1]],
+                      ['powerplay', 'middle'], 'death')
+
+    per_player = legal.groupby('bowler')
+    innings_balls = legal.groupby(['match_id', 'innings']).size().rename('innings_balls')
+    spells = legal.groupby(['bowler', 'match_id', 'innings']).size().rename('balls').reset_index()
+    spells = spells.join(innings_balls, on=['match_id', 'innings'])
+
+    profile = pd.DataFrame({
+        'bowl_matches': spells.groupby('bowler')['match_id'].nunique(),
+        'bowl_balls': per_player.size(),
+        'bowl_stumpings': (balls_df['wicket_type'] == 'stumped').groupby(balls_df['bowler']).sum(),
+        # Share of the team's deliveries in the innings the player bowled in
+        'bowl_share': spells.groupby('bowler')['balls'].sum() / spells.groupby('bowler')['innings_balls'].sum(),
+    })
+    phase_share = pd.crosstab(legal['bowler'].to_numpy(), phase, normalize='index')
+    phase_share = phase_share.reindex(columns=list(PHASES), fill_value=0.0).add_prefix('bowl_').add_suffix('_share')
+    profile = profile.join(phase_share)
+    profile.index.name = 'player'
+    return profile
+
+def infer_bowling_style(middle_share, death_share, stumpings, balls):
+    """'spin' or 'pace' from phase usage and stumpings; the ball data has no bowling style, so this is a heuristic."""
+    stumping_rate = np.asarray(stumpings) / np.maximum(np.asarray(balls), 1) * 1000
+    spin = (stumping_rate >= SPIN_STUMPING_RATE) | (
+        (np.asarray(middle_share) >= SPIN_MIDDLE_SHARE) & (np.asarray(death_share) <= SPIN_DEATH_SHARE))
+    return np.where(spin, 'spin', 'pace')
+
+def infer_role(row):
+    """Role in the PLAYER_ROLES vocabulary from a profile row."""
+    regular_bowler = (row['bowl_match_share'] >= REGULAR_BOWLER_MATCH_SHARE
+                      and row['bowl_overs_per_match'] >= REGULAR_BOWLER_OVERS)
+    spin = row['bowling_style'] == 'spin'
+    bats = row['bat_innings'] > 0 and row['bat_mean_position'] <= ALLROUNDER_MAX_POSITION
+
+    if regular_bowler and bats:
+        role = 'allrounder_spin' if spin else 'allrounder'
+    elif regular_bowler:
+        role = 'spinner' if spin else 'pacer'
+    elif row['bat_top_order_share'] >= 0.5:
+        role = 'opener'
+    else:
+        role = 'middle_order'
+
+    if row['keeper']:
+        role += '_wk'
+    return role
+
+def build_profile_frame(balls_df=None, player_roles=None):
+    """
+    One row per Sri Lanka player: batting position distribution, bowling share and phase
+    usage, the inferred role and the role used for selection (PLAYER_ROLES overrides win).
+    Keeping is taken from the overrides only, since the ball data does not record fielders.
+    """
+    if player_roles is None:
+        from select_team import PLAYER_ROLES
+        player_roles = PLAYER_ROLES
+    if balls_df is None:
+        balls_df = load_data()
+
+    players = sorted(set(get_sl_players(balls_df)) | set(player_roles))
+    appearances = pd.concat([balls_df[['match_id', col]].set_axis(['match_id', 'player'], axis=1)
+                             for col in ('striker', 'non_striker', 'bowler')])
+    matches = appearances.drop_duplicates().groupby('player').size()
+
+    profile = batting_profile(balls_df).join(bowling_profile(balls_df), how='outer')
+    profile = profile.reindex(players)
+    profile['matches'] = matches.reindex(players).fillna(0).astype(int)
+    profile = profile.fillna({c: 0 for c in profile.columns if c != 'bat_mean_position'})
+    counts = ['bat_innings', 'bowl_matches', 'bowl_balls', 'bowl_stumpings']
+    profile[counts] = profile[counts].astype(int)
+
+    profile['bowl_match_share'] = profile['bowl_matches'] / profile['matches'].clip(lower=1)
+    profile['bowl_overs_per_match'] = profile['bowl_balls'] / 6 / profile['bowl_matches'].clip(lower=1)
+    profile['bowling_style'] = np.where(profile['bowl_balls'] > 0,
+                                        infer_bowling_style(profile['bowl_middle_share'], profile['bowl_death_share'],
+                                                            profile['bowl_stumpings'], profile['bowl_balls']),
+                                        'none')
+    profile['keeper'] = [('wk' in player_roles.get(p, '')) for p in profile.index]
+    profile['inferred_role'] = profile.apply(infer_role, axis=1)
+    profile['role'] = [player_roles.get(p, r) for p, r in zip(profile.index, profile['inferred_role'])]
+    profile['role_source'] = np.where(profile.index.isin(list(player_roles)), 'override', 'inferred')
+    profile.index.name = 'player'
+    return profile
+
+def build_player_profiles(path=PROFILES_PATH, balls_df=None):
+    start = time.perf_counter()
+    profile = build_profile_frame(balls_df)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    profile.to_csv(path)
+    overrides = int((profile['role_source'] == 'override').sum())
+    agree = profile.loc[profile['role_source'] == 'override']
+    agree = int((agree['role'] == agree['inferred_role']).sum())
+    print(f"Saved profiles for {len(profile)} players to {path} in {time.perf_counter() - start:.1f}s "
+          f"({overrides} overridden, inference agrees with {agree} of them)")
+    return path
+
+def load_player_profiles(path=PROFILES_PATH):
+    """Profile table indexed by player, or None if the stage has not run."""
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, index_col='player')
+
+def load_inferred_roles(path=PROFILES_PATH):
+    """{player: role} from the profile table, re-read only when the file changes; {} if missing."""
+    version = file_version(path)
+    cached = _CACHE.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    profile = load_player_profiles(path)
+    roles = {} if profile is None else profile['role'].to_dict()
+    _CACHE[path] = (version, roles)
+    return roles
+
+if __name__ == "__main__":
+    build_player_profiles()
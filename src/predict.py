@@ -0,0 +1,125 @@
+import os
+import joblib
+import pandas as pd
+import warnings
+
+from artifacts import file_version
+from ratings_snapshot import load_ratings_snapshot, snapshot_version
+
+warnings.filterwarnings('ignore')
+
+BAT_FEATURES = ['form_runs_10', 'form_sr_10', 'form_boundaries_10',
+                'form_dot_pct_10', 'form_dismissals_10', 'consistency_score',
+                'matches_played_total', 'recent_50s']
+
+BOWL_FEATURES = ['form_wickets_10', 'form_economy_10', 'form_sr_bowl_10',
+                 'form_dot_pct_bowl_10', 'form_maidens_10', 'consistency_wickets',
+                 'recent_3fers']
+
+ROLE_ARTIFACTS = {
+    'batting': {
+        'model': "models/rf_batsman_classifier.pkl",
+        'scaler': "models/scaler_bat.pkl",
+        'encoder': "models/label_encoder_bat.pkl",
+        'data': "data/processed/player_labeled_batting.csv",
+        'snapshot_prefix': 'bat_',
+        'features': BAT_FEATURES,
+    },
+    'bowling': {
+        'model': "models/rf_bowler_classifier.pkl",
+        'scaler': "models/scaler_bowl.pkl",
+        'encoder': "models/label_encoder_bowl.pkl",
+        'data': "data/processed/player_labeled_bowling.csv",
+        'snapshot_prefix': 'bowl_',
+        'features': BOWL_FEATURES,
+    },
+}
+
+# (role, model version) -> (model, scaler, encoder)
+_MODEL_CACHE = {}
+# (role, model version, data version) -> DataFrame of class probabilities for every player
+_PROBA_CACHE = {}
+# Missing model paths already reported, so long-running callers warn once
+_MISSING_REPORTED = set()
+
+def model_version(role):
+    paths = ROLE_ARTIFACTS[role]
+    return file_version(paths['model'], paths['scaler'], paths['encoder'])
+
+def data_version(role):
+    return snapshot_version()
+
+def load_role_model(role):
+    """Load (model, scaler, label encoder) for a role, reusing them while the files are unchanged."""
+    paths = ROLE_ARTIFACTS[role]
+    if not os.path.exists(paths['model']):
+        if paths['model'] not in _MISSING_REPORTED:
+            print(f"Model not found: {paths['model']}. Run train.py first.")
+            _MISSING_REPORTED.add(paths['model'])
+        return None
+
+    key = (role, model_version(role))
+    if key not in _MODEL_CACHE:
+        _MODEL_CACHE[key] = (
+            joblib.load(paths['model']),
+            joblib.load(paths['scaler']),
+            joblib.load(paths['encoder']),
+        )
+    return _MODEL_CACHE[key]
+
+def latest_feature_rows(role):
+    """Latest labeled feature row per player for a role, indexed by player (from the ratings snapshot)."""
+    paths = ROLE_ARTIFACTS[role]
+    snapshot = load_ratings_snapshot()
+    prefix = paths['snapshot_prefix']
+    played = snapshot[snapshot[f'{prefix}match_date'].notna()]
+    latest = played[[prefix + f for f in paths['features']]]
+    latest.columns = paths['features']
+    return latest.fillna(0)
+
+def _role_proba(role):
+    loaded = load_role_model(role)
+    if loaded is None:
+        return None
+
+    key = (role, model_version(role), data_version(role))
+    if key not in _PROBA_CACHE:
+        model, scaler, le = loaded
+        X = latest_feature_rows(role)
+        # One vectorized predict_proba call for the whole population
+        proba = model.predict_proba(scaler.transform(X))
+        classes = le.inverse_transform(model.classes_)
+        _PROBA_CACHE[key] = pd.DataFrame(proba, index=X.index, columns=classes)
+    return _PROBA_CACHE[key]
+
+def predict_squad_proba(active_players=None):
+    """
+    Class probabilities for the latest form of every (active) player.
+    Returns {'batting': DataFrame, 'bowling': DataFrame} with one row per player and
+    one column per label; a role maps to None when its model has not been trained.
+    """
+    results = {}
+    for role in ROLE_ARTIFACTS:
+        proba = _role_proba(role)
+        if proba is not None and active_players is not None:
+            proba = proba[proba.index.isin(active_players)]
+        results[role] = proba
+    return results
+
+def main():
+    from select_team import load_player_ratings
+
+    _, _, active_players = load_player_ratings()
+    results = predict_squad_proba(active_players)
+
+    for role, proba in results.items():
+        if proba is None:
+            continue
+        print(f"\n{role.title()} class probabilities ({len(proba)} active players):")
+        ranked = proba.assign(predicted_label=proba.idxmax(axis=1))
+        if 'Excellent' in proba.columns:
+            ranked = ranked.sort_values('Excellent', ascending=False)
+        print(ranked.round(3).to_string())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import os
+import pandas as pd
+
+from artifacts import file_version
+
+SNAPSHOT_PATH = "data/processed/ratings_snapshot.csv"
+SOURCES = {
+    'bat': "data/processed/player_labeled_batting.csv",
+    'bowl': "data/processed/player_labeled_bowling.csv",
+}
+# Players who appeared within this many days of the latest match in the data are active
+ACTIVE_WINDOW_DAYS = 365
+
+# (version, snapshot DataFrame indexed by player)
+_CACHE = {}
+
+def build_snapshot_frame():
+    """Latest batting and bowling row per player (prefixed bat_/bowl_), last-played date and active flag."""
+    latest = []
+    for prefix, path in SOURCES.items():
+        df = pd.read_csv(path)
+        df['match_date'] = pd.to_datetime(df['match_date'])
+        last = df.sort_values('match_date', kind='stable').drop_duplicates('player', keep='last')
+        last = last.drop(columns=['match_id']).set_index('player').add_prefix(f'{prefix}_')
+        latest.append(last)
+
+    snapshot = latest[0].join(latest[1], how='outer')
+    snapshot['last_played'] = snapshot[['bat_match_date', 'bowl_match_date']].max(axis=1)
+    cutoff = snapshot['last_played'].max() - pd.Timedelta(days=ACTIVE_WINDOW_DAYS)
+    snapshot['active'] = snapshot['last_played'] >= cutoff
+    snapshot.index.name = 'player'
+    return snapshot.sort_index()
+
+def build_ratings_snapshot(path=SNAPSHOT_PATH):
+    snapshot = build_snapshot_frame()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    snapshot.to_csv(path)
+    print(f"Saved ratings snapshot for {len(snapshot)} players ({int(snapshot['active'].sum())} active) to {path}")
+    return path
+
+def snapshot_version(path=SNAPSHOT_PATH):
+    """Version of the snapshot file, or of its sources when the snapshot has not been built."""
+    if os.path.exists(path):
+        return file_version(path)
+    return file_version(*SOURCES.values())
+
+def load_ratings_snapshot(path=SNAPSHOT_PATH):
+    """
+    Snapshot DataFrame indexed by player, kept in memory and re-read only when the file
+    changes. Falls back to building it from the labeled CSVs if the stage has not run.
+    """
+    version = snapshot_version(path)
+    cached = _CACHE.get(path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    if os.path.exists(path):
+        snapshot = pd.read_csv(path, index_col='player',
+                               parse_dates=['bat_match_date', 'bowl_match_date', 'last_played'])
+    else:
+        snapshot = build_snapshot_frame()
+    _CACHE[path] = (version, snapshot)
+    return snapshot
+
+if __name__ == "__main__":
+    build_ratings_snapshot()
@@ -0,0 +1,117 @@
+import json
+import os
+import time
+
+from artifacts import file_digest, file_version
+from matchups import MATCHUPS_PATH
+from player_profiles import PROFILES_PATH
+from ratings_snapshot import SNAPSHOT_PATH, SOURCES as SNAPSHOT_SOURCES
+from select_team import (load_player_ratings, load_player_roles, optimize_xi, adjust_ratings, matchup_factors,
+                         PITCH_MULTIPLIERS)
+from venue_profiles import VENUE_PROFILES_PATH, scenario_venues, venue_multipliers
+
+OPPONENTS = ["India", "Australia", "England", "Pakistan", "South Africa", "Afghanistan"]
+# Offered when the venue profile stage has not run
+VENUE_TYPES = ["Home", "Away", "Neutral"]
+# Conditions measured at the chosen ground; the hand-set pitch types remain as manual overrides
+VENUE_CONDITIONS = "From venue data"
+PITCHES = [VENUE_CONDITIONS] + list(PITCH_MULTIPLIERS)
+
+SCENARIOS_PATH = "data/processed/xi_scenarios.json"
+TOP_K = 4
+
+# (artifact file version, parsed artifact)
+_LOADED = {}
+
+def scenario_key(opponent, venue, pitch):
+    return f"{opponent}|{venue}|{pitch}"
+
+def ratings_version():
+    """
+    Stamp of the inputs a scenario depends on: content digests of the ratings snapshot (or its
+    sources before it is built), the role table, the matchups and the venue profiles. A pipeline
+    re-run that rewrites them unchanged keeps the artifact current.
+    """
+    ratings = [SNAPSHOT_PATH] if os.path.exists(SNAPSHOT_PATH) else list(SNAPSHOT_SOURCES.values())
+    return [file_digest(p) for p in ratings + [PROFILES_PATH, MATCHUPS_PATH, VENUE_PROFILES_PATH]]
+
+def venue_options():
+    """Profiled grounds to pick from, or the generic venue types before the venue stage has run."""
+    return scenario_venues() or VENUE_TYPES
+
+def scenario_multipliers(opponent, venue, pitch):
+    """
+    (multipliers, measured) for a scenario: the ground's measured conditions (see venue_profiles.py),
+    or a hand-set pitch type. `measured` is False unless a venue profile was used; grounds without
+    one play as Balanced.
+    """
+    if pitch == VENUE_CONDITIONS:
+        measured = venue_multipliers(venue)
+        if measured is not None:
+            return measured, True
+        return PITCH_MULTIPLIERS['Balanced'], False
+    return PITCH_MULTIPLIERS[pitch], False
+
+def solve_scenario(bat_ratings, bowl_ratings, active_players, multipliers, top_k=TOP_K, bat_factors=None):
+    """Best XI, alternatives and the adjusted score of every active player for one set of multipliers."""
+    player_roles = load_player_roles()
+    adj_bat, adj_bowl = adjust_ratings(bat_ratings, bowl_ratings, player_roles, *multipliers, bat_factors=bat_factors)
+    solutions = optimize_xi(adj_bat, adj_bowl, player_roles, active_players, top_k=top_k)
+    xi = solutions[0][1] if solutions else []
+    adj_scores = {p: round(max(adj_bat.get(p, 0), adj_bowl.get(p, 0)), 2) for p in active_players}
+    bench = sorted((p for p in active_players if p not in xi), key=lambda p: -adj_scores[p])
+    return {
+        'xi': xi,
+        'total': solutions[0][0] if solutions else 0.0,
+        'alternatives': [[total, alt] for total, alt in solutions[1:]],
+        'adj_scores': adj_scores,
+        'bench': bench,
+        'matchup_factors': bat_factors or {},
+    }
+
+def build_scenarios(path=SCENARIOS_PATH):
+    """Solve every opponent x venue x pitch combination from one load of the ratings."""
+    version = ratings_version()
+    bat_ratings, bowl_ratings, active_players = load_player_ratings()
+
+    solved = {}  # scenarios sharing multipliers and opponent share one solve
+    scenarios = {}
+    for opponent in OPPONENTS:
+        factors = matchup_factors(active_players, opponent)
+        for venue in venue_options():
+            for pitch in PITCHES:
+                mults, _ = scenario_multipliers(opponent, venue, pitch)
+                if (mults, opponent) not in solved:
+                    solved[mults, opponent] = solve_scenario(bat_ratings, bowl_ratings, active_players, mults,
+                                                             bat_factors=factors)
+                scenarios[scenario_key(opponent, venue, pitch)] = solved[mults, opponent]
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'ratings_version': version, 'scenarios': scenarios}, f)
+    print(f"Saved {len(scenarios)} scenarios ({len(solved)} distinct solves) to {path}")
+    return path
+
+def load_scenario(opponent, venue, pitch, path=SCENARIOS_PATH):
+    """Precomputed scenario, or None if the artifact is missing or older than the current ratings."""
+    if not os.path.exists(path):
+        return None
+    version = file_version(path)
+    cached = _LOADED.get(path)
+    if cached is None or cached[0] != version:
+        with open(path) as f:
+            cached = (version, json.load(f))
+        _LOADED[path] = cached
+
+    artifact = cached[1]
+    if artifact['ratings_version'] != ratings_version():
+        return None
+    return artifact['scenarios'].get(scenario_key(opponent, venue, pitch))
+
+def main():
+    start = time.perf_counter()
+    build_scenarios()
+    print(f"Built scenario matrix in {time.perf_counter() - start:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,14 @@
-import pandas as pd
-import json
+import bisect
+import heapq
+
+import numpy as np
+
+from player_profiles import load_inferred_roles
+from ratings_snapshot import load_ratings_snapshot
 
 PLAYER_ROLES = {
     'P Nissanka': 'opener',
-    'Kusal Mendis': 'opener_wk',
+    'BKG Mendis': 'opener_wk',
     'KIC Asalanka': 'middle_order',
     'PHKD Mendis': 'middle_order',
     'S Samarawickrama': 'middle_order_wk',
@@ -19,77 +24,297 @@ PLAYER_ROLES = {
     'MDKJ Perera': 'opener_wk',
     'PBB Rajapaksa': 'middle_order',
     'AD Mathews': 'allrounder',
-    'L Kumara': 'pacer'
+    'CBRLS Kumara': 'pacer'
 }
 
+# Pitch-driven rating multipliers: (batting, bowling, extra spin factor)
+PITCH_MULTIPLIERS = {
+    'Balanced': (1.0, 1.0, 1.0),
+    'Batting-friendly': (1.2, 1.0, 1.0),
+    'Bowling-friendly': (1.0, 1.2, 1.0),
+    'Spin-friendly': (1.0, 1.0, 1.3),
+}
+
+# Matchup adjustment: a batter's strike rate against the opponent's bowlers relative to
+# their overall strike rate, shrunk toward no change with this many balls of prior weight
+MATCHUP_PRIOR_BALLS = 60
+MATCHUP_FACTOR_RANGE = (0.85, 1.15)
+
+def load_player_roles():
+    """Roles inferred by the player profile stage, with PLAYER_ROLES as manual overrides."""
+    return {**load_inferred_roles(), **PLAYER_ROLES}
+
 def load_player_ratings():
-    bat_df = pd.read_csv("data/processed/player_labeled_batting.csv")
-    bowl_df = pd.read_csv("data/processed/player_labeled_bowling.csv")
-    
-    bat_df['match_date'] = pd.to_datetime(bat_df['match_date'])
-    bowl_df['match_date'] = pd.to_datetime(bowl_df['match_date'])
-    
-    # Filter active players (played within the last 365 days of the latest match date in the dataset)
-    if not bat_df.empty:
-        latest_date = max(bat_df['match_date'].max(), bowl_df['match_date'].max())
-        cutoff_date = latest_date - pd.Timedelta(days=365)
-        
-        active_batters = bat_df[bat_df['match_date'] >= cutoff_date]['player'].unique()
-        active_bowlers = bowl_df[bowl_df['match_date'] >= cutoff_date]['player'].unique()
-        active_players = set(active_batters) | set(active_bowlers)
-    else:
+    """Latest batting and bowling ratings plus the active player set, read from the ratings snapshot."""
+    snapshot = load_ratings_snapshot()
+    bat_ratings = snapshot['bat_performance_score'].dropna().to_dict()
+    bowl_ratings = snapshot['bowl_performance_score'].dropna().to_dict()
+    active_players = set(snapshot.index[snapshot['active'].astype(bool)])
+    if not active_players:
         active_players = set(PLAYER_ROLES.keys())
-
-    bat_last = bat_df.sort_values('match_date').groupby('player').last().reset_index()
-    bowl_last = bowl_df.sort_values('match_date').groupby('player').last().reset_index()
-    
-    bat_ratings = bat_last.set_index('player')['performance_score'].to_dict()
-    bowl_ratings = bowl_last.set_index('player')['performance_score'].to_dict()
     return bat_ratings, bowl_ratings, active_players
 
-def select_best_xi(batting_ratings, bowling_ratings, player_roles, active_players):
-    selected = []
-    
-    # Filter roles dict to only include active players
-    active_roles = {p: r for p, r in player_roles.items() if p in active_players}
-    
-    openers = [p for p, r in active_roles.items() if 'opener' in r]
-    openers_sorted = sorted(openers, key=lambda p: batting_ratings.get(p, 0), reverse=True)
-    selected.extend(openers_sorted[:2])
-    
-    middle = [p for p, r in active_roles.items() if 'middle_order' in r]
-    middle = [p for p in middle if p not in selected]
-    middle_sorted = sorted(middle, key=lambda p: batting_ratings.get(p, 0), reverse=True)
-    selected.extend(middle_sorted[:3])
-    
-    allrounders = [p for p, r in active_roles.items() if 'allrounder' in r]
-    allrounder_sorted = sorted(allrounders, key=lambda p: batting_ratings.get(p, 0) + bowling_ratings.get(p, 0), reverse=True)
-    selected.extend(allrounder_sorted[:2])
-    
-    spinners = [p for p, r in active_roles.items() if 'spin' in r and p not in selected]
-    spinners_sorted = sorted(spinners, key=lambda p: bowling_ratings.get(p, 0), reverse=True)
-    if spinners_sorted:
-        selected.append(spinners_sorted[0])
-    
-    pacers = [p for p, r in active_roles.items() if 'pacer' in r and p not in selected]
-    pacers_sorted = sorted(pacers, key=lambda p: bowling_ratings.get(p, 0), reverse=True)
-    selected.extend(pacers_sorted[:3])
-    
-    # Fill remaining spots if needed with top rated remaining players
-    remaining = [p for p in active_roles.keys() if p not in selected]
-    remaining_sorted = sorted(remaining, key=lambda p: batting_ratings.get(p, 0) + bowling_ratings.get(p, 0), reverse=True)
-    
-    while len(selected) < 11 and remaining_sorted:
-        selected.append(remaining_sorted.pop(0))
-        
-    return selected[:11]
+def matchup_factors(players, opponent, index=None, prior_balls=MATCHUP_PRIOR_BALLS):
+    """{player: batting multiplier} from each player's record against `opponent`'s bowlers (see matchups.py)."""
+    if index is None:
+        from matchups import load_matchup_index
+        index = load_matchup_index()
+    if index is None:
+        return {}
+    factors = {}
+    for player in players:
+        overall = index.batter_totals(player)
+        versus = index.batter_totals(player, teams=[opponent])
+        if versus['balls'] == 0 or overall['strike_rate'] == 0:
+            continue
+        weight = versus['balls'] / (versus['balls'] + prior_balls)
+        factor = 1 + weight * (versus['strike_rate'] / overall['strike_rate'] - 1)
+        factors[player] = round(min(max(factor, MATCHUP_FACTOR_RANGE[0]), MATCHUP_FACTOR_RANGE[1]), 3)
+    return factors
+
+def adjust_ratings(batting_ratings, bowling_ratings, player_roles, bat_mult=1.0, bowl_mult=1.0, spin_mult=1.0,
+                   bat_factors=None):
+    """Scale ratings for match conditions; spin_mult only applies to spin bowlers, bat_factors per batter."""
+    bat_factors = bat_factors or {}
+    adj_bat = {p: score * bat_mult * bat_factors.get(p, 1.0) for p, score in batting_ratings.items()}
+    adj_bowl = {}
+    for p, score in bowling_ratings.items():
+        role = player_roles.get(p, 'unknown')
+        if 'spin' in role:
+            adj_bowl[p] = score * bowl_mult * spin_mult
+        else:
+            adj_bowl[p] = score * bowl_mult
+    return adj_bat, adj_bowl
+
+TEAM_SIZE = 11
+
+# Minimum number of selected players with each attribute (see role_flags)
+DEFAULT_CONSTRAINTS = {
+    'keepers': 1,
+    'openers': 2,
+    'bowling_options': 5,
+    'spinners': 1,
+    'pacers': 2,
+}
+
+# Subgradient steps for the optimizer's combined (Lagrangian) bound
+LAGRANGE_STEPS = 20
+# Branch-and-bound work (nodes plus subgradient steps) before optimize_xi hands the problem to an ILP solver
+NODE_LIMIT = 1_000
+
+# Order used when listing a selected XI
+ROLE_ORDER = ['opener', 'middle_order', 'allrounder', 'spinner', 'pacer']
+
+def role_flags(role):
+    return {
+        'keepers': 'wk' in role,
+        'openers': 'opener' in role,
+        'bowling_options': 'allrounder' in role or 'spin' in role or 'pacer' in role,
+        'spinners': 'spin' in role,
+        'pacers': 'pacer' in role,
+    }
+
+def player_value(role, bat, bowl):
+    """Rating a player contributes to the XI: their primary discipline, the better one for all-rounders."""
+    if 'allrounder' in role:
+        return max(bat, bowl)
+    if 'spin' in role or 'pacer' in role:
+        return bowl
+    return bat
+
+def _role_rank(role):
+    return next((i for i, r in enumerate(ROLE_ORDER) if r in role), len(ROLE_ORDER))
+
+class _NodeLimit(Exception):
+    pass
+
+def _solve_milp(values, flags, needs, size, top_k):
+    """
+    Top-k XIs as (score, picks) by mixed-integer programming: after each optimum, a cut
+    forbids that exact XI and the next solve finds the runner-up.
+    """
+    from scipy.optimize import Bounds, LinearConstraint, milp
+
+    n = len(values)
+    constraints = [LinearConstraint(np.ones((1, n)), size, size),
+                   LinearConstraint(flags.T, np.asarray(needs, dtype=float), np.inf)]
+    solutions = []
+    for _ in range(top_k):
+        result = milp(-values, constraints=constraints, integrality=np.ones(n), bounds=Bounds(0, 1),
+                      options={'mip_rel_gap': 0})
+        if not result.success:
+            break
+        chosen = result.x > 0.5
+        picks = tuple(np.flatnonzero(chosen).tolist())
+        solutions.append((float(values[chosen].sum()), picks))
+        constraints.append(LinearConstraint(chosen.astype(float)[None, :], -np.inf, size - 1))
+    return solutions
+
+def optimize_xi(batting_ratings, bowling_ratings, player_roles, active_players,
+                constraints=None, exclude=(), top_k=1, team_size=TEAM_SIZE):
+    """
+    Exact branch-and-bound search for the XI maximizing total player_value subject to
+    minimum role counts; past NODE_LIMIT nodes the same problem goes to an ILP solver.
+    Returns up to `top_k` (total_value, [players]) pairs, best first.
+    Minimums are capped at what the candidate pool can supply.
+    """
+    constraints = {**DEFAULT_CONSTRAINTS, **(constraints or {})}
+    names = list(constraints)
+    excluded = set(exclude)
+
+    candidates = []
+    for p, r in player_roles.items():
+        if p in active_players and p not in excluded:
+            value = player_value(r, batting_ratings.get(p, 0), bowling_ratings.get(p, 0))
+            flags = role_flags(r)
+            candidates.append((value, p, tuple(int(flags[c]) for c in names)))
+    # Highest value first makes the prefix-sum bound tight and finds good XIs early
+    candidates.sort(key=lambda c: (-c[0], c[1]))
+
+    n = len(candidates)
+    size = min(team_size, n)
+    if size == 0:
+        return []
+    values = [c[0] for c in candidates]
+    flags = [c[2] for c in candidates]
+
+    # prefix[i] = sum(values[:i]); suffix_counts[i][j] = candidates from i onward with attribute j
+    prefix = [0.0]
+    for v in values:
+        prefix.append(prefix[-1] + v)
+    suffix_counts = [[0] * len(names) for _ in range(n + 1)]
+    for i in range(n - 1, -1, -1):
+        suffix_counts[i] = [suffix_counts[i + 1][j] + flags[i][j] for j in range(len(names))]
+    needs = [min(constraints[c], suffix_counts[0][j]) for j, c in enumerate(names)]
+    # Candidate positions with / without each attribute, for the constraint-aware bound
+    in_group = [[i for i in range(n) if flags[i][j]] for j in range(len(names))]
+    out_group = [[i for i in range(n) if not flags[i][j]] for j in range(len(names))]
+
+    def upper_bound(i, slots, needs):
+        """
+        Best value of `slots` players from position i on. For each unmet minimum, the top
+        `slots` must swap their weakest non-qualifying players for the next qualifying ones;
+        each constraint alone is a relaxation, so the tightest of them is still a valid bound.
+        Also returns how many minimums the top `slots` miss.
+        """
+        end = i + slots
+        base = prefix[end] - prefix[i]
+        bound = base
+        shortfalls = 0
+        for j, need in enumerate(needs):
+            short = need - (suffix_counts[i][j] - suffix_counts[end][j])
+            if short <= 0:
+                continue
+            shortfalls += 1
+            first_after = bisect.bisect_left(in_group[j], end)
+            added = sum(values[k] for k in in_group[j][first_after:first_after + short])
+            last_inside = bisect.bisect_left(out_group[j], end)
+            removed = sum(values[k] for k in out_group[j][last_inside - short:last_inside])
+            bound = min(bound, base - removed + added)
+        return bound, shortfalls
+
+    value_arr = np.array(values, dtype=float)
+    flag_arr = np.array(flags, dtype=float).reshape(n, len(names))
+
+    def combined_bound(i, slots, needs, target):
+        """
+        Lagrangian bound over all unmet minimums at once: for any multipliers lam >= 0, the best
+        `slots` players by value + lam . flags, minus lam . needs, bounds the constrained optimum.
+        A few subgradient steps on lam; stops once the bound is at or below `target`.
+        """
+        need = np.maximum(np.array(needs, dtype=float), 0)
+        vals, flg = value_arr[i:], flag_arr[i:]
+        lam = np.zeros(len(names))
+        bound = float('inf')
+        for _ in range(LAGRANGE_STEPS):
+            nodes[0] += 1
+            adjusted = vals + flg @ lam
+            top = np.argpartition(-adjusted, slots - 1)[:slots] if slots < len(vals) else np.arange(len(vals))
+            value = adjusted[top].sum() - lam @ need
+            bound = min(bound, value)
+            if bound <= target:
+                break
+            shortfall = need - flg[top].sum(axis=0)
+            # Polyak step: aim the next bound at the incumbent, which is all pruning needs
+            norm = shortfall @ shortfall
+            if norm == 0:
+                break
+            lam = np.maximum(0.0, lam + (value - target) / norm * shortfall)
+        return bound
+
+    best = []  # min-heap of (score, picks) holding the top_k solutions so far
+    picks = []
+
+    def search(i, score, needs):
+        slots = size - len(picks)
+        if slots == 0:
+            if all(need <= 0 for need in needs):
+                entry = (score, tuple(picks))
+                if len(best) < top_k:
+                    heapq.heappush(best, entry)
+                elif score > best[0][0]:
+                    heapq.heapreplace(best, entry)
+            return
+        if n - i < slots:
+            return
+        for j, need in enumerate(needs):
+            if need > min(slots, suffix_counts[i][j]):
+                return
+        nodes[0] += 1
+        if nodes[0] > NODE_LIMIT:
+            raise _NodeLimit
+        if len(best) == top_k:
+            bound, shortfalls = upper_bound(i, slots, needs)
+            if score + bound <= best[0][0]:
+                return
+            # Several minimums the top players miss at once: only the combined bound can prune
+            if shortfalls > 1 and score + combined_bound(i, slots, needs, best[0][0] - score) <= best[0][0]:
+                return
+
+        picks.append(i)
+        search(i + 1, score + values[i], [need - f for need, f in zip(needs, flags[i])])
+        picks.pop()
+        search(i + 1, score, needs)
+
+    nodes = [0]
+    try:
+        search(0, 0.0, needs)
+    except _NodeLimit:
+        # Pools where no valid XI turns up early leave nothing to prune against; an ILP solver is exact there too
+        best = _solve_milp(value_arr, flag_arr, needs, size, top_k)
+
+    value_of = {p: v for v, p, _ in candidates}
+    results = []
+    for score, idx in sorted(best, reverse=True):
+        xi = sorted((candidates[i][1] for i in idx), key=lambda p: (_role_rank(player_roles[p]), -value_of[p]))
+        results.append((round(score, 2), xi))
+    return results
+
+def select_best_xi(batting_ratings, bowling_ratings, player_roles, active_players, constraints=None, exclude=()):
+    """Optimal XI under the role constraints (see optimize_xi), listed in batting-order role groups."""
+    solutions = optimize_xi(batting_ratings, bowling_ratings, player_roles, active_players,
+                            constraints=constraints, exclude=exclude)
+    return solutions[0][1] if solutions else []
 
 if __name__ == "__main__":
-    bat_ratings, bowl_ratings = load_player_ratings()
-    xi = select_best_xi(bat_ratings, bowl_ratings, PLAYER_ROLES)
-    print("Recommended Playing XI based on recent form:")
-    for i, player in enumerate(xi, 1):
-        role = PLAYER_ROLES.get(player, 'Unknown')
-        bat_sc = bat_ratings.get(player, 0)
-        bowl_sc = bowl_ratings.get(player, 0)
-        print(f"{i}. {player} ({role}) - Bat: {bat_sc:.1f} | Bowl: {bowl_sc:.1f}")
+    import time
+
+    bat_ratings, bowl_ratings, active_players = load_player_ratings()
+    start = time.perf_counter()
+    player_roles = load_player_roles()
+    solutions = optimize_xi(bat_ratings, bowl_ratings, player_roles, active_players, top_k=3)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if not solutions:
+        print("No XI satisfies the role constraints with the current active players.")
+    else:
+        total, xi = solutions[0]
+        print(f"Recommended Playing XI based on recent form (total {total:.1f}, solved in {elapsed_ms:.1f} ms):")
+        for i, player in enumerate(xi, 1):
+            role = player_roles.get(player, 'Unknown')
+            bat_sc = bat_ratings.get(player, 0)
+            bowl_sc = bowl_ratings.get(player, 0)
+            print(f"{i}. {player} ({role}) - Bat: {bat_sc:.1f} | Bowl: {bowl_sc:.1f}")
+        for rank, (alt_total, alt_xi) in enumerate(solutions[1:], 2):
+            swapped_in = sorted(set(alt_xi) - set(xi))
+            swapped_out = sorted(set(xi) - set(alt_xi))
+            print(f"Alternative #{rank} (total {alt_total:.1f}): in {swapped_in}, out {swapped_out}")
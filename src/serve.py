@@ -0,0 +1,231 @@
+import argparse
+import json
+import queue
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import predict
+from ratings_snapshot import load_ratings_snapshot
+from select_team import (load_player_ratings, optimize_xi, adjust_ratings,
+                         load_player_roles, PITCH_MULTIPLIERS)
+
+
+class UnknownPlayer(LookupError):
+    """A player the rating snapshot has no form for (served as 404)."""
+
+
+def player_list(value, field):
+    """Player names from a JSON list or a comma-separated string; anything else is a 400."""
+    if isinstance(value, str):
+        return value.split(',')
+    if not isinstance(value, list) or not all(isinstance(p, str) for p in value):
+        raise ValueError(f"'{field}' must be a list of player names or a comma-separated string")
+    return value
+
+
+class PredictionBatcher:
+    """
+    Collects concurrent prediction requests for up to `max_wait` seconds and serves
+    them with a single batch inference call, so N simultaneous clients cost one lookup.
+    """
+
+    def __init__(self, max_wait=0.005, max_batch=64):
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, players):
+        future = Future()
+        self._queue.put((players, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            try:
+                while len(batch) < self.max_batch:
+                    batch.append(self._queue.get(timeout=self.max_wait))
+            except queue.Empty:
+                pass
+
+            try:
+                wanted = set()
+                for players, _ in batch:
+                    wanted.update(players)
+                results = predict.predict_squad_proba(wanted)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for players, future in batch:
+                future.set_result({
+                    role: None if proba is None else proba[proba.index.isin(players)]
+                    for role, proba in results.items()
+                })
+
+
+class SelectionService:
+    """Holds the rating snapshot and warm models for the lifetime of the server."""
+
+    def __init__(self):
+        print("Loading rating snapshot...")
+        self.bat_ratings, self.bowl_ratings, self.active_players = load_player_ratings()
+        self.player_roles = load_player_roles()
+        self.form = self._load_form()
+
+        print("Warming model cache...")
+        predict.predict_squad_proba()
+        self.batcher = PredictionBatcher()
+
+    def _load_form(self):
+        snapshot = load_ratings_snapshot()
+        form = {}
+        for role, paths in predict.ROLE_ARTIFACTS.items():
+            prefix = paths['snapshot_prefix']
+            played = snapshot[snapshot[f'{prefix}match_date'].notna()]
+            for player, row in played.iterrows():
+                form.setdefault(player, {})[role] = {
+                    'performance_score': float(row[f'{prefix}performance_score']),
+                    'performance_label': row[f'{prefix}performance_label'],
+                    'last_match_date': row[f'{prefix}match_date'].strftime('%Y-%m-%d'),
+                }
+        return form
+
+    def player_form(self, player=None):
+        if player is None:
+            return self.form
+        if player not in self.form:
+            raise UnknownPlayer(player)
+        return {player: self.form[player]}
+
+    def predictions(self, players=None, timeout=30):
+        if players is None:
+            players = sorted(self.active_players)
+        results = self.batcher.submit(list(players)).result(timeout=timeout)
+        return {
+            role: None if proba is None else proba.round(4).to_dict(orient='index')
+            for role, proba in results.items()
+        }
+
+    def best_xi(self, pitch='Balanced', bat_mult=None, bowl_mult=None, spin_mult=None, top_k=1, exclude=()):
+        if pitch not in PITCH_MULTIPLIERS:
+            raise ValueError(f"Unknown pitch '{pitch}'. Choose from {list(PITCH_MULTIPLIERS)}")
+        base_bat, base_bowl, base_spin = PITCH_MULTIPLIERS[pitch]
+        bat_mult = base_bat if bat_mult is None else float(bat_mult)
+        bowl_mult = base_bowl if bowl_mult is None else float(bowl_mult)
+        spin_mult = base_spin if spin_mult is None else float(spin_mult)
+
+        adj_bat, adj_bowl = adjust_ratings(self.bat_ratings, self.bowl_ratings, self.player_roles,
+                                           bat_mult, bowl_mult, spin_mult)
+        solutions = optimize_xi(adj_bat, adj_bowl, self.player_roles, self.active_players,
+                                exclude=exclude, top_k=max(1, int(top_k)))
+        xi = solutions[0][1] if solutions else []
+        return {
+            'pitch': pitch,
+            'multipliers': {'bat': bat_mult, 'bowl': bowl_mult, 'spin': spin_mult},
+            'total': solutions[0][0] if solutions else 0.0,
+            'xi': [{
+                'player': p,
+                'role': self.player_roles.get(p, 'Unknown'),
+                'bat_rating': round(adj_bat.get(p, 0), 2),
+                'bowl_rating': round(adj_bowl.get(p, 0), 2),
+            } for p in xi],
+            'alternatives': [{'total': total, 'xi': alt} for total, alt in solutions[1:]],
+        }
+
+
+class SelectionServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections under concurrent clients
+    request_queue_size = 128
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            if length == 0:
+                return {}
+            return json.loads(self.rfile.read(length))
+
+        def _dispatch(self, method):
+            url = urlparse(self.path)
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            try:
+                body = self._read_json() if method == 'POST' else {}
+                if url.path == '/health':
+                    return self._send(200, {'status': 'ok'})
+                if url.path == '/form':
+                    return self._send(200, service.player_form(query.get('player')))
+                if url.path == '/predict':
+                    players = body.get('players')
+                    if players is None:
+                        players = query.get('players')
+                    if players is not None:
+                        players = player_list(players, 'players')
+                    return self._send(200, service.predictions(players))
+                if url.path == '/select':
+                    params = {**query, **body}
+                    exclude = player_list(params.get('exclude', []), 'exclude')
+                    return self._send(200, service.best_xi(
+                        params.get('pitch', 'Balanced'),
+                        params.get('bat_mult'), params.get('bowl_mult'), params.get('spin_mult'),
+                        params.get('top_k', 1), exclude,
+                    ))
+                return self._send(404, {'error': f"Unknown endpoint {url.path}"})
+            except UnknownPlayer as e:
+                return self._send(404, {'error': f"Unknown player {e}"})
+            except (ValueError, TypeError) as e:
+                return self._send(400, {'error': str(e)})
+            except Exception as e:
+                return self._send(500, {'error': str(e)})
+
+        def do_GET(self):
+            self._dispatch('GET')
+
+        def do_POST(self):
+            self._dispatch('POST')
+
+    return Handler
+
+
+def make_server(host='127.0.0.1', port=8765, service=None):
+    service = service or SelectionService()
+    return SelectionServer((host, port), make_handler(service))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local prediction and team selection service.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port)
+    print(f"Serving on http://{args.host}:{args.port} (endpoints: /health, /form, /predict, /select)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
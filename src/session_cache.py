@@ -0,0 +1,60 @@
+from collections import OrderedDict
+
+from instrumentation import current, deep_size
+
+# Per-session budget for derived frames; the shared dataset itself is never counted here
+DEFAULT_MAX_ENTRIES = 16
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+class SessionLRU:
+    """
+    Least-recently-used store for state a single session derives from the shared dataset
+    (filtered row positions, fallback forecasts). Values should be small: store positions
+    into the shared frame rather than sliced copies of it. Bounded by entry count and by approximate bytes,
+    so an analyst clicking through every player cannot grow their session without limit.
+    """
+
+    def __init__(self, name, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.nbytes = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, compute):
+        """The value stored under `key`, computing and storing it on a miss."""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            current().record('cache', f'session:{self.name}', 'hit')
+            return self.entries[key]
+        value = compute()
+        current().record('cache', f'session:{self.name}', 'miss')
+        self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        if key in self.entries:
+            self.nbytes -= self.sizes.pop(key)
+            del self.entries[key]
+        size = deep_size(value)
+        self.entries[key] = value
+        self.sizes[key] = size
+        self.nbytes += size
+        # Evict the oldest entries, but always keep the newest one even if it alone exceeds the budget
+        while len(self.entries) > 1 and (len(self.entries) > self.max_entries or self.nbytes > self.max_bytes):
+            old_key, _ = self.entries.popitem(last=False)
+            self.nbytes -= self.sizes.pop(old_key)
+
+def session_lru(session_state, name, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+    """The session's LRU store called `name`, created on first use."""
+    key = f"_lru_{name}"
+    if key not in session_state:
+        session_state[key] = SessionLRU(name, max_entries, max_bytes)
+    return session_state[key]
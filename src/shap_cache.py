@@ -0,0 +1,141 @@
+import os
+import numpy as np
+import warnings
+
+import predict
+from artifacts import file_version
+
+warnings.filterwarnings('ignore')
+
+CACHE_PATHS = {
+    'batting': "models/shap_cache_bat.npz",
+    'bowling': "models/shap_cache_bowl.npz",
+}
+
+# role -> (cache file version, {'arrays': ..., 'index': {player: row}})
+_LOADED = {}
+
+def _version_key(role):
+    return repr(predict.model_version(role))
+
+def _data_key(role):
+    return repr(predict.data_version(role))
+
+def as_class_array(shap_values, n_classes):
+    """Normalize TreeExplainer output (list per class or ndarray) to (rows, features, classes)."""
+    if isinstance(shap_values, list):
+        return np.stack(shap_values, axis=-1)
+    values = np.asarray(shap_values)
+    if values.ndim == 2:
+        values = np.repeat(values[:, :, None], n_classes, axis=-1)
+    return values
+
+def build_shap_cache(role):
+    """Compute SHAP values for every player's latest feature row in one batch and persist them."""
+    import shap
+
+    loaded = predict.load_role_model(role)
+    if loaded is None:
+        return None
+    model, scaler, le = loaded
+
+    X = predict.latest_feature_rows(role)
+    explainer = shap.TreeExplainer(model)
+    class_names = le.inverse_transform(model.classes_)
+    values = as_class_array(explainer.shap_values(scaler.transform(X)), len(class_names))
+
+    path = CACHE_PATHS[role]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    np.savez_compressed(
+        path,
+        players=X.index.to_numpy().astype(str),
+        values=values.astype(np.float32),
+        data=X.to_numpy(dtype=np.float32),
+        expected_values=np.asarray(explainer.expected_value, dtype=np.float32).reshape(-1),
+        feature_names=np.array(X.columns, dtype=str),
+        class_names=np.array(class_names, dtype=str),
+        model_version=np.array(_version_key(role)),
+        data_version=np.array(_data_key(role)),
+    )
+    print(f"Saved SHAP cache for {len(X)} players to {path}")
+    return path
+
+def load_shap_cache(role):
+    """Cached arrays plus a player -> row index; reloaded only when the cache file changes."""
+    path = CACHE_PATHS[role]
+    if not os.path.exists(path):
+        return None
+
+    version = file_version(path)
+    cached = _LOADED.get(role)
+    if cached is None or cached[0] != version:
+        with np.load(path) as npz:
+            arrays = {k: npz[k] for k in npz.files}
+        index = {p: i for i, p in enumerate(arrays['players'])}
+        cached = (version, {'arrays': arrays, 'index': index})
+        _LOADED[role] = cached
+    return cached[1]
+
+def cache_is_current(role):
+    """True when the cache was built from the current model and the current latest feature rows."""
+    cache = load_shap_cache(role)
+    if cache is None or 'data_version' not in cache['arrays']:
+        return False
+    arrays = cache['arrays']
+    return str(arrays['model_version']) == _version_key(role) and str(arrays['data_version']) == _data_key(role)
+
+def lookup_player(player, role):
+    """
+    Cached SHAP values of a player's latest row for all classes, or None when the
+    player is missing or the cache was built for a different model or data version.
+    """
+    if not cache_is_current(role):
+        return None
+    cache = load_shap_cache(role)
+    row = cache['index'].get(player)
+    if row is None:
+        return None
+
+    arrays = cache['arrays']
+    return {
+        'player': player,
+        'role': role,
+        'model_version': str(arrays['model_version']),
+        'values': arrays['values'][row],
+        'expected_values': arrays['expected_values'],
+        'data': arrays['data'][row],
+        'feature_names': list(arrays['feature_names']),
+        'class_names': list(arrays['class_names']),
+    }
+
+def lookup_explanation(player, role, class_name='Excellent'):
+    """Cached SHAP explanation of a player's latest row for one class (see lookup_player)."""
+    entry = lookup_player(player, role)
+    if entry is None:
+        return None
+
+    if class_name not in entry['class_names']:
+        return None
+    class_idx = entry['class_names'].index(class_name)
+    return {
+        'player': player,
+        'role': role,
+        'class_name': class_name,
+        'class_idx': class_idx,
+        'values': entry['values'][:, class_idx],
+        'base_value': float(entry['expected_values'][class_idx]),
+        'data': entry['data'],
+        'feature_names': entry['feature_names'],
+    }
+
+def to_shap_explanation(entry):
+    import shap
+    return shap.Explanation(values=entry['values'], base_values=entry['base_value'],
+                            data=entry['data'], feature_names=entry['feature_names'])
+
+def main():
+    for role in CACHE_PATHS:
+        build_shap_cache(role)
+
+if __name__ == "__main__":
+    main()
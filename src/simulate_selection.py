@@ -0,0 +1,141 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from select_team import (load_player_ratings, load_player_roles, optimize_xi, role_flags,
+                         DEFAULT_CONSTRAINTS, PITCH_MULTIPLIERS, TEAM_SIZE)
+
+RECENT_WINDOW = 10
+
+# Fill order for the batched selector: scarcest requirements first
+FILL_ORDER = ['keepers', 'spinners', 'openers', 'pacers', 'bowling_options']
+
+def recent_score_matrix(path, players, window=RECENT_WINDOW):
+    """(players, window) matrix of each player's last `window` performance scores, NaN-padded."""
+    df = pd.read_csv(path, usecols=['match_date', 'player', 'performance_score'])
+    df['match_date'] = pd.to_datetime(df['match_date'])
+    recent = df[df['player'].isin(players)].sort_values('match_date', kind='stable')
+    recent = recent.groupby('player').tail(window).copy()
+    recent['slot'] = recent.groupby('player').cumcount()
+    mat = recent.pivot(index='player', columns='slot', values='performance_score')
+    return mat.reindex(index=players, columns=range(window)).to_numpy(dtype=float)
+
+def sample_scores(mat, n_sims, rng):
+    """Resample one recent score per player per simulation: returns (n_sims, players)."""
+    counts = np.sum(~np.isnan(mat), axis=1)
+    idx = (rng.random((n_sims, mat.shape[0])) * np.maximum(counts, 1)).astype(np.int64)
+    samples = mat[np.arange(mat.shape[0])[None, :], idx]
+    return np.nan_to_num(samples, nan=0.0)
+
+def player_values(bat, bowl, roles):
+    """Vectorized select_team.player_value over (n_sims, players) rating arrays."""
+    allrounder = np.array(['allrounder' in r for r in roles])
+    bowler = np.array([('spin' in r or 'pacer' in r) and 'allrounder' not in r for r in roles])
+    return np.where(allrounder, np.maximum(bat, bowl), np.where(bowler, bowl, bat))
+
+def batched_select(values, flags, needs, team_size=TEAM_SIZE):
+    """
+    Select an XI for every simulation at once: meet each minimum with the best qualifying
+    players not yet picked (scarcest requirement first), then fill with the best of the rest.
+    values: (n_sims, players); flags: (players, constraints) bool. Returns a bool mask.
+    """
+    n_sims, n_players = values.shape
+    team_size = min(team_size, n_players)
+    selected = np.zeros((n_sims, n_players), dtype=bool)
+    rows = np.arange(n_sims)[:, None]
+
+    for j, need in enumerate(needs):
+        need = min(need, int(flags[:, j].sum()))
+        if need == 0:
+            continue
+        short = need - (selected & flags[:, j]).sum(axis=1)
+        masked = np.where(flags[:, j] & ~selected, values, -np.inf)
+        top = np.argsort(-masked, axis=1, kind='stable')[:, :need]
+        take = np.arange(need)[None, :] < short[:, None]
+        selected[np.broadcast_to(rows, top.shape)[take], top[take]] = True
+
+    remaining = team_size - selected.sum(axis=1)
+    masked = np.where(selected, -np.inf, values)
+    top = np.argsort(-masked, axis=1, kind='stable')[:, :team_size]
+    take = np.arange(team_size)[None, :] < remaining[:, None]
+    selected[np.broadcast_to(rows, top.shape)[take], top[take]] = True
+    return selected
+
+def simulate_selection(n_sims=10000, pitch='Balanced', seed=42, player_roles=None):
+    player_roles = player_roles or load_player_roles()
+    _, _, active_players = load_player_ratings()
+    players = sorted(p for p in player_roles if p in active_players)
+    roles = [player_roles[p] for p in players]
+
+    rng = np.random.default_rng(seed)
+    bat = sample_scores(recent_score_matrix("data/processed/player_labeled_batting.csv", players), n_sims, rng)
+    bowl = sample_scores(recent_score_matrix("data/processed/player_labeled_bowling.csv", players), n_sims, rng)
+
+    bat_mult, bowl_mult, spin_mult = PITCH_MULTIPLIERS[pitch]
+    spin = np.array(['spin' in r for r in roles])
+    bat = bat * bat_mult
+    bowl = bowl * bowl_mult * np.where(spin, spin_mult, 1.0)
+
+    values = player_values(bat, bowl, roles)
+    flags = np.array([[role_flags(r)[c] for c in FILL_ORDER] for r in roles], dtype=bool)
+    needs = [DEFAULT_CONSTRAINTS[c] for c in FILL_ORDER]
+    selected = batched_select(values, flags, needs)
+    return players, roles, bat, bowl, selected
+
+def summarize(players, roles, selected, top_n=5):
+    probability = pd.DataFrame({
+        'player': players,
+        'role': roles,
+        'selection_probability': selected.mean(axis=0),
+    }).sort_values('selection_probability', ascending=False, ignore_index=True)
+
+    xis, counts = np.unique(np.packbits(selected, axis=1), axis=0, return_counts=True)
+    order = np.argsort(-counts)[:top_n]
+    frequent = []
+    for i in order:
+        mask = np.unpackbits(xis[i])[:len(players)].astype(bool)
+        frequent.append((counts[i] / selected.shape[0], [p for p, m in zip(players, mask) if m]))
+    return probability, frequent
+
+def exact_agreement(players, bat, bowl, selected, n_check=200, player_roles=None):
+    """Share of sampled simulations where the batched XI equals optimize_xi's exact optimum."""
+    player_roles = player_roles or load_player_roles()
+    n_check = min(n_check, selected.shape[0])
+    matches = 0
+    for s in range(n_check):
+        exact = optimize_xi(dict(zip(players, bat[s])), dict(zip(players, bowl[s])),
+                            player_roles, set(players))
+        if exact and set(exact[0][1]) == {p for p, m in zip(players, selected[s]) if m}:
+            matches += 1
+    return matches / n_check if n_check else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo robustness of the recommended XI.")
+    parser.add_argument('--sims', type=int, default=10000)
+    parser.add_argument('--pitch', choices=list(PITCH_MULTIPLIERS), default='Balanced')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', default="outputs/simulation/selection_probability.csv")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    players, roles, bat, bowl, selected = simulate_selection(args.sims, args.pitch, args.seed)
+    probability, frequent = summarize(players, roles, selected)
+    elapsed = time.perf_counter() - start
+
+    print(f"Simulated {args.sims} rating scenarios for {len(players)} players in {elapsed:.2f}s\n")
+    print(probability.round(3).to_string(index=False))
+    print("\nMost frequent XIs:")
+    for share, xi in frequent:
+        print(f"{share:6.1%}  {', '.join(xi)}")
+    print(f"\nBatched selector matches the exact optimizer in "
+          f"{exact_agreement(players, bat, bowl, selected):.1%} of 200 checked scenarios")
+
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    probability.to_csv(args.out, index=False)
+    print(f"Saved selection probabilities to {args.out}")
+
+if __name__ == "__main__":
+    main()
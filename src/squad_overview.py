@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+FORM_WINDOW = 10
+SPARK_MATCHES = 5
+
+LABEL_THRESHOLDS = [(75, 'Excellent'), (50, 'Good'), (25, 'Average')]
+LABEL_ICONS = {'Excellent': '🟢', 'Good': '🔵', 'Average': '🟡', 'Poor': '🔴'}
+LABEL_COLORS = {'Excellent': '#16a34a', 'Good': '#2563eb', 'Average': '#d97706', 'Poor': '#dc2626'}
+
+def form_label(scores):
+    scores = np.asarray(scores)
+    return np.select([scores >= t for t, _ in LABEL_THRESHOLDS], [l for _, l in LABEL_THRESHOLDS], default='Poor')
+
+def squad_form_summary(df, window=FORM_WINDOW, spark_matches=SPARK_MATCHES):
+    """
+    Current form of every player from their last `window` matches, in one groupby pass:
+    role, mean score, label and the last `spark_matches` scores (a list and a NaN-padded matrix).
+    Expects `df` sorted by player and match date.
+    """
+    recent = df.groupby('player', sort=True).tail(window)
+    grouped = recent.groupby('player', sort=True)
+    form_df = grouped.agg(role=('role', 'last'), avg_score=('performance_score', 'mean')).reset_index()
+    form_df['avg_score'] = form_df['avg_score'].round(1)
+    form_df['label'] = form_label(form_df['avg_score'])
+
+    last = recent.groupby('player', sort=True).tail(spark_matches)
+    slot = last.groupby('player', sort=True).cumcount()
+    spark = (pd.DataFrame({'player': last['player'].to_numpy(), 'slot': slot.to_numpy(),
+                           'score': last['performance_score'].to_numpy()})
+             .pivot(index='player', columns='slot', values='score')
+             .reindex(index=form_df['player'], columns=range(spark_matches)))
+    spark_matrix = spark.to_numpy(dtype=float)
+    form_df['last_5'] = [row[~np.isnan(row)].tolist() for row in spark_matrix]
+    return form_df, spark_matrix
+
+def squad_cards_html(form_df, cols=3):
+    """All player cards as one HTML grid, so the page emits a single markdown element."""
+    cards = [
+        f"""<div class="custom-container">
+            <div style="display:flex; justify-content:space-between; align-items:center;">
+                <h4>{player}</h4>
+                <span style="font-size:1.2em; font-weight:bold;">{score}</span>
+            </div>
+            <div style="margin-bottom: 8px;">
+                <span class="role-badge">{role.replace('_', ' ')}</span>
+                <span class="rating-{label.lower()}" style="margin-left: 10px;">{LABEL_ICONS[label]} {label}</span>
+            </div>
+        </div>"""
+        for player, role, score, label in form_df[['player', 'role', 'avg_score', 'label']].itertuples(index=False)
+    ]
+    return (f"<div style='display:grid; grid-template-columns:repeat({cols}, 1fr); gap:0 16px;'>"
+            + "".join(cards) + "</div>")
+
+def sparkline_grid(form_df, spark_matrix, cols=3, cell_height=70):
+    """
+    Small multiples of every player's last scores in a single figure: one bar trace and one
+    label trace laid out on a grid of cells, so the chart cost does not grow with subplots.
+    """
+    n_players, n_bars = spark_matrix.shape
+    rows = max(1, -(-n_players // cols))
+    cell_w, cell_h = n_bars + 2, 130  # 100 for the bars, the rest for the label and padding
+
+    idx = np.arange(n_players)
+    col, row = idx % cols, idx // cols
+    x = (col * cell_w)[:, None] + np.arange(n_bars)[None, :]
+    base = np.broadcast_to(((rows - 1 - row) * cell_h)[:, None], spark_matrix.shape)
+    valid = ~np.isnan(spark_matrix)
+    colors = np.array([LABEL_COLORS[l] for l in form_df['label']], dtype=object)
+    names = form_df['player'].to_numpy()
+
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=x[valid], y=spark_matrix[valid], base=base[valid], width=0.8,
+        marker_color=np.broadcast_to(colors[:, None], spark_matrix.shape)[valid],
+        customdata=np.broadcast_to(names[:, None], spark_matrix.shape)[valid],
+        hovertemplate="%{customdata}: %{y:.1f}<extra></extra>",
+    ))
+    fig.add_trace(go.Scatter(
+        x=col * cell_w - 0.4, y=(rows - 1 - row) * cell_h + 112, mode='text', textposition='middle right',
+        text=[f"{p} · {s}" for p, s in zip(names, form_df['avg_score'])],
+        textfont=dict(size=11, color='#0f172a'), hoverinfo='skip',
+    ))
+    fig.update_layout(height=max(120, rows * cell_height), margin=dict(l=0, r=0, t=0, b=0),
+                      xaxis=dict(visible=False, range=[-0.6, cols * cell_w - 1]),
+                      yaxis=dict(visible=False, range=[0, rows * cell_h]),
+                      paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)',
+                      showlegend=False, bargap=0)
+    return fig
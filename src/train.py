@@ -9,8 +9,20 @@ from sklearn.metrics import classification_report, ConfusionMatrixDisplay
 import matplotlib.pyplot as plt
 import warnings
 
+from artifacts import frame_digest
+
 warnings.filterwarnings('ignore')
 
+def save_split(X_train, X_test, df, path):
+    """Persist train/test row indices, stamped with the training frame's digest, so evaluation reuses the exact split."""
+    os.makedirs("models", exist_ok=True)
+    joblib.dump({
+        'train_idx': X_train.index.to_numpy(),
+        'test_idx': X_test.index.to_numpy(),
+        'n_rows': len(df),
+        'data_digest': frame_digest(df),
+    }, path)
+
 def train_batsman_model():
     print("Training Batsman Model...")
     df = pd.read_csv("data/processed/player_labeled_batting.csv")
@@ -28,6 +40,7 @@ def train_batsman_model():
     X_train, X_test, y_train, y_test = train_test_split(
         X, y_enc, test_size=0.2, random_state=42, stratify=y_enc
     )
+    save_split(X_train, X_test, df, "models/split_bat.pkl")
     
     scaler = StandardScaler()
     X_train_sc = scaler.fit_transform(X_train)
@@ -86,6 +99,7 @@ def train_bowler_model():
         X_train, X_test, y_train, y_test = train_test_split(
              X, y_enc, test_size=0.2, random_state=42
         )
+    save_split(X_train, X_test, df, "models/split_bowl.pkl")
     
     scaler = StandardScaler()
     X_train_sc = scaler.fit_transform(X_train)
@@ -125,6 +139,10 @@ def main():
     train_batsman_model()
     train_bowler_model()
     print("\nModels trained and saved successfully.")
+    
+    # Refresh the per-player SHAP explanations for the new model versions
+    from shap_cache import main as build_shap_caches
+    build_shap_caches()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,230 @@
+import argparse
+import csv
+import glob
+import hashlib
+import io
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+RAW_DIRS = ["data/raw/t20s_male_csv2", "data/raw/lpl_male_csv2"]
+VALIDATION_CACHE_PATH = "data/processed/raw_validation.json"
+QUARANTINE_PATH = "data/processed/raw_quarantine.csv"
+
+BALL_COLUMNS = [
+    'match_id', 'season', 'start_date', 'venue', 'innings', 'ball', 'batting_team', 'bowling_team',
+    'striker', 'non_striker', 'bowler', 'runs_off_bat', 'extras', 'wides', 'noballs', 'byes',
+    'legbyes', 'penalty', 'wicket_type', 'player_dismissed', 'other_wicket_type', 'other_player_dismissed',
+]
+NUMERIC_COLUMNS = ['runs_off_bat', 'extras', 'wides', 'noballs', 'byes', 'legbyes', 'penalty']
+# Cricsheet info-file versions the parsers in this repo understand
+INFO_VERSIONS = ('2.1.0', '2.2.0')
+MAX_OVERS = 20
+# Bump when the checks change so cached verdicts are re-evaluated
+RULES_VERSION = 1
+# Below this many files to check, a process pool costs more than it saves
+POOL_THRESHOLD = 32
+
+_BALL_RE = re.compile(r'^\d+\.\d+$')
+_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_INFO_DATE_RE = re.compile(r'^\d{4}/\d{2}/\d{2}$')
+
+def raw_files(dirs=RAW_DIRS):
+    """Every ball and info CSV under the raw directories, sorted."""
+    return sorted(f for d in dirs for f in glob.glob(os.path.join(d, "*.csv")))
+
+def is_info_file(path):
+    return '_info' in os.path.basename(path)
+
+def _match_id(path):
+    return os.path.basename(path).split('.')[0].split('_')[0]
+
+def _match_key(path):
+    """A match's ball file and its _info file share this key."""
+    return os.path.dirname(path), _match_id(path)
+
+def ball_problems(data, path):
+    """Schema and invariant violations in one ball-by-ball file, as a list of short messages."""
+    try:
+        # Plain csv keeps 'ball' as text; a float column would fold over 10.10 into 10.1
+        rows = csv.reader(io.StringIO(data.decode('utf-8')))
+        header = next(rows, [])
+        body = list(rows)
+    except (UnicodeDecodeError, csv.Error) as e:
+        return [f"unreadable: {type(e).__name__}"]
+
+    problems = []
+    missing = [c for c in BALL_COLUMNS if c not in header]
+    extra = [c for c in header if c not in BALL_COLUMNS]
+    if missing:
+        problems.append(f"missing columns: {', '.join(missing)}")
+    if extra:
+        problems.append(f"unexpected columns: {', '.join(extra)}")
+    if not body:
+        problems.append("no deliveries")
+    if missing or not body:
+        return problems
+
+    col = {c: header.index(c) for c in BALL_COLUMNS}
+    if any(len(row) != len(header) for row in body):
+        return problems + ["rows with the wrong number of fields"]
+
+    def values(name):
+        return [row[col[name]] for row in body]
+
+    ids = set(values('match_id'))
+    if ids != {_match_id(path)}:
+        problems.append(f"match_id {sorted(ids)[:3]} does not match the file name")
+
+    dates = values('start_date')
+    bad_dates = sum(not _DATE_RE.match(d) for d in dates)
+    if bad_dates:
+        problems.append(f"{bad_dates} rows with missing or invalid start_date")
+    elif len(set(dates)) != 1:
+        problems.append("more than one start_date")
+
+    if not all(i.isdigit() and int(i) >= 1 for i in set(values('innings'))):
+        problems.append("invalid innings numbers")
+    balls = values('ball')
+    bad_balls = sum(not _BALL_RE.match(b) for b in balls)
+    if bad_balls:
+        problems.append(f"{bad_balls} rows with invalid ball numbers")
+    elif max(int(b.split('.')[0]) for b in balls) >= MAX_OVERS:
+        problems.append(f"over numbers beyond {MAX_OVERS}")
+    keys = list(zip(values('innings'), balls))
+    if len(set(keys)) != len(keys):
+        problems.append(f"{len(keys) - len(set(keys))} duplicate ball numbers")
+
+    for name in NUMERIC_COLUMNS:
+        if not all(v == '' or v.isdigit() for v in set(values(name))):
+            problems.append(f"non-numeric or negative {name}")
+    teams = list(zip(values('batting_team'), values('bowling_team'), values('striker'), values('bowler')))
+    if any('' in row for row in teams):
+        problems.append("rows without teams, striker or bowler")
+    elif any(bat == bowl for bat, bowl, _, _ in teams):
+        problems.append("batting and bowling team are the same")
+    return problems
+
+def info_problems(data, path):
+    """Version drift and missing essentials in one Cricsheet *_info.csv file."""
+    try:
+        rows = list(csv.reader(io.StringIO(data.decode('utf-8'))))
+    except (UnicodeDecodeError, csv.Error) as e:
+        return [f"unreadable: {type(e).__name__}"]
+
+    problems = []
+    if not rows or rows[0][:1] != ['version']:
+        problems.append("no version line")
+    elif len(rows[0]) < 2 or rows[0][1] not in INFO_VERSIONS:
+        problems.append(f"unsupported info version {rows[0][1:2]}")
+
+    info = {}
+    for row in rows:
+        if len(row) >= 3 and row[0] == 'info':
+            info.setdefault(row[1], []).append(row[2])
+    if len(info.get('team', [])) != 2:
+        problems.append(f"{len(info.get('team', []))} teams listed")
+    dates = info.get('date', [])
+    if not dates or not _INFO_DATE_RE.match(dates[0]):
+        problems.append("missing or invalid date")
+    if info.get('balls_per_over', ['6'])[0] != '6':
+        problems.append(f"balls_per_over {info['balls_per_over'][0]}")
+    return problems
+
+def check_file(path):
+    """(path, sha1, problems) for one raw file; reads the file once for both the hash and the checks."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    digest = hashlib.sha1(data).hexdigest()
+    problems = info_problems(data, path) if is_info_file(path) else ball_problems(data, path)
+    return path, digest, problems
+
+def _file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def load_verdicts(path=VALIDATION_CACHE_PATH):
+    """Cached verdicts keyed by raw file path; empty if missing or written under different rules."""
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return cache.get('files', {}) if cache.get('rules_version') == RULES_VERSION else {}
+
+def validate_raw(files=None, cache_path=VALIDATION_CACHE_PATH, quarantine_path=QUARANTINE_PATH, workers=None):
+    """
+    Check every raw file and write the quarantine list: both files of any match whose ball or
+    info file fails a check. A file whose (mtime, size) matches its cached verdict is not
+    opened; one whose stamp changed is hashed and only re-checked if the content differs.
+    Files that do need checking are spread over a process pool.
+    Returns a dict with the quarantined paths and counts of files checked and reused.
+    """
+    files = raw_files() if files is None else files
+    cached = load_verdicts(cache_path)
+    verdicts, to_check, restamped = {}, [], 0
+    for path in files:
+        st = os.stat(path)
+        stamp = [st.st_mtime_ns, st.st_size]
+        entry = cached.get(path)
+        if entry is not None and entry['stamp'] == stamp:
+            verdicts[path] = entry
+        elif entry is not None and entry['stamp'][1] == st.st_size and entry['sha1'] == _file_hash(path):
+            verdicts[path] = dict(entry, stamp=stamp)
+            restamped += 1
+        else:
+            to_check.append((path, stamp))
+
+    stamps = dict(to_check)
+    paths = [p for p, _ in to_check]
+    if len(paths) >= POOL_THRESHOLD:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(check_file, paths, chunksize=max(1, len(paths) // 64)))
+    else:
+        results = [check_file(p) for p in paths]
+    for path, digest, problems in results:
+        verdicts[path] = {'stamp': stamps[path], 'sha1': digest, 'problems': problems}
+
+    changed = bool(to_check) or restamped or len(verdicts) != len(cached) or not os.path.exists(quarantine_path)
+    # A match is only usable with both files, so one bad file quarantines its partner too
+    failed = {}
+    for p, v in sorted(verdicts.items()):
+        failed.setdefault(_match_key(p), []).extend(f"{os.path.basename(p)}: {m}" for m in v['problems'])
+    quarantined = {p: failed[_match_key(p)] for p in verdicts if failed[_match_key(p)]}
+    if changed:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, 'w') as f:
+            json.dump({'rules_version': RULES_VERSION, 'files': verdicts}, f)
+        pd.DataFrame([(p, _match_id(p), '; '.join(v)) for p, v in sorted(quarantined.items())],
+                     columns=['path', 'match_id', 'problems']).to_csv(quarantine_path, index=False)
+    return {'quarantined': set(quarantined), 'problems': quarantined,
+            'checked': len(to_check), 'reused': len(files) - len(to_check)}
+
+def quarantined_files(path=QUARANTINE_PATH):
+    """Paths on the quarantine list, or an empty set if validation has not run."""
+    if not os.path.exists(path):
+        return set()
+    return set(pd.read_csv(path)['path'])
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate raw Cricsheet files and update the quarantine list.")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size (default: CPU count)")
+    parser.add_argument("--full", action="store_true", help="ignore cached verdicts and re-check every file")
+    args = parser.parse_args()
+
+    if args.full and os.path.exists(VALIDATION_CACHE_PATH):
+        os.remove(VALIDATION_CACHE_PATH)
+    start = time.perf_counter()
+    result = validate_raw(workers=args.workers)
+    print(f"Validated {result['checked'] + result['reused']} raw files in {time.perf_counter() - start:.2f}s "
+          f"({result['checked']} checked, {result['reused']} unchanged); "
+          f"{len(result['quarantined'])} quarantined -> {QUARANTINE_PATH}")
+    for path, problems in sorted(result['problems'].items()):
+        print(f"  {path}: {'; '.join(problems)}")
+
+if __name__ == "__main__":
+    main()
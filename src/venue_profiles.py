@@ -0,0 +1,170 @@
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from artifacts import file_version
+from matchups import NON_BOWLER_DISMISSALS
+from player_profiles import PHASES, bowling_profile, infer_bowling_style
+
+VENUE_PROFILES_PATH = "data/processed/venue_profiles.csv"
+ALL_VENUES = "All venues"
+
+# A match this many days older than the latest one counts half as much
+HALF_LIFE_DAYS = 730
+# Venues with little recent cricket are shrunk toward the all-venue figures with this many matches of weight
+PRIOR_MATCHES = 5
+# Grounds offered as scenarios: the ones Sri Lanka played most at recently
+SCENARIO_VENUE_COUNT = 12
+# Bounds on the condition multipliers, matching the range of the old hand-set pitch multipliers
+BAT_BOWL_RANGE = (1.0, 1.2)
+SPIN_RANGE = (0.85, 1.3)
+
+# (file version, profile table indexed by venue)
+_CACHE = {}
+
+def normalize_venue(venues):
+    """Ground name without the city suffix and with consistent spacing ('R.Premadasa Stadium, Khettarama' -> 'R Premadasa Stadium')."""
+    names = pd.Series(venues, dtype=object).str.split(',').str[0]
+    return names.map(lambda v: re.sub(r'\s+', ' ', v.replace('.', ' ')).strip()).to_numpy()
+
+def bowler_styles(balls_df):
+    """'pace' or 'spin' for every bowler in the data, from the same heuristic as the player profiles."""
+    profile = bowling_profile(balls_df)
+    styles = infer_bowling_style(profile['bowl_middle_share'], profile['bowl_death_share'],
+                                 profile['bowl_stumpings'], profile['bowl_balls'])
+    return pd.Series(styles, index=profile.index)
+
+def _weighted(values, weights, keys):
+    """Per-key sum of weights * values."""
+    return pd.Series(values * weights).groupby(keys).sum()
+
+def venue_profile_frame(balls_df, half_life_days=HALF_LIFE_DAYS, prior_matches=PRIOR_MATCHES, team="Sri Lanka"):
+    """
+    One row per venue with time-decayed first-innings par, run rate by phase, boundary rate and
+    the share of bowler wickets taken by pace and spin, plus an 'All venues' row. `team`'s own
+    decayed match weight at each ground is kept alongside for picking scenario venues. Everything is
+    weighted sums over the deliveries grouped by venue; no per-match loop.
+    """
+    balls = balls_df[balls_df['innings'].isin([1, 2])]
+    dates = pd.to_datetime(balls['start_date'])
+    age_days = (dates.max() - dates).dt.days.to_numpy()
+    weight = 0.5 ** (age_days / half_life_days)
+
+    venue = normalize_venue(balls['venue'].to_numpy())
+    runs = (balls['runs_off_bat'].fillna(0) + balls['extras'].fillna(0)).to_numpy()
+    legal = (balls['wides'].isna() & balls['noballs'].isna()).to_numpy().astype(float)
+    boundary = balls['runs_off_bat'].isin([4, 6]).to_numpy().astype(float)
+    over = balls['ball'].to_numpy().astype(np.int64)
+    phase = np.select([over < PHASES['powerplay'][1], over < PHASES['middle'][1]], ['powerplay', 'middle'], 'death')
+    bowler_wicket = (balls['player_dismissed'].notna() & ~balls['wicket_type'].isin(NON_BOWLER_DISMISSALS)).to_numpy()
+    style = balls['bowler'].map(bowler_styles(balls_df)).fillna('pace').to_numpy()
+
+    # Per match: venue, weight and first-innings total
+    first = balls['innings'].to_numpy() == 1
+    match_ids = balls['match_id'].to_numpy()
+    matches = pd.DataFrame({'venue': venue, 'weight': weight}, index=match_ids).groupby(level=0).first()
+    matches['first_innings'] = pd.Series(runs[first], index=match_ids[first]).groupby(level=0).sum()
+    sl = pd.Series((balls['batting_team'] == team).to_numpy() | (balls['bowling_team'] == team).to_numpy(),
+                   index=match_ids).groupby(level=0).any()
+    matches = matches.dropna(subset=['first_innings'])
+
+    def table(keys, match_keys):
+        """Weighted sums per key (venue, or one key for all venues)."""
+        out = pd.DataFrame({
+            'matches': matches.groupby(match_keys).size(),
+            'team_matches': sl.reindex(matches.index).groupby(match_keys).sum(),
+            'weight': matches['weight'].groupby(match_keys).sum(),
+            'team_weight': (matches['weight'] * sl.reindex(matches.index)).groupby(match_keys).sum(),
+            'par_sum': (matches['first_innings'] * matches['weight']).groupby(match_keys).sum(),
+            'legal_w': _weighted(legal, weight, keys),
+            'boundary_w': _weighted(boundary, weight, keys),
+            'pace_w': _weighted(bowler_wicket & (style == 'pace'), weight, keys),
+            'spin_w': _weighted(bowler_wicket & (style == 'spin'), weight, keys),
+        })
+        for name in PHASES:
+            in_phase = phase == name
+            out[f'{name}_runs_w'] = _weighted(runs * in_phase, weight, keys)
+            out[f'{name}_legal_w'] = _weighted(legal * in_phase, weight, keys)
+        return out
+
+    per_venue = table(venue, matches['venue'])
+    overall = table(np.full(len(venue), ALL_VENUES), np.full(len(matches), ALL_VENUES))
+    sums = pd.concat([per_venue, overall])
+
+    # Shrink each venue's weighted sums toward the all-venue rates with prior_matches of weight
+    share = prior_matches / overall['weight'].iloc[0]
+    prior = overall.iloc[0] * share
+    counts = ['matches', 'team_matches', 'team_weight']
+    shrunk = sums.drop(columns=counts).add(prior.drop(counts), axis=1)
+    shrunk.loc[ALL_VENUES] = sums.loc[ALL_VENUES].drop(counts)
+
+    profile = pd.DataFrame(index=sums.index)
+    profile['matches'] = sums['matches'].astype(int)
+    profile['team_matches'] = sums['team_matches'].astype(int)
+    profile['recent_weight'] = sums['weight'].round(3)
+    profile['team_recent_weight'] = sums['team_weight'].round(3)
+    profile['first_innings_par'] = (shrunk['par_sum'] / shrunk['weight']).round(1)
+    for name in PHASES:
+        profile[f'run_rate_{name}'] = (shrunk[f'{name}_runs_w'] / shrunk[f'{name}_legal_w'] * 6).round(2)
+    profile['boundary_pct'] = (shrunk['boundary_w'] / shrunk['legal_w'] * 100).round(2)
+    wickets = shrunk['pace_w'] + shrunk['spin_w']
+    profile['pace_wicket_share'] = (shrunk['pace_w'] / wickets).round(3)
+    profile['spin_wicket_share'] = (shrunk['spin_w'] / wickets).round(3)
+    profile.index.name = 'venue'
+    return profile.sort_values('recent_weight', ascending=False)
+
+def condition_multipliers(row, overall):
+    """
+    (batting, bowling, extra spin) multipliers for adjust_ratings from a venue row: high-par grounds
+    lift batting, low-par grounds lift bowling, and spin gets its wicket share relative to all venues.
+    """
+    ratio = row['first_innings_par'] / overall['first_innings_par']
+    bat = float(np.clip(ratio, *BAT_BOWL_RANGE))
+    bowl = float(np.clip(1 / ratio, *BAT_BOWL_RANGE))
+    spin = float(np.clip(row['spin_wicket_share'] / overall['spin_wicket_share'], *SPIN_RANGE))
+    return round(bat, 3), round(bowl, 3), round(spin, 3)
+
+def build_venue_profiles(path=VENUE_PROFILES_PATH, balls_df=None):
+    from extract_player_stats import load_data
+
+    start = time.perf_counter()
+    balls_df = load_data() if balls_df is None else balls_df
+    profile = venue_profile_frame(balls_df)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    profile.to_csv(path)
+    overall = profile.loc[ALL_VENUES]
+    print(f"Saved profiles for {len(profile) - 1} venues to {path} in {time.perf_counter() - start:.1f}s "
+          f"(overall par {overall['first_innings_par']:.0f}, spin wicket share {overall['spin_wicket_share']:.0%})")
+    return path
+
+def load_venue_profiles(path=VENUE_PROFILES_PATH):
+    """Profile table indexed by venue, re-read only when the file changes; None if the stage has not run."""
+    if not os.path.exists(path):
+        return None
+    version = file_version(path)
+    cached = _CACHE.get(path)
+    if cached is None or cached[0] != version:
+        cached = (version, pd.read_csv(path, index_col='venue'))
+        _CACHE[path] = cached
+    return cached[1]
+
+def venue_multipliers(venue, path=VENUE_PROFILES_PATH):
+    """Condition multipliers for a profiled venue, or None if it (or the profile table) is unknown."""
+    profile = load_venue_profiles(path)
+    if profile is None or venue not in profile.index or venue == ALL_VENUES:
+        return None
+    return condition_multipliers(profile.loc[venue], profile.loc[ALL_VENUES])
+
+def scenario_venues(count=SCENARIO_VENUE_COUNT, path=VENUE_PROFILES_PATH):
+    """The grounds Sri Lanka played at most recently (by decayed weight); [] without a profile table."""
+    profile = load_venue_profiles(path)
+    if profile is None:
+        return []
+    played = profile[(profile['team_matches'] > 0) & (profile.index != ALL_VENUES)]
+    return played.sort_values('team_recent_weight', ascending=False).index[:count].tolist()
+
+if __name__ == "__main__":
+    build_venue_profiles()